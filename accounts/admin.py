@@ -1,17 +1,29 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import F
+
+from .jwt import forget_role_versions
 
 User = get_user_model()
 
+
+def _set_active(queryset, is_active):
+    # Bulk update bypasses CustomUser.save(), so bump role_version here to revoke tokens.
+    queryset = queryset.exclude(is_active=is_active)
+    ids = list(queryset.values_list('pk', flat=True))
+    if ids:
+        User.objects.filter(pk__in=ids).update(is_active=is_active, role_version=F('role_version') + 1)
+        forget_role_versions(ids)
+
 # Actions
 @admin.action(description="Deactivate selected users (set is_active=False)")
 def deactivate_users(modeladmin, request, queryset):
-    queryset.exclude(is_superuser=True).update(is_active=False)
+    _set_active(queryset.exclude(is_superuser=True), False)
 
 @admin.action(description="Activate selected users (set is_active=True)")
 def activate_users(modeladmin, request, queryset):
-    queryset.update(is_active=True)
+    _set_active(queryset, True)
 
 class CustomUserAdmin(BaseUserAdmin):
     list_display = (
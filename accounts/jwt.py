@@ -0,0 +1,174 @@
+"""JWT tokens that carry the user's role, and authentication built on them.
+
+Access and refresh tokens carry `role`, `is_staff`, `is_superuser` and `rv`, the user's
+role_version. A token whose `rv` no longer matches the user's current role_version is
+rejected. This revokes outstanding tokens whenever a role/staff/active flag changes,
+because CustomUser.save() bumps the counter.
+
+RoleClaimJWTAuthentication is the project-wide default. It still loads the user row,
+and also enforces the `rv` check.
+
+Views that only need the caller's id and role can opt into StatelessRoleJWTAuthentication
+with @authentication_classes(TOKEN_USER_AUTHENTICATION). There request.user is a
+LazyTokenUser built from the claims, and the `rv` check is served from the cache. The
+CustomUser row is fetched only if the view reads an attribute that is not in the token.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import cached_property
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+ROLE_VERSION_CLAIM = 'rv'
+_ROLE_VERSION_KEY = 'accounts:role-version:{}'
+
+
+def _role_version_ttl() -> int:
+    return int(getattr(settings, 'ROLE_VERSION_CACHE_TTL', 300))
+
+
+def publish_role_version(user_id, version: int) -> None:
+    """Make a new role_version visible to stateless authentication once committed."""
+    transaction.on_commit(lambda: cache.set(_ROLE_VERSION_KEY.format(user_id), version, _role_version_ttl()))
+
+
+def forget_role_versions(user_ids) -> None:
+    """Drop cached versions after a queryset .update() changed role_version."""
+    transaction.on_commit(lambda: cache.delete_many([_ROLE_VERSION_KEY.format(uid) for uid in user_ids]))
+
+
+def current_role_version(user_id):
+    """The user's role_version, or None if the user is missing or inactive."""
+    key = _ROLE_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = (
+            get_user_model().objects.filter(pk=user_id, is_active=True)
+            .values_list('role_version', flat=True)
+            .first()
+        )
+        if row is None:
+            return None
+        version = row
+        cache.set(key, version, _role_version_ttl())
+    return version
+
+
+def stamp_role_claims(token, user) -> None:
+    token['role'] = (getattr(user, 'role', '') or '').upper()
+    token['is_staff'] = bool(user.is_staff)
+    token['is_superuser'] = bool(user.is_superuser)
+    token[ROLE_VERSION_CLAIM] = int(getattr(user, 'role_version', 0) or 0)
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token (and derived access tokens) with role claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        stamp_role_claims(token, user)
+        return token
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Re-reads the user on refresh so new access tokens carry current claims."""
+
+    token_class = RoleRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.filter(**{
+            api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM),
+            'is_active': True,
+        }).first()
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive.', code='user_inactive')
+        stamp_role_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+def _check_role_version(validated_token, version) -> None:
+    claimed = validated_token.get(ROLE_VERSION_CLAIM)
+    if claimed is not None and claimed != version:
+        raise AuthenticationFailed('Token is outdated; please sign in again.', code='role_changed')
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """Default JWT authentication: loads the user and enforces the role-version claim."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        _check_role_version(validated_token, user.role_version)
+        return user
+
+
+class LazyTokenUser(TokenUser):
+    """request.user built from token claims; the CustomUser row is loaded on first need."""
+
+    @cached_property
+    def role(self) -> str:
+        return self.token.get('role', '')
+
+    @cached_property
+    def role_version(self) -> int:
+        return self.token.get(ROLE_VERSION_CLAIM, 0)
+
+    @cached_property
+    def username(self) -> str:
+        return self._user.username
+
+    @cached_property
+    def _user(self):
+        return get_user_model().objects.get(pk=self.id)
+
+    def __getattr__(self, name):
+        # Only reached for attributes not provided by the token (e.g. email, _meta).
+        if name.startswith('__') or name in ('token', '_user'):
+            raise AttributeError(name)
+        return getattr(self._user, name)
+
+
+class StatelessRoleJWTAuthentication(RoleClaimJWTAuthentication):
+    """Opt-in: no user query for tokens that carry role claims."""
+
+    def get_user(self, validated_token):
+        if ROLE_VERSION_CLAIM not in validated_token or 'role' not in validated_token:
+            # Token issued before role claims existed.
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        version = current_role_version(user_id)
+        if version is None:
+            raise AuthenticationFailed('User not found or inactive.', code='user_inactive')
+        _check_role_version(validated_token, version)
+        return LazyTokenUser(validated_token)
+
+
+# For @authentication_classes on read-heavy views that only use request.user.id / role.
+TOKEN_USER_AUTHENTICATION = (StatelessRoleJWTAuthentication, SessionAuthentication)
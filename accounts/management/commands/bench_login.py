@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'bench_login_'
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare users for load-test-login.js and report the password hasher's cost. "
+        "Hashing is reported separately because it dominates login latency by design; "
+        "subtract it from the k6 p95 to see the cost of everything else (queries, tokens)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of bench users to create/refresh (default 200).')
+        parser.add_argument('--password', default='BenchPass123!', help='Password shared by all bench users.')
+        parser.add_argument('--samples', type=int, default=20, help='Password checks to time (default 20).')
+        parser.add_argument('--delete', action='store_true', help='Remove the bench users and exit.')
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} rows.'))
+            return
+
+        count = options['users']
+        samples = options['samples']
+        if count < 1 or samples < 1:
+            raise CommandError('--users and --samples must be >= 1')
+
+        # Hash once; every bench user shares the same encoded password.
+        encoded = make_password(options['password'])
+        existing = set(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('username', flat=True)
+        )
+        new_users = [
+            User(
+                username=f'{USERNAME_PREFIX}{i}',
+                email=f'{USERNAME_PREFIX}{i}@example.com',
+                role='STUDENT',
+                password=encoded,
+            )
+            for i in range(count)
+            if f'{USERNAME_PREFIX}{i}' not in existing
+        ]
+        User.objects.bulk_create(new_users, batch_size=500)
+        User.objects.filter(username__startswith=USERNAME_PREFIX).update(password=encoded, is_active=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} bench users ready ({len(new_users)} created): {USERNAME_PREFIX}<0..{count - 1}>'
+        ))
+
+        hasher = get_hasher()
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.verify(options['password'], encoded)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(round(0.95 * len(timings))) - 1)]
+        self.stdout.write(
+            f'Hasher: {hasher.algorithm} ({settings.PASSWORD_HASHERS[0]})\n'
+            f'  check_password per login: median {statistics.median(timings):.1f} ms, '
+            f'p95 {p95:.1f} ms over {samples} samples (single core)\n'
+            f'  At N concurrent logins on C cores expect roughly N / C x median of queueing in the hasher alone.'
+        )
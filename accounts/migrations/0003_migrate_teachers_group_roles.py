@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:40
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    """Give members of the legacy "Teachers" group the TEACHER role."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    CustomUser.objects.filter(groups__name__iexact='Teachers', role='STUDENT').update(role='TEACHER')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_badge_customuser_avatar_customuser_bio_and_more"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
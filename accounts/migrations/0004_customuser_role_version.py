@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_migrate_teachers_group_roles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='role_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
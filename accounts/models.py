@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Lower
 from django.utils import timezone
 
 class CustomUser(AbstractUser):
@@ -25,26 +29,77 @@ class CustomUser(AbstractUser):
     # Premium features
     is_premium = models.BooleanField(default=False)
     premium_expiry = models.DateField(null=True, blank=True)
-    
+
+    # Bumped whenever a field embedded in JWT claims changes; tokens carrying an older
+    # value are rejected (see accounts.jwt).
+    role_version = models.PositiveIntegerField(default=0)
+
+    CLAIM_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Login by email matches on LOWER(email); see accounts.views.api_login.
+            models.Index(Lower('email'), name='accounts_user_email_lower_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance._claim_state()
+        return instance
+
+    def _claim_state(self):
+        # Deferred fields count as unchanged.
+        return tuple(self.__dict__.get(f) for f in self.CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', None)
+        claims_changed = loaded is not None and any(
+            f in self.__dict__ and old != self.__dict__[f]
+            for f, old in zip(self.CLAIM_FIELDS, loaded)
+        )
+        if claims_changed:
+            self.role_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'role_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self._claim_state()
+        if claims_changed:
+            from .jwt import publish_role_version
+
+            publish_role_version(self.pk, self.role_version)
+
     def __str__(self):
         return f"{self.username} ({self.role})"
     
     def update_streak(self):
-        """Update user streak based on activity"""
+        """Record today's activity with one conditional UPDATE.
+
+        No-op (no write) when activity was already recorded today. Continues the streak
+        from yesterday, otherwise restarts it at 1.
+        """
         today = timezone.now().date()
-        if self.last_activity_date:
-            days_diff = (today - self.last_activity_date).days
-            if days_diff == 1:
-                self.current_streak += 1
-                if self.current_streak > self.longest_streak:
-                    self.longest_streak = self.current_streak
-            elif days_diff > 1:
-                self.current_streak = 1
-        else:
-            self.current_streak = 1
-        
-        self.last_activity_date = today
-        self.save()
+        yesterday = today - timedelta(days=1)
+        next_streak = Case(
+            When(last_activity_date=yesterday, then=F('current_streak') + 1),
+            default=Value(1),
+            output_field=models.IntegerField(),
+        )
+        updated = (
+            type(self).objects.filter(pk=self.pk)
+            .exclude(last_activity_date=today)
+            .update(
+                current_streak=next_streak,
+                longest_streak=Greatest('longest_streak', next_streak),
+                last_activity_date=today,
+            )
+        )
+        if updated:
+            # Mirror the UPDATE in memory instead of re-reading the row.
+            self.current_streak = self.current_streak + 1 if self.last_activity_date == yesterday else 1
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+            self.last_activity_date = today
 
 
 class Badge(models.Model):
@@ -0,0 +1,40 @@
+"""Role resolution shared by every app's permission checks.
+
+CustomUser.role is the single source of truth. Legacy "Teachers" group membership is
+folded into it (migration accounts.0003 for existing users, accounts.signals for new
+group changes), so every check here is a plain attribute read with no queries. These
+helpers only need `is_authenticated`, `is_staff`, `is_superuser` and `role`, so they
+work for any user-like object.
+"""
+
+ADMIN = 'ADMIN'
+TEACHER = 'TEACHER'
+STUDENT = 'STUDENT'
+
+LEGACY_TEACHER_GROUP = 'Teachers'
+
+
+def user_role(user) -> str:
+    """The declared role (ADMIN/TEACHER/STUDENT), or '' for anonymous users."""
+    if not (user and user.is_authenticated):
+        return ''
+    return (getattr(user, 'role', '') or '').upper()
+
+
+def is_admin(user) -> bool:
+    """Admins by role, plus staff/superusers (Django admin accounts)."""
+    if not (user and user.is_authenticated):
+        return False
+    return bool(getattr(user, 'is_staff', False) or getattr(user, 'is_superuser', False) or user_role(user) == ADMIN)
+
+
+def is_teacher(user) -> bool:
+    return user_role(user) == TEACHER
+
+
+def is_teacher_or_admin(user) -> bool:
+    return is_admin(user) or is_teacher(user)
+
+
+def is_student(user) -> bool:
+    return user_role(user) == STUDENT
@@ -0,0 +1,39 @@
+"""Keep CustomUser.role in step with the legacy "Teachers" group."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models import F
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .jwt import forget_role_versions
+from .roles import LEGACY_TEACHER_GROUP, STUDENT, TEACHER
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _teachers_group_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Adding a user to "Teachers" (admin UI, scripts) promotes a student to TEACHER.
+
+    Removal leaves the role alone: the role is authoritative and may have been set directly.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # group.user_set.add(...): instance is the group, pk_set holds user ids.
+        if instance.name.lower() != LEGACY_TEACHER_GROUP.lower():
+            return
+        user_ids = pk_set
+    else:
+        # user.groups.add(...): instance is the user, pk_set holds group ids.
+        if not Group.objects.filter(pk__in=pk_set, name__iexact=LEGACY_TEACHER_GROUP).exists():
+            return
+        user_ids = [instance.pk]
+    promoted = list(User.objects.filter(pk__in=user_ids, role=STUDENT).values_list('pk', flat=True))
+    if not promoted:
+        return
+    User.objects.filter(pk__in=promoted).update(role=TEACHER, role_version=F('role_version') + 1)
+    forget_role_versions(promoted)
+    if not reverse and instance.pk in promoted:
+        instance.refresh_from_db(fields=['role', 'role_version'])
+        instance._loaded_claims = instance._claim_state()
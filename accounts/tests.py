@@ -34,3 +34,137 @@ class UserVisibilityTests(TestCase):
 		self.assertEqual(resp.status_code, 200)
 		self.assertEqual(len(resp.data), 1)
 		self.assertEqual(resp.data[0]['id'], self.student1.id)
+
+
+class RoleResolutionTests(TestCase):
+	def setUp(self):
+		from django.contrib.auth.models import Group
+
+		User = get_user_model()
+		self.teachers = Group.objects.create(name='Teachers')
+		self.user = User.objects.create_user(username='legacy', password='pw12345', role='STUDENT')
+
+	def test_teachers_group_membership_sets_role(self):
+		self.user.groups.add(self.teachers)
+		self.user.refresh_from_db()
+		self.assertEqual(self.user.role, 'TEACHER')
+
+		other = get_user_model().objects.create_user(username='legacy2', password='pw12345')
+		self.teachers.user_set.add(other)
+		other.refresh_from_db()
+		self.assertEqual(other.role, 'TEACHER')
+
+	def test_permission_checks_do_not_query(self):
+		from accounts.roles import is_admin, is_teacher_or_admin
+
+		self.user.groups.add(self.teachers)
+		user = get_user_model().objects.get(pk=self.user.pk)
+		with self.assertNumQueries(0):
+			self.assertTrue(is_teacher_or_admin(user))
+			self.assertFalse(is_admin(user))
+
+
+class RoleClaimTokenTests(TestCase):
+	def setUp(self):
+		from django.core.cache import cache
+
+		cache.clear()
+		self.client = APIClient()
+		self.user = get_user_model().objects.create_user(username='jwt_s', password='pw12345', role='STUDENT')
+
+	def _login(self):
+		resp = self.client.post('/api/auth/login/', {'username': 'jwt_s', 'password': 'pw12345'}, format='json')
+		self.assertEqual(resp.status_code, 200)
+		return resp.data
+
+	def test_access_token_carries_role_claims(self):
+		from rest_framework_simplejwt.tokens import AccessToken
+
+		token = AccessToken(self._login()['access'])
+		self.assertEqual(token['role'], 'STUDENT')
+		self.assertFalse(token['is_staff'])
+		self.assertEqual(token['rv'], self.user.role_version)
+
+	def test_opt_in_view_skips_user_lookup(self):
+		access = self._login()['access']
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 200)  # warms the role-version cache
+		with self.assertNumQueries(1):
+			resp = self.client.get('/api/users/me/attempts/')
+		self.assertEqual(resp.status_code, 200)
+
+	def test_role_change_revokes_tokens_until_refresh(self):
+		tokens = self._login()
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 200)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.user.role = 'TEACHER'
+			self.user.save(update_fields=['role'])
+
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 401)
+		# Session auth is listed first by default, so DRF reports this as 403.
+		self.assertIn(self.client.get('/api/users/me/').status_code, (401, 403))
+
+		self.client.credentials()
+		refreshed = self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+		self.assertEqual(refreshed.status_code, 200)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 200)
+
+	def test_admin_deactivate_action_revokes_cached_tokens(self):
+		from .admin import deactivate_users
+
+		access = self._login()['access']
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 200)  # caches rv
+
+		with self.captureOnCommitCallbacks(execute=True):
+			deactivate_users(None, None, get_user_model().objects.filter(pk=self.user.pk))
+		self.assertEqual(self.client.get('/api/users/me/attempts/').status_code, 401)
+
+
+class LoginFastPathTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.user = get_user_model().objects.create_user(
+			username='fast', email='Fast.User@Example.com', password='pw12345', role='STUDENT'
+		)
+
+	def test_email_login_is_case_insensitive(self):
+		resp = self.client.post('/api/auth/login/', {'username': 'fast.user@example.COM', 'password': 'pw12345'}, format='json')
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(resp.data['user']['username'], 'fast')
+
+	def test_streak_update_is_single_conditional_update(self):
+		from datetime import timedelta
+		from django.utils import timezone
+
+		today = timezone.now().date()
+		get_user_model().objects.filter(pk=self.user.pk).update(
+			last_activity_date=today - timedelta(days=1), current_streak=3, longest_streak=3
+		)
+		self.user.refresh_from_db()
+		with self.assertNumQueries(1):
+			self.user.update_streak()
+		self.assertEqual((self.user.current_streak, self.user.longest_streak), (4, 4))
+		self.user.refresh_from_db()
+		self.assertEqual((self.user.current_streak, self.user.longest_streak, self.user.last_activity_date), (4, 4, today))
+
+		# Already recorded today: the UPDATE matches no row and nothing changes.
+		with self.assertNumQueries(1):
+			self.user.update_streak()
+		self.user.refresh_from_db()
+		self.assertEqual(self.user.current_streak, 4)
+
+	def test_streak_restarts_after_gap(self):
+		from datetime import timedelta
+		from django.utils import timezone
+
+		get_user_model().objects.filter(pk=self.user.pk).update(
+			last_activity_date=timezone.now().date() - timedelta(days=5), current_streak=7, longest_streak=9
+		)
+		self.user.refresh_from_db()
+		self.user.update_streak()
+		self.user.refresh_from_db()
+		self.assertEqual((self.user.current_streak, self.user.longest_streak), (1, 9))
@@ -7,8 +7,10 @@ from rest_framework.response import Response as APIResponse
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import PermissionDenied
 from rest_framework_simplejwt.tokens import RefreshToken
+from .jwt import RoleRefreshToken
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db.models import Avg, Prefetch, prefetch_related_objects
+from django.db.models.functions import Lower
 from .forms import StudentSignUpForm
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, 
@@ -66,7 +68,7 @@ def api_register(request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = RoleRefreshToken.for_user(user)
             
             return APIResponse({
                 'user': UserProfileSerializer(user).data,
@@ -98,16 +100,18 @@ def api_login(request):
             'error': 'Please provide both username/email and password'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Try to find user by username or email
-    user = None
+    # Try to find user by username or email (case-insensitive, served by the LOWER(email) index)
+    username = username_or_email
     if '@' in username_or_email:
-        try:
-            user = User.objects.get(email=username_or_email)
-            username = user.username
-        except User.DoesNotExist:
-            username = username_or_email
-    else:
-        username = username_or_email
+        match = (
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower=username_or_email.lower())
+            .order_by('pk')
+            .values_list('username', flat=True)
+            .first()
+        )
+        if match is not None:
+            username = match
     
     # Authenticate
     user = authenticate(username=username, password=password)
@@ -122,11 +126,12 @@ def api_login(request):
             'error': 'Account is disabled'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Update streak
+    # Update streak (no write when already recorded today)
     user.update_streak()
     
     # Generate tokens
-    refresh = RefreshToken.for_user(user)
+    refresh = RoleRefreshToken.for_user(user)
+    prefetch_related_objects([user], Prefetch('badges', queryset=UserBadge.objects.select_related('badge')))
     
     return APIResponse({
         'user': UserProfileSerializer(user).data,
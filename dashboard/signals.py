@@ -0,0 +1,56 @@
+"""Model signal hooks for the dashboard app."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from exams.models import Attempt
+from questionpapers.models import Evaluation, PaperAttempt, QuestionPaper
+from quizzes.models import QuizAttempt
+
+from .student_stats import invalidate_student_summaries
+from .teacher_stats import invalidate_teacher_dashboards
+
+# Attempt fields shown on the student dashboard; autosaves of answers/metadata are not.
+_EXAM_SUMMARY_FIELDS = {'status', 'finished_at', 'total_score', 'percentage', 'rank'}
+
+
+@receiver(post_save, sender=QuestionPaper)
+@receiver(post_delete, sender=QuestionPaper)
+def _paper_changed(sender, instance, **kwargs):
+    invalidate_teacher_dashboards([instance.created_by_id])
+
+
+@receiver(post_save, sender=PaperAttempt)
+@receiver(post_delete, sender=PaperAttempt)
+def _attempt_changed(sender, instance, **kwargs):
+    # Starts, submissions and scores all feed the paper owner's dashboard.
+    if PaperAttempt.paper.is_cached(instance):
+        invalidate_teacher_dashboards([instance.paper.created_by_id])
+    else:
+        invalidate_teacher_dashboards(
+            QuestionPaper.objects.filter(pk=instance.paper_id).values_list('created_by_id', flat=True)
+        )
+    invalidate_student_summaries([instance.user_id])
+
+
+@receiver(post_save, sender=Evaluation)
+@receiver(post_delete, sender=Evaluation)
+def _evaluation_changed(sender, instance, **kwargs):
+    invalidate_teacher_dashboards(
+        QuestionPaper.objects.filter(attempts=instance.attempt_id).values_list('created_by_id', flat=True)
+    )
+    invalidate_student_summaries(
+        PaperAttempt.objects.filter(pk=instance.attempt_id).values_list('user_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Attempt)
+def _exam_attempt_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or _EXAM_SUMMARY_FIELDS.intersection(update_fields):
+        invalidate_student_summaries([instance.user_id])
+
+
+@receiver(post_delete, sender=Attempt)
+@receiver(post_save, sender=QuizAttempt)
+@receiver(post_delete, sender=QuizAttempt)
+def _student_attempt_changed(sender, instance, **kwargs):
+    invalidate_student_summaries([instance.user_id])
@@ -0,0 +1,237 @@
+"""Student dashboard summary across exams, question papers and quizzes.
+
+One payload replaces the React dashboard's separate attempts/stats/topics calls. It is
+computed with a fixed set of grouped queries (an aggregate per source, a "recent"
+slice per source, a per-day trend and per-topic accuracy), however many attempts the
+student has, and cached per student. Submit and grade events drop the entry
+(dashboard.signals). Login streak fields come from the user row and pending
+assignments from the learning feed's own cache, so those two are always current.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Exists, F, Max, OuterRef, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from exams.models import Attempt, Response
+from ib_project.db_router import primary_reads
+from questionpapers.models import PaperAttempt, QuestionPaper
+from quizzes.models import QuizAttempt
+
+_STUDENT_KEY = 'dashboard:student:{}'
+RECENT_LIMIT = 10
+TOPIC_LIMIT = 8
+TREND_DAYS = 7
+STREAK_LOOKBACK_DAYS = 366
+
+
+def _dashboard_ttl() -> int:
+    return int(getattr(settings, 'STUDENT_DASHBOARD_CACHE_TTL', 300))
+
+
+def _round(value, digits=1):
+    return round(float(value), digits) if value is not None else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _pending_struct():
+    """Correlated 'has an ungraded structured response' check for attempts."""
+    return Response.objects.filter(attempt_id=OuterRef('pk'), question__type='STRUCT', teacher_mark__isnull=True)
+
+
+def _exam_summary(user_id) -> dict:
+    finished = Q(status__in=['submitted', 'timedout'])
+    row = (
+        Attempt.objects.filter(user_id=user_id)
+        .exclude(status='scheduled')
+        .annotate(needs_grading=Exists(_pending_struct()))
+        .aggregate(
+            completed=Count('id', filter=finished),
+            in_progress=Count('id', filter=Q(status='inprogress')),
+            awaiting_grading=Count('id', filter=finished & Q(needs_grading=True)),
+            average_percentage=Avg('percentage', filter=finished & Q(needs_grading=False)),
+            best_percentage=Max('percentage', filter=finished & Q(needs_grading=False)),
+        )
+    )
+    row['average_percentage'] = _round(row['average_percentage']) or 0
+    row['best_percentage'] = _round(row['best_percentage']) or 0
+    return row
+
+
+def _paper_summary(user_id) -> dict:
+    row = PaperAttempt.objects.filter(user_id=user_id).aggregate(
+        attempted=Count('id'),
+        finished=Count('id', filter=Q(submitted=True)),
+        evaluated=Count('evaluation'),
+        average_percentage=Avg(F('score') * 100.0 / F('max_score'), filter=Q(submitted=True, max_score__gt=0)),
+    )
+    row['average_percentage'] = _round(row['average_percentage']) or 0
+    row['not_started'] = QuestionPaper.objects.filter(is_published=True).exclude(attempts__user_id=user_id).count()
+    return row
+
+
+def _quiz_summary(user_id) -> dict:
+    row = QuizAttempt.objects.filter(user_id=user_id).aggregate(
+        attempts=Count('id'),
+        finished=Count('id', filter=Q(finished_at__isnull=False)),
+        average_percentage=Avg(F('score') * 100.0 / F('max_score'), filter=Q(finished_at__isnull=False, max_score__gt=0)),
+    )
+    row['average_percentage'] = _round(row['average_percentage']) or 0
+    return row
+
+
+def _recent_exam_attempts(user_id) -> list[dict]:
+    """The latest exam attempts, in the shape of users/me/attempts/ items."""
+    attempts = (
+        Attempt.objects.filter(user_id=user_id).exclude(status='scheduled')
+        .select_related('exam__topic')
+        .only('id', 'exam_id', 'status', 'total_score', 'percentage', 'started_at', 'finished_at', 'exam__title', 'exam__topic__name')
+        .annotate(needs_grading=Exists(_pending_struct()))
+        .order_by('-started_at')[:RECENT_LIMIT]
+    )
+    return [
+        {
+            'id': a.id,
+            'exam_id': a.exam_id,
+            'exam_title': a.exam.title,
+            'topic_name': a.exam.topic.name if a.exam.topic_id else None,
+            'status': a.status,
+            'needs_grading': a.needs_grading,
+            'score': float(a.total_score or 0),
+            'percentage': float(a.percentage or 0),
+            'started_at': _iso(a.started_at),
+            'finished_at': _iso(a.finished_at),
+        }
+        for a in attempts
+    ]
+
+
+def _recent_activity(user_id, exam_attempts) -> list[dict]:
+    items = [
+        {
+            'kind': 'exam', 'id': a['id'], 'title': a['exam_title'], 'status': a['status'],
+            'percentage': None if a['needs_grading'] else _round(a['percentage']),
+            'at': a['finished_at'] or a['started_at'],
+        }
+        for a in exam_attempts
+    ]
+    for a in (
+        PaperAttempt.objects.filter(user_id=user_id)
+        .select_related('paper').only('id', 'submitted', 'score', 'max_score', 'started_at', 'finished_at', 'paper__title')
+        .order_by('-started_at')[:RECENT_LIMIT]
+    ):
+        items.append({
+            'kind': 'paper', 'id': a.id, 'title': a.paper.title, 'status': 'submitted' if a.submitted else 'inprogress',
+            'percentage': _round(a.score * 100.0 / a.max_score) if a.score is not None and a.max_score else None,
+            'at': _iso(a.finished_at or a.started_at),
+        })
+    for a in (
+        QuizAttempt.objects.filter(user_id=user_id)
+        .select_related('quiz').only('id', 'score', 'max_score', 'started_at', 'finished_at', 'quiz__title')
+        .order_by('-started_at')[:RECENT_LIMIT]
+    ):
+        items.append({
+            'kind': 'quiz', 'id': a.id, 'title': a.quiz.title if a.quiz else None,
+            'status': 'submitted' if a.finished_at else 'inprogress',
+            'percentage': _round(a.score * 100.0 / a.max_score) if a.max_score else None,
+            'at': _iso(a.finished_at or a.started_at),
+        })
+    # ISO-8601 strings in one timezone sort chronologically.
+    items.sort(key=lambda item: item['at'] or '', reverse=True)
+    return items[:RECENT_LIMIT]
+
+
+def _score_trend(user_id, today) -> list[dict]:
+    """Average graded exam percentage per day for the last TREND_DAYS days (0 when idle)."""
+    first_day = today - timedelta(days=TREND_DAYS - 1)
+    rows = (
+        Attempt.objects.filter(user_id=user_id, status__in=['submitted', 'timedout'], started_at__date__gte=first_day)
+        .annotate(needs_grading=Exists(_pending_struct()), day=TruncDate('started_at'))
+        .filter(needs_grading=False)
+        .values('day')
+        .annotate(average=Avg('percentage'))
+        .order_by()
+    )
+    by_day = {row['day']: row['average'] for row in rows}
+    days = [first_day + timedelta(days=i) for i in range(TREND_DAYS)]
+    return [{'date': day.isoformat(), 'average_percentage': _round(by_day.get(day)) or 0} for day in days]
+
+
+def _submission_streak(user_id, today) -> int:
+    """Consecutive days, ending today or yesterday, with at least one finished exam."""
+    days = (
+        Attempt.objects.filter(user_id=user_id, status__in=['submitted', 'timedout'])
+        .annotate(day=TruncDate('started_at'))
+        .values_list('day', flat=True)
+        .distinct()
+        .order_by('-day')[:STREAK_LOOKBACK_DAYS]
+    )
+    streak = 0
+    expected = None
+    for day in days:
+        if expected is None:
+            if day < today - timedelta(days=1):
+                break
+        elif day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    return streak
+
+
+def _topic_accuracy(user_id) -> list[dict]:
+    rows = (
+        Response.objects.filter(attempt__user_id=user_id, attempt__status='submitted')
+        .values('question__topic_id', 'question__topic__name')
+        .annotate(total=Count('id'), correct=Count('id', filter=Q(correct=True)))
+        .order_by('-total', 'question__topic_id')[:TOPIC_LIMIT]
+    )
+    return [
+        {
+            'topic_id': r['question__topic_id'],
+            'topic': r['question__topic__name'],
+            'correct': r['correct'],
+            'total': r['total'],
+            'accuracy_pct': round(100.0 * r['correct'] / r['total'], 2) if r['total'] else 0.0,
+        }
+        for r in rows
+    ]
+
+
+def build_student_summary(user_id) -> dict:
+    exam_attempts = _recent_exam_attempts(user_id)
+    today = timezone.localdate()
+    return {
+        'exams': _exam_summary(user_id),
+        'papers': _paper_summary(user_id),
+        'quizzes': _quiz_summary(user_id),
+        'recent_attempts': exam_attempts,
+        'recent_activity': _recent_activity(user_id, exam_attempts),
+        'trend': _score_trend(user_id, today),
+        'submission_streak': _submission_streak(user_id, today),
+        'topics': _topic_accuracy(user_id),
+    }
+
+
+def student_summary(user_id) -> dict:
+    """The student's summary from cache, rebuilding (and caching) it when missing."""
+    key = _STUDENT_KEY.format(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        with primary_reads():  # shared entry: never fill it from a lagging replica
+            summary = build_student_summary(user_id)
+        cache.set(key, summary, _dashboard_ttl())
+    return summary
+
+
+def invalidate_student_summaries(user_ids) -> None:
+    """Drop cached summaries once the current transaction (if any) commits."""
+    keys = [_STUDENT_KEY.format(uid) for uid in set(user_ids) if uid is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
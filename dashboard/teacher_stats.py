@@ -0,0 +1,78 @@
+"""Teacher dashboard statistics.
+
+The per-paper table is one grouped query: the teacher's papers left-joined to their
+attempts and evaluations, with conditional aggregates. Overall totals are summed from
+the same rows. The result is cached per teacher and dropped when an attempt,
+evaluation or paper of that teacher is written (dashboard.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+
+from ib_project.db_router import primary_reads
+from questionpapers.models import QuestionPaper
+
+_TEACHER_KEY = 'dashboard:teacher:{}'
+
+
+def _dashboard_ttl() -> int:
+    return int(getattr(settings, 'TEACHER_DASHBOARD_CACHE_TTL', 300))
+
+
+def build_teacher_dashboard(user_id) -> dict:
+    papers = list(
+        QuestionPaper.objects.filter(created_by_id=user_id)
+        .select_related('subject')
+        .annotate(
+            attempt_count=Count('attempts'),
+            student_count=Count('attempts__user', distinct=True),
+            # Submitted but not yet evaluated / evaluated by a teacher.
+            pending_count=Count('attempts', filter=Q(attempts__submitted=True, attempts__evaluation__isnull=True)),
+            completed_count=Count('attempts__evaluation'),
+            avg_score=Avg('attempts__score'),
+            score_sum=Sum('attempts__score'),
+            scored_count=Count('attempts__score'),
+        )
+    )
+
+    paper_evaluation_data = []
+    for paper in papers:
+        paper_evaluation_data.append({
+            'paper': paper,
+            'pending': paper.pending_count,
+            'completed': paper.completed_count,
+            'avg_score': round(paper.avg_score or 0, 1),
+            'attempts': paper.attempt_count,
+            'total_students': paper.student_count,
+            'completion_pct': round(paper.attempt_count / paper.student_count * 100, 1) if paper.student_count else 0,
+        })
+
+    scored = sum(p.scored_count for p in papers)
+    return {
+        'papers': papers,
+        'paper_evaluation_data': paper_evaluation_data,
+        'total_papers': len(papers),
+        'total_attempts': sum(p.attempt_count for p in papers),
+        'pending_evals': sum(p.pending_count for p in papers),
+        'completed_evals': sum(p.completed_count for p in papers),
+        'avg_class_score': round(sum(p.score_sum or 0 for p in papers) / scored, 1) if scored else 0,
+    }
+
+
+def teacher_dashboard(user_id) -> dict:
+    """The teacher's dashboard context from cache, rebuilding (and caching) it when missing."""
+    key = _TEACHER_KEY.format(user_id)
+    context = cache.get(key)
+    if context is None:
+        with primary_reads():  # shared entry: never fill it from a lagging replica
+            context = build_teacher_dashboard(user_id)
+        cache.set(key, context, _dashboard_ttl())
+    return context
+
+
+def invalidate_teacher_dashboards(user_ids) -> None:
+    """Drop cached dashboards once the current transaction (if any) commits."""
+    keys = [_TEACHER_KEY.format(uid) for uid in set(user_ids) if uid is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
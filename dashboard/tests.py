@@ -1,3 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from exams.models import Attempt, Exam, Topic
+from questionpapers.models import Evaluation, PaperAttempt, QuestionPaper, Subject
+from quizzes.models import Quiz, QuizAttempt
+
+from .student_stats import build_student_summary
+from .teacher_stats import build_teacher_dashboard, teacher_dashboard
+
+User = get_user_model()
+
+
+class TeacherDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username='dash_teacher', password='pw', role='TEACHER')
+        subject = Subject.objects.create(name='Maths')
+        students = [User.objects.create_user(username=f'dash_s{i}', password='pw', role='STUDENT') for i in range(3)]
+        self.papers = [
+            QuestionPaper.objects.create(subject=subject, level='HL', paper_number='1', paper_type='past', created_by=self.teacher)
+            for _ in range(20)
+        ]
+        for paper in self.papers[:2]:
+            for i, student in enumerate(students):
+                attempt = PaperAttempt.objects.create(paper=paper, user=student, submitted=True, score=10 * (i + 1))
+                if i == 0:
+                    Evaluation.objects.create(attempt=attempt, teacher=self.teacher, marks=10)
+
+    def test_one_grouped_query_for_all_papers(self):
+        with self.assertNumQueries(1):
+            context = build_teacher_dashboard(self.teacher.id)
+        self.assertEqual(context['total_papers'], 20)
+        self.assertEqual(context['total_attempts'], 6)
+        self.assertEqual((context['pending_evals'], context['completed_evals']), (4, 2))
+        self.assertEqual(context['avg_class_score'], 20.0)
+        first = next(row for row in context['paper_evaluation_data'] if row['paper'].id == self.papers[0].id)
+        self.assertEqual((first['attempts'], first['total_students'], first['pending'], first['avg_score']), (3, 3, 2, 20.0))
+
+    def test_cached_until_an_evaluation_is_written(self):
+        teacher_dashboard(self.teacher.id)
+        with self.assertNumQueries(0):
+            teacher_dashboard(self.teacher.id)
+
+        attempt = PaperAttempt.objects.filter(paper=self.papers[0], evaluation__isnull=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Evaluation.objects.create(attempt=attempt, teacher=self.teacher, marks=5)
+        self.assertEqual(teacher_dashboard(self.teacher.id)['pending_evals'], 3)
+
+
+class StudentDashboardApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username='dash_student', password='pw', role='STUDENT')
+        topic = Topic.objects.create(name='Optics')
+        now = timezone.now()
+        for i in range(12):
+            exam = Exam.objects.create(title=f'Exam {i}', topic=topic, duration_seconds=600)
+            Attempt.objects.create(
+                user=self.student, exam=exam, status='submitted', percentage=50 + i,
+                started_at=now - timezone.timedelta(days=i), finished_at=now - timezone.timedelta(days=i),
+            )
+        subject = Subject.objects.create(name='History')
+        for i in range(3):
+            paper = QuestionPaper.objects.create(subject=subject, level='SL', paper_number='1', paper_type='past', is_published=True)
+            if i == 0:
+                PaperAttempt.objects.create(paper=paper, user=self.student, submitted=True, score=8, max_score=10)
+        quiz = Quiz.objects.create(title='Warm-up quiz')
+        QuizAttempt.objects.create(user=self.student, quiz=quiz, finished_at=now, score=3, max_score=4)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_summary_uses_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(10):
+            summary = build_student_summary(self.student.id)
+        self.assertEqual(summary['exams']['completed'], 12)
+        self.assertEqual(summary['exams']['average_percentage'], 55.5)
+        self.assertEqual((summary['papers']['attempted'], summary['papers']['not_started']), (1, 2))
+        self.assertEqual(summary['papers']['average_percentage'], 80.0)
+        self.assertEqual(summary['quizzes']['average_percentage'], 75.0)
+        self.assertEqual(len(summary['recent_attempts']), 10)
+        self.assertEqual([item['kind'] for item in summary['recent_activity'][:3]].count('exam'), 1)
+        self.assertEqual(len(summary['trend']), 7)
+        self.assertEqual(summary['submission_streak'], 12)
+
+    def test_endpoint_is_cached_until_an_attempt_changes(self):
+        url = reverse('student_dashboard_api')
+        self.assertEqual(self.client.get(url).json()['exams']['completed'], 12)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt = Attempt.objects.filter(user=self.student).first()
+            attempt.status = 'inprogress'
+            attempt.save(update_fields=['status'])
+        data = self.client.get(url).json()
+        self.assertEqual((data['exams']['completed'], data['exams']['in_progress']), (11, 1))
+        self.assertIn('pending_work', data)
+        self.assertEqual(data['streak']['submission_days'], 11)
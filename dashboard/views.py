@@ -1,77 +1,25 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from questionpapers.models import QuestionPaper, PaperAttempt, Evaluation
+from questionpapers.models import QuestionPaper, PaperAttempt
 from quizzes.models import QuizAttempt
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from accounts.roles import is_teacher_or_admin
+from learning.feed import student_feed
+from learning.models import LearningAssignment
+from .student_stats import student_summary
+from .teacher_stats import teacher_dashboard
 
 @login_required
 def dashboard(request):
     user = request.user
-    is_teacher = user.groups.filter(name='Teachers').exists()
+    is_teacher = is_teacher_or_admin(user)
 
     if is_teacher:
         # ------------------ TEACHER DASHBOARD ------------------
-        papers = QuestionPaper.objects.filter(created_by=user)
-
-        total_papers = papers.count()
-        total_attempts = PaperAttempt.objects.filter(paper__in=papers).count()
-
-        pending_evals = Evaluation.objects.filter(
-            evaluated_at__isnull=True,
-            attempt__paper__in=papers
-        ).count()
-
-        completed_evals = Evaluation.objects.filter(
-            evaluated_at__isnull=False,
-            attempt__paper__in=papers
-        ).count()
-
-        avg_class_score = (
-            PaperAttempt.objects.filter(paper__in=papers, score__isnull=False)
-            .aggregate(Avg('score'))['score__avg'] or 0
-        )
-
-        paper_evaluation_data = []
-        for paper in papers:
-            pending = Evaluation.objects.filter(
-                evaluated_at__isnull=True,
-                attempt__paper=paper
-            ).count()
-
-            completed = Evaluation.objects.filter(
-                evaluated_at__isnull=False,
-                attempt__paper=paper
-            ).count()
-
-            avg_score = (
-                PaperAttempt.objects.filter(paper=paper, score__isnull=False)
-                .aggregate(Avg('score'))['score__avg'] or 0
-            )
-
-            attempts = PaperAttempt.objects.filter(paper=paper).count()
-            total_students = PaperAttempt.objects.filter(paper=paper).values('user').distinct().count()
-            completion_pct = round(((attempts / total_students) * 100), 1) if total_students else 0
-
-            paper_evaluation_data.append({
-                'paper': paper,
-                'pending': pending,
-                'completed': completed,
-                'avg_score': round(avg_score, 1),
-                'attempts': attempts,
-                'total_students': total_students,
-                'completion_pct': completion_pct,
-            })
-
-        context = {
-            'is_teacher': True,
-            'papers': papers,
-            'paper_evaluation_data': paper_evaluation_data,
-            'total_papers': total_papers,
-            'total_attempts': total_attempts,
-            'pending_evals': pending_evals,
-            'completed_evals': completed_evals,
-            'avg_class_score': round(avg_class_score, 1),
-        }
+        context = {'is_teacher': True, **teacher_dashboard(user.id)}
 
     else:
         # ------------------ STUDENT DASHBOARD ------------------
@@ -80,14 +28,12 @@ def dashboard(request):
         avg_score = attempts.aggregate(Avg('score'))['score__avg'] or 0
 
         # Wrap pending papers with total_students for template
-        pending_papers_qs = QuestionPaper.objects.exclude(id__in=attempts.values('paper_id'))
-        pending_papers = []
-        for paper in pending_papers_qs:
-            total_students = PaperAttempt.objects.filter(paper=paper).values('user').distinct().count()
-            pending_papers.append({
-                'paper': paper,
-                'total_students': total_students
-            })
+        pending_papers = [
+            {'paper': paper, 'total_students': paper.total_students}
+            for paper in QuestionPaper.objects.exclude(id__in=attempts.values('paper_id'))
+            .select_related('subject')
+            .annotate(total_students=Count('attempts__user', distinct=True))
+        ]
 
         quizzes = QuizAttempt.objects.filter(user=user).order_by('-finished_at')[:5]
 
@@ -101,3 +47,32 @@ def dashboard(request):
         }
 
     return render(request, 'dashboard/dashboard.html', context)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_dashboard_api(request):
+    """Everything the student dashboard shows, in one response."""
+    user = request.user
+    summary = student_summary(user.id)
+    assignments = [
+        item for item in student_feed(user.id)['items']
+        if item['is_visible'] and item['status'] == LearningAssignment.STATUS_PENDING
+    ]
+    return Response({
+        **summary,
+        'pending_work': {
+            'assignments': len(assignments),
+            'next_assignments': assignments[:5],
+            'exams_in_progress': summary['exams']['in_progress'],
+            'papers_not_started': summary['papers']['not_started'],
+        },
+        'streak': {
+            # Consecutive days with a finished exam; the login streak is current/longest.
+            'submission_days': summary['submission_streak'],
+            'current': user.current_streak,
+            'longest': user.longest_streak,
+            'last_activity_date': user.last_activity_date,
+            'total_points': user.total_points,
+        },
+    })
@@ -6,17 +6,10 @@ from django.db.models import Count, Avg, Q
 from django.db.models import Max
 from exams.models import Topic, Question, Exam, Attempt, ExamQuestion
 from accounts.models import Badge, UserBadge
+from accounts.roles import is_admin, is_teacher_or_admin
 
 User = get_user_model()
 
-def is_admin(user):
-    """Check if user has admin role or is superuser/staff"""
-    return user and user.is_authenticated and (user.role == 'ADMIN' or user.is_superuser or user.is_staff)
-
-
-def _can_manage_exams(user):
-    return bool(is_admin(user) or (user and user.is_authenticated and getattr(user, 'role', None) == 'TEACHER'))
-
 
 def _renumber_exam_questions(exam_id):
     eqs = list(
@@ -113,7 +106,7 @@ def admin_analytics(request):
     active_users = User.objects.filter(last_login__gte=seven_days_ago).count()
     
     # Completion rate
-    total_attempts = Attempt.objects.count()
+    total_attempts = Attempt.objects.exclude(status='scheduled').count()
     completed = Attempt.objects.filter(status__in=['submitted', 'timedout']).count()
     completion_rate = (completed / total_attempts * 100) if total_attempts > 0 else 0
     
@@ -151,7 +144,7 @@ def admin_analytics(request):
 @permission_classes([IsAuthenticated])
 def add_questions_to_exam(request, exam_id):
     """Add questions to an exam"""
-    if not _can_manage_exams(request.user):
+    if not is_teacher_or_admin(request.user):
         return Response({'detail': 'Admin or Teacher access required'}, status=403)
     
     try:
@@ -187,7 +180,7 @@ def add_questions_to_exam(request, exam_id):
 @permission_classes([IsAuthenticated])
 def exam_questions_list(request, exam_id):
     """List questions currently attached to an exam (ordered)."""
-    if not _can_manage_exams(request.user):
+    if not is_teacher_or_admin(request.user):
         return Response({'detail': 'Admin or Teacher access required'}, status=403)
     try:
         exam = Exam.objects.get(id=exam_id)
@@ -222,7 +215,7 @@ def exam_questions_list(request, exam_id):
 @permission_classes([IsAuthenticated])
 def exam_question_remove(request, exam_id, question_id):
     """Remove a question from an exam (does not delete the question)."""
-    if not _can_manage_exams(request.user):
+    if not is_teacher_or_admin(request.user):
         return Response({'detail': 'Admin or Teacher access required'}, status=403)
     try:
         Exam.objects.get(id=exam_id)
@@ -241,7 +234,7 @@ def exam_question_remove(request, exam_id, question_id):
 @permission_classes([IsAuthenticated])
 def exam_questions_reorder(request, exam_id):
     """Reorder exam questions. Accepts ordered_question_ids (preferred) or question_ids."""
-    if not _can_manage_exams(request.user):
+    if not is_teacher_or_admin(request.user):
         return Response({'detail': 'Admin or Teacher access required'}, status=403)
     try:
         Exam.objects.get(id=exam_id)
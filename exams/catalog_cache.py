@@ -0,0 +1,98 @@
+"""Conditional GET support for the public catalog endpoints (curriculums, topics, exams).
+
+A response's ETag combines:
+- a catalog version counter in the shared cache, bumped by exams.signals whenever a
+  catalog row (or something the serializers embed: question counts, submitted attempt
+  counts, topic/curriculum names) changes, and
+- Max(updated_at) and Count of the filtered queryset, which also catches queryset
+  .update() calls that bypass signals.
+
+Computing it costs one aggregate query plus a cache read, so a matching If-None-Match
+is answered with 304 before any serialization happens.
+"""
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from ib_project.db_router import is_pinned, pin_to_primary, primary_reads
+
+CATALOG_VERSION_KEY = 'exams:catalog-version'
+# Read-replica pin scope (ib_project.db_router) shared by every catalog reader.
+CATALOG_PIN = 'catalog'
+
+# Short shared-cache lifetime: catalog edits should show up within a minute even
+# for clients that don't revalidate; nginx/CDNs may serve stale while refreshing.
+PUBLIC_CACHE_CONTROL = {'public': True, 'max_age': 60, 'stale_while_revalidate': 300}
+
+
+def catalog_version() -> int:
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a cache flush never reissues an old ETag.
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return int(version or 0)
+
+
+def _incr_catalog_version() -> None:
+    # Until the replica has caught up, an ETag built from it would pair the new version
+    # with old rows, so catalog reads use the primary for the pin window.
+    pin_to_primary(CATALOG_PIN)
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def bump_catalog_version() -> None:
+    """Invalidate catalog ETags once the current transaction (if any) commits."""
+    # Bumping before commit would let a concurrent request pair the new version with old rows.
+    transaction.on_commit(_incr_catalog_version)
+
+
+def catalog_etag(queryset, *extra) -> str:
+    agg = queryset.order_by().aggregate(last=Max('updated_at'), n=Count('pk'))
+    last = agg['last'].isoformat() if agg['last'] else ''
+    raw = ':'.join(str(part) for part in (queryset.model._meta.label, catalog_version(), last, agg['n'], *extra))
+    return 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+class ConditionalCatalogMixin:
+    """Adds ETag/304 handling and shared-cache headers to a viewset's GET actions.
+
+    Subclasses may override `catalog_cache_is_public()` when some callers (e.g. admins
+    asking for archived rows) get a different representation.
+    """
+
+    def catalog_cache_is_public(self) -> bool:
+        return True
+
+    def conditional_response(self, request, queryset, render, *etag_extra):
+        with primary_reads() if is_pinned(CATALOG_PIN) else nullcontext():
+            etag = catalog_etag(queryset, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *etag_extra)
+            not_modified = get_conditional_response(request, etag=etag)
+            response = not_modified if not_modified is not None else render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if self.catalog_cache_is_public():
+                patch_cache_control(response, **PUBLIC_CACHE_CONTROL)
+            else:
+                patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, lambda: super(ConditionalCatalogMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: lookup})
+        except (TypeError, ValueError):
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(request, queryset, lambda: super(ConditionalCatalogMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,110 @@
+"""Background jobs without a task queue.
+
+Long-running work is recorded as a BackgroundJob row and executed by
+`manage.py run_jobs` (keep one running under the process supervisor, or call it
+from cron with --once). With BACKGROUND_JOBS_EAGER (the default when DEBUG) jobs
+run inline right after the enqueuing transaction commits, so development needs no
+worker.
+
+Handlers are listed in JOB_HANDLERS by kind and take the job. They report progress
+with `report_progress()`, may persist a resume point in `job.cursor`, and return a
+small JSON-able result. A job interrupted mid-way (worker killed) is re-queued by
+run_jobs --requeue-stale and resumes from its cursor, so handlers must be idempotent.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {
+    'exams.build_image_variants': 'ib_project.images.build_variants_job',
+    'exams.purge_curriculum': 'exams.purge.purge_curriculum',
+    'learning.bulk_assign': 'learning.jobs.bulk_assign',
+    'quizzes.import_questions': 'quizzes.ingest.import_questions_job',
+}
+
+
+def enqueue(kind: str, params: dict, user=None, total: int = 0) -> BackgroundJob:
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = BackgroundJob.objects.create(
+        kind=kind,
+        params=params,
+        progress_total=total,
+        created_by=user if getattr(user, 'pk', None) else None,
+    )
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        transaction.on_commit(lambda: run_job(job.pk))
+    return job
+
+
+def report_progress(job: BackgroundJob, done: int, total: int | None = None, cursor: dict | None = None) -> None:
+    """Persist progress (and optionally the resume cursor) without touching other fields."""
+    job.progress_done = done
+    fields = ['progress_done', 'updated_at']
+    if total is not None:
+        job.progress_total = total
+        fields.append('progress_total')
+    if cursor is not None:
+        job.cursor = cursor
+        fields.append('cursor')
+    job.save(update_fields=fields)
+
+
+def run_job(job_id) -> BackgroundJob | None:
+    """Claim a queued job and run it. Returns None when another worker claimed it first."""
+    now = timezone.now()
+    if not BackgroundJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=now, updated_at=now):
+        return None
+    job = BackgroundJob.objects.get(pk=job_id)
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        result = handler(job)
+    except Exception as exc:
+        logger.exception('Background job %s (%s) failed', job.pk, job.kind)
+        job.status = 'failed'
+        job.error = str(exc)[:2000]
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+        return job
+    job.status = 'succeeded'
+    job.result = result or {}
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'finished_at', 'updated_at'])
+    return job
+
+
+def run_next() -> BackgroundJob | None:
+    """Run the oldest queued job, if any."""
+    for job_id in BackgroundJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:5]:
+        job = run_job(job_id)
+        if job is not None:
+            return job
+    return None
+
+
+def requeue_stale(minutes: int) -> int:
+    """Put jobs stuck in 'running' (their worker died) back in the queue."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return BackgroundJob.objects.filter(status='running', updated_at__lt=cutoff).update(status='queued')
+
+
+def job_payload(job: BackgroundJob) -> dict:
+    return {
+        'id': str(job.pk),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total},
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils.dateparse import parse_date
 
+from exams.catalog_cache import bump_catalog_version
 from exams.models import Curriculum, Topic
 
 
@@ -150,3 +151,5 @@ class Command(BaseCommand):
             if archive_topics:
                 topic_updated = Topic.objects.filter(curriculum_id__in=curriculum_ids, is_active=True).update(is_active=False)
                 self.stdout.write(self.style.SUCCESS(f"Archived {topic_updated} topic(s) under those curriculums."))
+
+            bump_catalog_version()
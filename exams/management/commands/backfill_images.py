@@ -0,0 +1,184 @@
+import csv
+import hashlib
+import json
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ib_project.content_store import content_name, content_storage
+from ib_project.images import build_image_variants, image_sources
+
+IMAGE_PREFIX = 'question_images'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _session(workers: int, retries: int, backoff: float) -> requests.Session:
+    """One pooled session shared by all download threads."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=['GET'], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _download(session, url: str, timeout: float):
+    try:
+        res = session.get(url, timeout=timeout)
+    except requests.RequestException as exc:
+        raise DownloadError(str(exc)) from exc
+    if res.status_code != 200:
+        raise DownloadError(f'HTTP {res.status_code}')
+    content_type = res.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and not content_type.startswith('image/'):
+        raise DownloadError(f'not an image ({content_type})')
+    return res.content, content_type
+
+
+def _extension(url: str, content_type: str) -> str:
+    ext = mimetypes.guess_extension(content_type) if content_type else None
+    if not ext:
+        ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return {'.jpe': '.jpg', '.jpeg': '.jpg'}.get(ext, ext) if ext and len(ext) <= 6 else '.jpg'
+
+
+class Command(BaseCommand):
+    help = (
+        "Download question images from source URLs into media storage (exams, quizzes and "
+        "questionpapers). URLs come from a CSV manifest (app,id,url) or, by default, from "
+        "image fields that still hold an http(s) URL. Downloads run on a bounded thread pool "
+        "with retries; files go through the content-addressed store, so identical content is "
+        "stored once. Progress is checkpointed to --state so an interrupted run resumes "
+        "where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manifest', help='CSV file with app,id,url columns.')
+        parser.add_argument('--app', action='append', choices=['exams', 'quizzes', 'questionpapers'],
+                            help='Limit to one or more apps (repeatable). Default: all.')
+        parser.add_argument('--state', default='backfill_images.state.json',
+                            help='Checkpoint file (default: ./backfill_images.state.json).')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads (default: 8).')
+        parser.add_argument('--retries', type=int, default=3, help='Retries per URL on errors/5xx (default: 3).')
+        parser.add_argument('--backoff', type=float, default=0.5, help='Retry backoff factor in seconds (default: 0.5).')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds (default: 10).')
+        parser.add_argument('--skip-variants', action='store_true',
+                            help='Do not build responsive derivatives (run build_image_variants later).')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be >= 1')
+        sources = {label: (model, image_field, variants_field)
+                   for label, model, image_field, variants_field in image_sources()
+                   if not options['app'] or label in options['app']}
+
+        self.state_path = options['state']
+        self.state = self._load_state()
+        done = set(self.state['done'])
+        tasks = [t for t in self._tasks(options['manifest'], sources) if f'{t[0]}:{t[1]}' not in done]
+        self.stdout.write(f'{len(tasks)} image(s) to fetch ({len(done)} already done).')
+
+        self.options = options
+        self.sources = sources
+        self.variants = {}  # stored name -> derivatives document, for this run
+        counts = {'saved': 0, 'deduplicated': 0, 'failed': 0}
+        session = _session(workers, options['retries'], options['backoff'])
+        batch = workers * 4
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Bounded batches: only `batch` responses are held in memory at once, and the
+                # checkpoint is written after each batch.
+                for start in range(0, len(tasks), batch):
+                    futures = {
+                        pool.submit(_download, session, url, options['timeout']): (label, pk, url)
+                        for label, pk, url in tasks[start:start + batch]
+                    }
+                    for future in as_completed(futures):
+                        label, pk, url = futures[future]
+                        key = f'{label}:{pk}'
+                        try:
+                            content, content_type = future.result()
+                        except DownloadError as exc:
+                            counts['failed'] += 1
+                            self.state['failed'][key] = f'{url}: {exc}'
+                            self.stdout.write(self.style.WARNING(f'{key}: {url}: {exc}'))
+                            continue
+                        counts[self._store(label, pk, url, content, content_type)] += 1
+                        self.state['done'].append(key)
+                        self.state['failed'].pop(key, None)
+                    self._save_state()
+        finally:
+            session.close()
+            self._save_state()
+        self.stdout.write(self.style.SUCCESS(
+            f"saved={counts['saved']} deduplicated={counts['deduplicated']} failed={counts['failed']}"
+        ))
+
+    def _tasks(self, manifest, sources):
+        """(app label, pk, url) for every row to fetch."""
+        if manifest:
+            try:
+                with open(manifest, newline='', encoding='utf-8-sig') as fh:
+                    rows = list(csv.DictReader(fh))
+            except OSError as exc:
+                raise CommandError(f'Cannot read manifest: {exc}')
+            return [
+                (row['app'].strip(), int(row['id']), row['url'].strip())
+                for row in rows
+                if row.get('url') and row.get('app', '').strip() in sources
+            ]
+        tasks = []
+        for label, (model, image_field, _) in sources.items():
+            is_url = Q(**{f'{image_field}__startswith': 'http://'}) | Q(**{f'{image_field}__startswith': 'https://'})
+            for pk, url in model.objects.filter(is_url).order_by('pk').values_list('pk', image_field):
+                tasks.append((label, pk, url))
+        return tasks
+
+    def _store(self, label, pk, url, content, content_type) -> str:
+        """Save the bytes through the content-addressed store and point the row at them."""
+        model, image_field, variants_field = self.sources[label]
+        requested = f'{IMAGE_PREFIX}/{pk}{_extension(url, content_type)}'
+        target = content_name(requested, hashlib.sha256(content).hexdigest())
+        outcome = 'deduplicated' if content_storage.exists(target) else 'saved'
+        name = content_storage.save(requested, ContentFile(content))  # also counts the reference
+
+        updates = {image_field: name, variants_field: {}}
+        if not self.options['skip_variants']:
+            if name not in self.variants:
+                row = model(pk=pk, **{image_field: name})
+                self.variants[name] = build_image_variants(getattr(row, image_field))
+            updates[variants_field] = self.variants[name]
+        model.objects.filter(pk=pk).update(**updates)
+        return outcome
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, encoding='utf-8') as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return {'done': [], 'failed': {}}
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read state file {self.state_path}: {exc}')
+        state.setdefault('done', [])
+        state.setdefault('failed', {})
+        return state
+
+    def _save_state(self) -> None:
+        tmp = f'{self.state_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(self.state, fh)
+        os.replace(tmp, self.state_path)
@@ -0,0 +1,96 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.jwt import RoleRefreshToken
+from exams.models import Attempt, Exam, ExamQuestion, Question, Topic
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'bench_start_'
+BENCH_EXAM_TITLE = 'Benchmark: class-wide start'
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare a class-wide start_exam burst for load-test-start-exam.js: N students, "
+        "an exam, and a JSON file with one access token per student. Existing bench "
+        "attempts on the exam are removed so every run measures fresh starts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500, help='Number of bench students (default 500).')
+        parser.add_argument('--exam', type=int, help='Exam id to start. Default: create/reuse a bench exam.')
+        parser.add_argument('--questions', type=int, default=40, help='Questions on the bench exam (default 40).')
+        parser.add_argument('--out', default='bench-start-exam.json', help='Where to write tokens (default bench-start-exam.json).')
+        parser.add_argument('--delete', action='store_true', help='Remove bench students, their attempts and the bench exam.')
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            Attempt.objects.filter(user__username__startswith=USERNAME_PREFIX).delete()
+            deleted, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            for exam in Exam.objects.filter(title=BENCH_EXAM_TITLE):
+                question_ids = list(exam.exam_questions.values_list('question_id', flat=True))
+                topic = exam.topic
+                exam.delete()
+                Question.objects.filter(id__in=question_ids).delete()
+                if not topic.questions.exists() and not topic.exams.exists():
+                    topic.delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted bench data ({deleted} user rows incl. cascades).'))
+            return
+
+        count = options['students']
+        if count < 1:
+            raise CommandError('--students must be >= 1')
+
+        if options['exam']:
+            exam = Exam.objects.filter(pk=options['exam'], is_active=True).first()
+            if exam is None:
+                raise CommandError(f"Active exam {options['exam']} not found")
+        else:
+            exam = self._bench_exam(options['questions'])
+
+        encoded = make_password(None)  # unusable; bench students only authenticate with tokens
+        existing = set(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('username', flat=True))
+        User.objects.bulk_create(
+            [
+                User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', role='STUDENT', password=encoded)
+                for i in range(count)
+                if f'{USERNAME_PREFIX}{i}' not in existing
+            ],
+            batch_size=500,
+        )
+        students = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id')[:count])
+        cleared, _ = Attempt.objects.filter(exam=exam, user__in=students).delete()
+
+        tokens = [str(RoleRefreshToken.for_user(u).access_token) for u in students]
+        with open(options['out'], 'w', encoding='utf-8') as fh:
+            json.dump({'exam_id': exam.id, 'tokens': tokens}, fh)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exam #{exam.id} ready for {len(tokens)} students ({cleared} old attempt rows cleared); tokens in {options["out"]}'
+        ))
+        self.stdout.write(f'Run: k6 run -e DATA={options["out"]} load-test-start-exam.js')
+
+    def _bench_exam(self, question_count):
+        exam = Exam.objects.filter(title=BENCH_EXAM_TITLE, is_active=True).first()
+        if exam is not None:
+            return exam
+        topic, _ = Topic.objects.get_or_create(name='Benchmark', parent=None, curriculum=None)
+        exam = Exam.objects.create(title=BENCH_EXAM_TITLE, topic=topic, duration_seconds=3600, shuffle_questions=True)
+        questions = Question.objects.bulk_create([
+            Question(
+                topic=topic,
+                type='MCQ',
+                statement=f'Benchmark question {i + 1}',
+                choices={'A': '1', 'B': '2', 'C': '3', 'D': '4'},
+                correct_answers=['A'],
+            )
+            for i in range(max(1, question_count))
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, question=q, order=i) for i, q in enumerate(questions)
+        ])
+        return exam
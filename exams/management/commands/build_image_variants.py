@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ib_project.images import build_image_variants, image_sources
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized WebP/JPEG derivatives for existing question images "
+        "(exams, quizzes and questionpapers). Only rows whose derivatives are missing "
+        "or stale are processed unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', action='append', choices=['exams', 'quizzes', 'questionpapers'],
+                            help='Limit to one or more apps (repeatable). Default: all.')
+        parser.add_argument('--force', action='store_true', help='Rebuild even when derivatives look current.')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many images per app (0 = no limit).')
+
+    def handle(self, *args, **options):
+        apps = set(options.get('app') or [])
+        force = options['force']
+        limit = options['limit']
+        if limit < 0:
+            raise CommandError('--limit must be >= 0')
+
+        for label, model, image_field, variants_field in image_sources():
+            if apps and label not in apps:
+                continue
+            qs = (
+                model.objects.exclude(**{f'{image_field}__isnull': True})
+                .exclude(**{image_field: ''})
+                .only('pk', image_field, variants_field)
+                .order_by('pk')
+            )
+            built = skipped = failed = 0
+            for obj in qs.iterator(chunk_size=200):
+                field_file = getattr(obj, image_field)
+                current = getattr(obj, variants_field) or {}
+                if not force and current.get('source') == field_file.name and current.get('jpeg'):
+                    skipped += 1
+                    continue
+                variants = build_image_variants(field_file)
+                model.objects.filter(pk=obj.pk).update(**{variants_field: variants})
+                if variants:
+                    built += 1
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{label} #{obj.pk}: could not process {field_file.name}'))
+                if limit and built + failed >= limit:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'{label}: built={built} skipped={skipped} failed={failed}'))
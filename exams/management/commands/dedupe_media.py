@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+
+from ib_project.content_store import (
+    content_fields,
+    content_name,
+    content_storage,
+    file_digest,
+    is_content_name,
+    recount_references,
+)
+from ib_project.images import image_sources
+
+
+def _mb(num_bytes: int) -> str:
+    return f'{num_bytes / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing question images, materials and question-paper answer files onto "
+        "content-hashed names, so identical files are stored once, then recount the "
+        "MediaBlob reference index. Rows already on hashed names are skipped, so the "
+        "command can be re-run after an interruption. Reports the space reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only hash files and report what would be reclaimed.')
+        parser.add_argument('--keep-originals', action='store_true',
+                            help='Leave the original files in place after repointing rows.')
+        parser.add_argument('--prune', action='store_true', help='Also delete hashed files nothing references.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        backend = content_storage.backend
+        variants_fields = {(model, field): variants for _, model, field, variants in image_sources()}
+
+        scanned = missing = duplicates = written = 0
+        originals = {}  # original name -> size
+        targets = {}  # hashed name -> size, seen during this run
+        for label, model, field in content_fields():
+            variants_field = variants_fields.get((model, field))
+            qs = (
+                model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .exclude(**{f'{field}__startswith': 'http'})
+                .only('pk', field, *([variants_field] if variants_field else []))
+                .order_by('pk')
+            )
+            for obj in qs.iterator(chunk_size=200):
+                name = getattr(obj, field).name
+                if is_content_name(name):
+                    continue
+                scanned += 1
+                try:
+                    with backend.open(name, 'rb') as fh:
+                        digest, size = file_digest(fh)
+                except Exception as exc:
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f'{label} #{obj.pk}: cannot read {name}: {exc}'))
+                    continue
+                target = content_name(name, digest)
+                originals[name] = size
+                if target in targets or backend.exists(target):
+                    duplicates += 1
+                elif not dry_run:
+                    with backend.open(name, 'rb') as fh:
+                        target = backend.save(target, fh)
+                    written += size
+                targets[target] = size
+                if dry_run:
+                    continue
+
+                updates = {field: target}
+                doc = getattr(obj, variants_field) if variants_field else None
+                if doc:
+                    # Derivatives are keyed by content already; only the source moved.
+                    updates[variants_field] = {**doc, 'source': target}
+                model.objects.filter(pk=obj.pk).update(**updates)
+
+        original_bytes = sum(originals.values())
+        if dry_run:
+            reclaimable = original_bytes - sum(targets.values())
+            self.stdout.write(self.style.WARNING(
+                f'DRY-RUN: {scanned} file(s), {duplicates} duplicate(s), {missing} unreadable; '
+                f'~{_mb(reclaimable)} reclaimable.'
+            ))
+            return
+
+        removed = 0
+        if not options['keep_originals']:
+            for name, size in originals.items():
+                backend.delete(name)
+                removed += size
+        index = recount_references(prune=options['prune'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{scanned} file(s) moved to hashed names ({duplicates} duplicate(s), {missing} unreadable); '
+            f'{index["blobs"]} blob(s) with {index["references"]} reference(s), {index["pruned"]} pruned; '
+            f'reclaimed {_mb(removed - written)}.'
+        ))
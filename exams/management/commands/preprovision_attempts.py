@@ -0,0 +1,115 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exams.models import Attempt, Exam
+from exams.views import _exam_snapshot, _pick_questions_for_exam
+from learning.models import LearningAssignment
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-provision dormant ('scheduled') attempts for MOCK_TEST assignments starting "
+        "soon, with their shuffled question order and exam snapshot already stored. "
+        "start_exam then only flips the attempt to running. Opt-in: schedule this every "
+        "few minutes (cron/systemd timer) to enable it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lead-minutes',
+            type=int,
+            default=getattr(settings, 'PREPROVISION_ATTEMPTS_LEAD_MINUTES', 30),
+            help='Provision assignments whose start_at falls within this many minutes (default: 30).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be provisioned.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        horizon = now + timedelta(minutes=max(1, int(options['lead_minutes'])))
+
+        assignments = list(
+            LearningAssignment.objects.filter(
+                assignment_type=LearningAssignment.TYPE_MOCK_TEST,
+                is_active=True,
+                completed_at__isnull=True,
+                exam__is_active=True,
+                start_at__gt=now,
+                start_at__lte=horizon,
+            )
+            .exclude(end_at__lte=now)
+            .values('id', 'assigned_to_id', 'exam_id', 'start_at')
+            .order_by('exam_id', 'id')
+        )
+        if not assignments:
+            self.stdout.write('No upcoming mock test assignments to provision.')
+            return
+
+        # Students who already have any attempt on the exam need nothing.
+        exam_ids = {a['exam_id'] for a in assignments}
+        taken = set(
+            Attempt.objects.filter(
+                exam_id__in=exam_ids,
+                user_id__in={a['assigned_to_id'] for a in assignments},
+            ).values_list('user_id', 'exam_id')
+        )
+        exams = Exam.objects.select_related('topic__curriculum').in_bulk(exam_ids)
+
+        pending = []
+        seen = set()
+        for row in assignments:
+            key = (row['assigned_to_id'], row['exam_id'])
+            if key in taken or key in seen:
+                continue
+            seen.add(key)
+            pending.append(row)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'Would provision {len(pending)} attempts across {len({r["exam_id"] for r in pending})} exams.'
+            ))
+            return
+
+        question_ids = {}
+        snapshots = {}
+        to_create = []
+        for row in pending:
+            exam = exams[row['exam_id']]
+            if exam.id not in question_ids:
+                question_ids[exam.id] = [q.id for q in _pick_questions_for_exam(exam)]
+                snapshots[exam.id] = _exam_snapshot(exam)
+            order = list(question_ids[exam.id])
+            if exam.shuffle_questions:
+                random.shuffle(order)
+            to_create.append(
+                Attempt(
+                    user_id=row['assigned_to_id'],
+                    exam_id=exam.id,
+                    assignment_id=row['id'],
+                    status='scheduled',
+                    # Placeholder; start_exam resets it when the student actually starts.
+                    started_at=row['start_at'],
+                    metadata={'question_order': order, 'exam_snapshot': snapshots[exam.id], 'provisioned_at': now.isoformat()},
+                )
+            )
+
+        # A student who started in the meantime holds the open-attempt slot; skip them.
+        # ignore_conflicts hides which rows were inserted, so count before and after.
+        provisioned = Attempt.objects.filter(
+            exam_id__in=question_ids,
+            user_id__in={row['assigned_to_id'] for row in pending},
+        )
+        before = provisioned.count()
+        Attempt.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+        created = provisioned.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Provisioned {created} attempts across {len(question_ids)} exams '
+            f'({len(to_create) - created} skipped: already started).'
+        ))
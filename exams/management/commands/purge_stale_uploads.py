@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exams.models import UploadSession
+from exams.upload_views import _discard_session_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Abort resumable uploads that have not received data for a while, deleting their "
+        "staged chunks (or aborting the S3 multipart upload)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Abort pending uploads idle for at least this many hours (default: 24).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be aborted.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=max(1, int(options['hours'])))
+        stale = UploadSession.objects.filter(status='pending', updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"DRY-RUN: {stale.count()} stale upload(s) would be aborted."))
+            return
+
+        aborted = 0
+        for session in stale.iterator():
+            _discard_session_data(session)
+            UploadSession.objects.filter(pk=session.pk, status='pending').update(status='aborted')
+            aborted += 1
+        self.stdout.write(self.style.SUCCESS(f"Aborted {aborted} stale upload(s)."))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exams.jobs import requeue_stale, run_next
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (bulk assignment, imports, purges). Keep one instance "
+        "running under the process supervisor, or call it from cron with --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between polls when idle (default: 2).')
+        parser.add_argument(
+            '--requeue-stale',
+            type=int,
+            default=30,
+            metavar='MINUTES',
+            help='Re-queue jobs stuck in running without progress for this long (default: 30, 0 = never).',
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            requeued = requeue_stale(options['requeue_stale'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Re-queued {requeued} stale jobs.'))
+
+        while True:
+            job = run_next()
+            if job is not None:
+                style = self.style.SUCCESS if job.status == 'succeeded' else self.style.WARNING
+                self.stdout.write(style(f'{job.kind} {job.pk}: {job.status} ({job.progress_done}/{job.progress_total})'))
+                continue
+            if options['once']:
+                return
+            time.sleep(max(0.1, options['sleep']))
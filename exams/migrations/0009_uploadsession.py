@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:11
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_attempt_assignment_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=120)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('mode', models.CharField(default='proxy', max_length=10)),
+                ('storage_path', models.CharField(max_length=500)),
+                ('remote_upload_id', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(default='pending', max_length=20)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='exams.attempt')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['attempt', 'status'], name='exams_uploa_attempt_e7f3aa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def timeout_duplicate_inprogress(apps, schema_editor):
+    """Keep the earliest in-progress attempt per user+exam and time out the rest.
+
+    Mirrors the cleanup start_exam used to do on resume, so the timer a student
+    sees does not change.
+    """
+    Attempt = apps.get_model('exams', 'Attempt')
+    now = timezone.now()
+    duplicated = (
+        Attempt.objects.filter(status='inprogress')
+        .values('user_id', 'exam_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicated.iterator():
+        attempts = list(
+            Attempt.objects.filter(user_id=row['user_id'], exam_id=row['exam_id'], status='inprogress')
+            .order_by('started_at', 'id')
+        )
+        for dup in attempts[1:]:
+            dup.status = 'timedout'
+            dup.finished_at = now
+            dup.duration_seconds = int(max(0, (now - dup.started_at).total_seconds()))
+            dup.save(update_fields=['status', 'finished_at', 'duration_seconds'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_question_image_variants'),
+        ('learning', '0002_learningassignment_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(timeout_duplicate_inprogress, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'inprogress')), fields=('user', 'exam'), name='exams_attempt_one_inprogress'),
+        ),
+    ]
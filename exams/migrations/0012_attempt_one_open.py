@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_attempt_one_inprogress'),
+        ('learning', '0002_learningassignment_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='attempt',
+            name='exams_attempt_one_inprogress',
+        ),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['inprogress', 'scheduled'])), fields=('user', 'exam'), name='exams_attempt_one_open'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+def build_topic_paths(apps, schema_editor):
+    """Fill path/depth top-down from the parent links."""
+    Topic = apps.get_model('exams', 'Topic')
+    children = {}
+    for topic_id, parent_id in Topic.objects.values_list('id', 'parent_id'):
+        children.setdefault(parent_id, []).append(topic_id)
+
+    updates = []
+    stack = [(topic_id, '') for topic_id in children.get(None, [])]
+    while stack:
+        topic_id, parent_path = stack.pop()
+        path = f'{parent_path}{topic_id}/'
+        updates.append(Topic(id=topic_id, path=path, depth=path.count('/') - 1))
+        stack.extend((child_id, path) for child_id in children.get(topic_id, []))
+    Topic.objects.bulk_update(updates, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0014_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_topic_paths, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,13 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 
+from ib_project.content_store import get_content_storage
+
 class TimeStamped(models.Model):
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
@@ -44,6 +50,11 @@ class Topic(TimeStamped):
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='children')
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # Materialized path of ids from the root, e.g. "3/17/42/", maintained by save(). The
+    # subtree of a topic is path__startswith=topic.path (an indexed prefix scan, see
+    # exams.topic_tree); its ancestors are ancestor_ids(), without a query.
+    path = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     class Meta:
         indexes = [
             models.Index(fields=['curriculum', 'parent', 'order']),
@@ -53,6 +64,36 @@ class Topic(TimeStamped):
     def __str__(self):
         return self.name
 
+    def ancestor_ids(self) -> list[int]:
+        """Ids from the root down to (excluding) this topic."""
+        return [int(part) for part in self.path.split('/') if part][:-1]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        ancestors = self.ancestor_ids()
+        placed = bool(self.path) and (ancestors[-1] if ancestors else None) == self.parent_id
+        moves = not placed and (update_fields is None or {'parent', 'parent_id'} & set(update_fields))
+        parent_path = ''
+        if moves and self.parent_id:
+            parent_path = Topic.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+            if self.path and parent_path.startswith(self.path):
+                raise ValueError('A topic cannot be moved under itself or one of its subtopics.')
+        super().save(*args, **kwargs)
+        if moves:
+            self._move_subtree(f'{parent_path}{self.pk}/')
+
+    def _move_subtree(self, new_path: str) -> None:
+        """Re-root this topic's path (and its descendants') at `new_path` in two UPDATEs."""
+        old_path, depth = self.path, new_path.count('/') - 1
+        with transaction.atomic():
+            if old_path:
+                Topic.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (depth - self.depth),
+                )
+            Topic.objects.filter(pk=self.pk).update(path=new_path, depth=depth)
+        self.path, self.depth = new_path, depth
+
 QUESTION_TYPES = (
     ('MCQ', 'MCQ'),
     ('MULTI', 'Multi-select'),
@@ -71,7 +112,8 @@ class Question(TimeStamped):
     estimated_time = models.PositiveIntegerField(default=60)  # seconds
     attachments = models.JSONField(default=list, blank=True)  # list of file refs
     tags = models.JSONField(default=list, blank=True)
-    image = models.ImageField(upload_to='question_images/', null=True, blank=True)
+    image = models.ImageField(upload_to='question_images/', storage=get_content_storage, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # see ib_project.images
     is_active = models.BooleanField(default=True)
     class Meta:
         indexes = [models.Index(fields=['topic','is_active'])]
@@ -79,6 +121,12 @@ class Question(TimeStamped):
     def __str__(self):
         return self.statement[:80]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from ib_project.images import sync_image_variants
+
+        sync_image_variants(self, 'image', 'image_variants')
+
 class Exam(TimeStamped):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -122,7 +170,7 @@ class Attempt(TimeStamped):
     started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField(null=True, blank=True)
     duration_seconds = models.PositiveIntegerField(default=0)
-    status = models.CharField(max_length=20, default='inprogress')  # inprogress/submitted/timedout
+    status = models.CharField(max_length=20, default='inprogress')  # scheduled/inprogress/submitted/timedout
     total_score = models.FloatField(default=0)
     percentage = models.FloatField(default=0)
     rank = models.IntegerField(null=True, blank=True)
@@ -136,6 +184,15 @@ class Attempt(TimeStamped):
             models.Index(fields=['status']),
             models.Index(fields=['assignment']),
         ]
+        constraints = [
+            # One open (pre-provisioned or running) attempt per student per exam;
+            # start_exam and preprovision_attempts rely on this.
+            models.UniqueConstraint(
+                fields=['user', 'exam'],
+                condition=models.Q(status__in=['inprogress', 'scheduled']),
+                name='exams_attempt_one_open',
+            ),
+        ]
     
     def calculate_score(self):
         """Calculate total score from responses"""
@@ -183,6 +240,66 @@ class Response(TimeStamped):
             self.correct = set(user_answer) == set(self.question.correct_answers)
             self.save()
 
+class UploadSession(TimeStamped):
+    """A resumable (chunked) upload of a student submission for an attempt.
+
+    In 'proxy' mode chunks are appended to a local staging file and moved into
+    default_storage on completion. In 'direct' mode the client PUTs parts straight
+    to S3 via presigned URLs and the API only records metadata.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE, related_name='upload_sessions')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=120, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # hex digest declared by the client
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    mode = models.CharField(max_length=10, default='proxy')  # proxy/direct
+    storage_path = models.CharField(max_length=500)  # final path in default_storage
+    remote_upload_id = models.CharField(max_length=255, blank=True)  # S3 multipart UploadId
+    status = models.CharField(max_length=20, default='pending')  # pending/complete/aborted
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['attempt', 'status'])]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+
+class BackgroundJob(TimeStamped):
+    """A unit of long-running work executed outside the request (see exams.jobs)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=60)  # key in exams.jobs registry
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, default='queued')  # queued/running/succeeded/failed
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    cursor = models.JSONField(default=dict, blank=True)  # resume point for restartable jobs
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.kind} [{self.status}] {self.progress_done}/{self.progress_total}"
+
+class MediaBlob(TimeStamped):
+    """A content-addressed media file and how many saved fields point at it (see ib_project.content_store)."""
+    name = models.CharField(max_length=255, unique=True)  # storage name, <folder>/<hh>/<sha256><ext>
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} (x{self.refcount})"
+
 class Badge(TimeStamped):
     name = models.CharField(max_length=120)
     description = models.TextField(blank=True)
@@ -0,0 +1,185 @@
+"""Chunked, resumable force-purge of a curriculum (CurriculumViewSet.purge?force=1).
+
+Runs as the 'exams.purge_curriculum' background job. Rows are removed leaf-first:
+upload sessions, responses, attempts, exam questions, exams (after unlinking learning
+assignments), questions, topics deepest-first, then the curriculum. Each phase deletes
+CURRICULUM_PURGE_CHUNK_SIZE ids at a time with one DELETE ... WHERE id IN (...) in its
+own transaction. Unlike QuerySet.delete(), this never loads cascaded rows into memory,
+and locks are only held for one chunk.
+
+Every phase re-selects whatever is still in scope, so an interrupted job resumes where
+it stopped. The cursor only carries the phase and running counts.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from ib_project.content_store import release_reference
+
+from .catalog_cache import bump_catalog_version
+from .jobs import report_progress
+from .models import Attempt, Curriculum, Exam, ExamQuestion, Question, Response, Topic, UploadSession
+
+PHASES = ('upload_sessions', 'responses', 'attempts', 'exam_questions', 'assignments_unlinked', 'exams', 'questions', 'topics')
+SHARED_POOL_NAME = '__Shared Question Pool__'
+
+
+class PurgeBlocked(Exception):
+    pass
+
+
+def _chunk_size() -> int:
+    return max(1, int(getattr(settings, 'CURRICULUM_PURGE_CHUNK_SIZE', 1000)))
+
+
+def purge_blockers(curriculum) -> dict:
+    """What stops a force purge: questions used outside the curriculum, tagged materials
+    and child topics that belong to another curriculum."""
+    from learning.models import Material
+
+    question_ids = Question.objects.filter(topic__curriculum=curriculum).values('id')
+    outside_exam_qids = (
+        ExamQuestion.objects.filter(question_id__in=question_ids)
+        .exclude(exam__topic__curriculum=curriculum)
+        .values_list('question_id', flat=True)
+    )
+    outside_resp_qids = (
+        Response.objects.filter(question_id__in=question_ids)
+        .exclude(attempt__exam__topic__curriculum=curriculum)
+        .values_list('question_id', flat=True)
+    )
+    return {
+        'shared_question_ids': sorted(set(outside_exam_qids) | set(outside_resp_qids)),
+        'materials': Material.objects.filter(Q(curriculum=curriculum) | Q(topic__curriculum=curriculum)).count(),
+        'foreign_topics': Topic.objects.filter(parent__curriculum=curriculum).exclude(curriculum=curriculum).count(),
+    }
+
+
+def move_to_shared_pool(question_ids) -> int:
+    """Re-home questions used elsewhere so purging their curriculum keeps that history."""
+    shared_curriculum, _ = Curriculum.objects.get_or_create(
+        name=SHARED_POOL_NAME,
+        defaults={'description': 'System: Holds questions shared across curriculums.', 'order': 9999, 'is_active': True},
+    )
+    shared_topic, _ = Topic.objects.get_or_create(
+        curriculum=shared_curriculum,
+        parent=None,
+        name='Shared Questions',
+        defaults={'description': 'System: Questions moved here to preserve history.', 'icon': '🗂️', 'order': 0, 'is_active': True},
+    )
+    moved = Question.objects.filter(id__in=question_ids).update(topic=shared_topic)
+    bump_catalog_version()
+    return moved
+
+
+def _scope(phase, curriculum_id):
+    """Rows still to process in `phase`."""
+    from learning.models import LearningAssignment
+
+    in_curriculum = {
+        'upload_sessions': (UploadSession, 'attempt__exam__topic__curriculum_id'),
+        'responses': (Response, 'attempt__exam__topic__curriculum_id'),
+        'attempts': (Attempt, 'exam__topic__curriculum_id'),
+        'exam_questions': (ExamQuestion, 'exam__topic__curriculum_id'),
+        'assignments_unlinked': (LearningAssignment, 'exam__topic__curriculum_id'),
+        'exams': (Exam, 'topic__curriculum_id'),
+        'questions': (Question, 'topic__curriculum_id'),
+        'topics': (Topic, 'curriculum_id'),
+    }
+    model, lookup = in_curriculum[phase]
+    qs = model.objects.filter(**{lookup: curriculum_id})
+    if phase == 'topics':
+        qs = qs.filter(children__isnull=True)  # leaves first; parents become leaves in turn
+    return qs
+
+
+def purge_totals(curriculum_id) -> dict:
+    return {phase: _scope(phase, curriculum_id).count() for phase in PHASES if phase != 'topics'} | {
+        'topics': Topic.objects.filter(curriculum_id=curriculum_id).count(),
+    }
+
+
+def _delete_ids(model, ids) -> int:
+    # One DELETE without the deletion collector: nothing cascaded is loaded and no signals
+    # are sent. Earlier phases have already removed the rows that point here.
+    return model.objects.filter(pk__in=ids)._raw_delete(model.objects.db)
+
+
+def _process_chunk(phase, curriculum_id, ids) -> int:
+    from dashboard.student_stats import invalidate_student_summaries
+    from learning.feed import invalidate_student_feeds
+    from learning.models import LearningAssignment
+
+    from .upload_views import _discard_session_data
+
+    if phase == 'upload_sessions':
+        for session in UploadSession.objects.filter(pk__in=ids, status='pending'):
+            _discard_session_data(session)
+        return _delete_ids(UploadSession, ids)
+    if phase == 'attempts':
+        # Raw deletes skip the post_delete hooks that refresh student dashboards.
+        invalidate_student_summaries(Attempt.objects.filter(pk__in=ids).values_list('user_id', flat=True).distinct())
+        return _delete_ids(Attempt, ids)
+    if phase == 'assignments_unlinked':
+        # Exam FK is SET_NULL; keep the assignment rows, as the ORM cascade would.
+        qs = LearningAssignment.objects.filter(pk__in=ids)
+        invalidate_student_feeds(qs.values_list('assigned_to_id', flat=True).distinct())
+        return qs.update(exam=None)
+    if phase == 'questions':
+        # Raw deletes skip exams.signals, which releases content-addressed images.
+        images = Counter(Question.objects.filter(pk__in=ids).exclude(image='').values_list('image', flat=True))
+        deleted = _delete_ids(Question, ids)
+        for name, count in images.items():
+            transaction.on_commit(lambda name=name, count=count: release_reference(name, count))
+        return deleted
+    model = _scope(phase, curriculum_id).model
+    return _delete_ids(model, ids)
+
+
+def purge_curriculum(job):
+    """Background job 'exams.purge_curriculum': delete a curriculum and everything under it.
+
+    params: {'curriculum': id, 'keep_shared': bool, 'moved_shared': int}
+    """
+    curriculum_id = job.params['curriculum']
+    cursor = job.cursor or {}
+    counts = {phase: 0 for phase in PHASES} | cursor.get('counts', {})
+    moved = job.params.get('moved_shared', 0)
+
+    curriculum = Curriculum.objects.filter(pk=curriculum_id).first()
+    if curriculum is None:  # finished by an earlier run
+        return {'curriculum': curriculum_id, 'deleted': True, 'counts': {**counts, 'questions_moved_to_shared_pool': moved}}
+    if not cursor:
+        # Content may have been linked elsewhere since the request was accepted.
+        blockers = purge_blockers(curriculum)
+        if blockers['shared_question_ids'] and job.params.get('keep_shared'):
+            moved += move_to_shared_pool(blockers['shared_question_ids'])
+        elif blockers['shared_question_ids']:
+            raise PurgeBlocked(f"{len(blockers['shared_question_ids'])} question(s) are used outside this curriculum.")
+        if blockers['materials'] or blockers['foreign_topics']:
+            raise PurgeBlocked(
+                f"{blockers['materials']} learning material(s) and {blockers['foreign_topics']} topic(s) of other "
+                'curriculums still reference this curriculum.'
+            )
+
+    done = sum(counts.values())
+    start = PHASES.index(cursor['phase']) if cursor.get('phase') in PHASES else 0
+    chunk = _chunk_size()
+    for phase in PHASES[start:]:
+        while True:
+            with transaction.atomic():
+                ids = list(_scope(phase, curriculum_id).order_by('pk').values_list('pk', flat=True)[:chunk])
+                if not ids:
+                    break
+                n = _process_chunk(phase, curriculum_id, ids)
+                counts[phase] += n
+                done += n
+                report_progress(job, done, cursor={'phase': phase, 'counts': counts})
+    if Topic.objects.filter(curriculum_id=curriculum_id).exists():
+        raise PurgeBlocked('Topics of this curriculum have children in another curriculum.')
+
+    Curriculum.objects.filter(pk=curriculum_id)._raw_delete(Curriculum.objects.db)
+    bump_catalog_version()
+    return {'curriculum': curriculum_id, 'deleted': True, 'counts': {**counts, 'questions_moved_to_shared_pool': moved}}
@@ -19,6 +19,13 @@ class TopicSerializer(serializers.ModelSerializer):
         model = Topic
         fields = '__all__'
     
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        topic = self.instance
+        if topic is not None and topic.path and parent is not None and parent.path.startswith(topic.path):
+            raise serializers.ValidationError({'parent': 'A topic cannot be moved under itself or one of its subtopics.'})
+        return attrs
+
     def get_children(self, obj):
         children = obj.children.filter(is_active=True)
         return TopicSerializer(children, many=True).data
@@ -36,6 +43,7 @@ class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = '__all__'
+        read_only_fields = ['image_variants']
 
 
 class QuestionDetailSerializer(serializers.ModelSerializer):
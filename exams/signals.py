@@ -0,0 +1,94 @@
+"""Model signal hooks for the exams app."""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from ib_project.content_store import content_fields, is_content_name, release_reference
+
+from .catalog_cache import bump_catalog_version
+from .models import Attempt, Curriculum, Exam, ExamQuestion, Question, Topic
+
+
+@receiver(post_save, sender=Curriculum)
+@receiver(post_delete, sender=Curriculum)
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+@receiver(post_save, sender=ExamQuestion)
+@receiver(post_delete, sender=ExamQuestion)
+def _catalog_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+# Exam listings embed the count of finished attempts. Only entering or leaving a finished
+# state changes it; grading, rank and metadata saves must not invalidate every catalog ETag.
+_FINISHED = ('submitted', 'timedout')
+
+
+@receiver(post_init, sender=Attempt)
+def _remember_attempt_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')  # None when deferred
+
+
+@receiver(post_save, sender=Attempt)
+def _attempt_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    was_finished = not created and instance._loaded_status in _FINISHED
+    if was_finished != (instance.status in _FINISHED):
+        bump_catalog_version()
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Attempt)
+def _attempt_deleted(sender, instance, **kwargs):
+    if instance.status in _FINISHED:
+        bump_catalog_version()
+
+
+# Content-addressed files (ib_project.content_store): release a blob reference when a row
+# is deleted or its file is replaced. Names are remembered at load so replacements can be
+# detected without re-reading the row.
+_CONTENT_FIELDS = {}
+for _label, _model, _field in content_fields():
+    _CONTENT_FIELDS.setdefault(_model, []).append(_field)
+
+
+def _content_names(instance, fields) -> dict:
+    names = {}
+    for field in fields:
+        if field in instance.__dict__:  # deferred fields are not loaded
+            value = instance.__dict__[field]
+            names[field] = getattr(value, 'name', value) or ''
+    return names
+
+
+def _release_later(names) -> None:
+    for name, count in Counter(n for n in names if is_content_name(n)).items():
+        transaction.on_commit(lambda name=name, count=count: release_reference(name, count))
+
+
+def _remember_content_names(sender, instance, **kwargs):
+    instance._content_names = _content_names(instance, _CONTENT_FIELDS[sender])
+
+
+def _release_replaced_content(sender, instance, **kwargs):
+    loaded = getattr(instance, '_content_names', {})
+    current = _content_names(instance, _CONTENT_FIELDS[sender])
+    _release_later(old for field, old in loaded.items() if field in current and current[field] != old)
+    instance._content_names = current
+
+
+def _release_deleted_content(sender, instance, **kwargs):
+    _release_later(_content_names(instance, _CONTENT_FIELDS[sender]).values())
+
+
+for _model in _CONTENT_FIELDS:
+    post_init.connect(_remember_content_names, sender=_model, dispatch_uid=f'content-names-{_model._meta.label}')
+    post_save.connect(_release_replaced_content, sender=_model, dispatch_uid=f'content-replaced-{_model._meta.label}')
+    post_delete.connect(_release_deleted_content, sender=_model, dispatch_uid=f'content-deleted-{_model._meta.label}')
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from .models import Topic, Question, Exam, ExamQuestion, Attempt
@@ -63,6 +63,67 @@ class ExamFlowTests(TestCase):
         self.assertEqual(qids1, qids2)
 
 
+    def test_fresh_start_is_one_insert_with_order_and_snapshot(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        start_url = reverse('start_exam', args=[self.exam.id])
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.post(start_url)
+        self.assertEqual(res.status_code, 200)
+        statements = [q['sql'].lstrip().upper() for q in ctx.captured_queries if not q['sql'].lstrip().upper().startswith(('SAVEPOINT', 'RELEASE'))]
+        writes = [sql for sql in statements if not sql.startswith('SELECT')]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        # exam, gating attempts query, questions, insert
+        self.assertLessEqual(len(statements), 4)
+
+        attempt = Attempt.objects.get(pk=res.data['attempt_id'])
+        self.assertEqual(sorted(attempt.metadata['question_order']), sorted(q['id'] for q in res.data['questions']))
+        self.assertEqual(attempt.metadata['exam_snapshot']['exam_title'], 'Kinematics Test')
+
+    def test_resume_does_not_write(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        start_url = reverse('start_exam', args=[self.exam.id])
+        first = client.post(start_url)
+        with self.assertNumQueries(3):  # exam, gating attempts query, questions
+            again = client.post(start_url)
+        self.assertEqual([q['id'] for q in again.data['questions']], [q['id'] for q in first.data['questions']])
+
+
+    def test_one_inprogress_attempt_is_enforced_by_the_database(self):
+        from django.db import IntegrityError, transaction
+
+        Attempt.objects.create(user=self.user, exam=self.exam)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attempt.objects.create(user=self.user, exam=self.exam)
+        # Finished attempts are outside the constraint.
+        Attempt.objects.create(user=self.user, exam=self.exam, status='timedout')
+
+    def test_start_resumes_when_a_concurrent_insert_wins(self):
+        from unittest import mock
+
+        other = Attempt.objects.create(user=self.user, exam=self.exam, metadata={'question_order': []})
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        # Simulate the race: the gating read ran before the concurrent INSERT committed.
+        real_filter = Attempt.objects.filter
+
+        def stale_gate(*args, **kwargs):
+            qs = real_filter(*args, **kwargs)
+            return qs.none() if 'status__in' in kwargs else qs
+
+        with mock.patch.object(Attempt.objects, 'filter', side_effect=stale_gate):
+            res = client.post(reverse('start_exam', args=[self.exam.id]))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['attempt_id'], other.id)
+        self.assertEqual(Attempt.objects.filter(user=self.user, exam=self.exam).count(), 1)
+        self.assertEqual(len(res.data['questions']), 2)
+
+
 class ReviewAndGradingPermissionsTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -155,3 +216,1124 @@ class ReviewAndGradingPermissionsTests(TestCase):
         grade_url = reverse('grade_response', args=[response_id])
         grade_res = self.client.post(grade_url, data={'teacher_mark': 1, 'remarks': 'nope'}, format='json')
         self.assertEqual(grade_res.status_code, 403)
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(
+            MEDIA_ROOT=self.tmpdir,
+            CHUNKED_UPLOAD_TEMP_DIR=f'{self.tmpdir}/chunks',
+            CHUNKED_UPLOAD_CHUNK_SIZE=4,
+        )
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='s_upload', password='pw12345', role='STUDENT')
+        self.other = User.objects.create_user(username='s_upload_other', password='pw12345', role='STUDENT')
+        topic = Topic.objects.create(name='Upload Topic')
+        exam = Exam.objects.create(title='Upload Exam', topic=topic, duration_seconds=600)
+        self.attempt = Attempt.objects.create(user=self.student, exam=exam)
+        self.client.force_authenticate(user=self.student)
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _init(self, data: bytes, **extra):
+        import hashlib
+
+        payload = {'filename': 'scan.pdf', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(), **extra}
+        return self.client.post(reverse('init_upload', args=[self.attempt.id]), payload, format='json')
+
+    def _put_chunk(self, upload_id, offset, chunk):
+        return self.client.generic(
+            'PUT',
+            reverse('upload_chunk', args=[upload_id]),
+            chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload_resumes_and_completes(self):
+        data = b'0123456789'
+        init = self._init(data)
+        self.assertEqual(init.status_code, 201)
+        upload_id = init.data['upload_id']
+
+        self.assertEqual(self._put_chunk(upload_id, 0, data[:4]).data['offset'], 4)
+
+        # A retried/stale offset is rejected with the resume point.
+        stale = self._put_chunk(upload_id, 0, data[:4])
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.data['offset'], 4)
+
+        status_res = self.client.get(reverse('upload_status', args=[upload_id]))
+        self.assertEqual(status_res.data['offset'], 4)
+
+        early = self.client.post(reverse('complete_upload', args=[upload_id]), {}, format='json')
+        self.assertEqual(early.status_code, 409)
+
+        self._put_chunk(upload_id, 4, data[4:8])
+        self._put_chunk(upload_id, 8, data[8:])
+        done = self.client.post(reverse('complete_upload', args=[upload_id]), {}, format='json')
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(len(done.data['student_uploads']), 1)
+
+        self.attempt.refresh_from_db()
+        path = self.attempt.metadata['student_uploads'][0]['path']
+        from django.core.files.storage import default_storage
+
+        with default_storage.open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), data)
+
+    def test_checksum_mismatch_is_rejected(self):
+        data = b'abcdefgh'
+        init = self._init(data)
+        upload_id = init.data['upload_id']
+        self._put_chunk(upload_id, 0, b'abcd')
+        self._put_chunk(upload_id, 4, b'XXXX')
+        res = self.client.post(reverse('complete_upload', args=[upload_id]), {}, format='json')
+        self.assertEqual(res.status_code, 422)
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.metadata.get('student_uploads'))
+
+    def test_other_student_cannot_upload_to_attempt(self):
+        self.client.force_authenticate(user=self.other)
+        res = self._init(b'data')
+        self.assertEqual(res.status_code, 403)
+
+    def test_direct_upload_against_local_s3(self):
+        try:
+            import boto3
+            import requests
+            from moto import mock_aws
+        except ImportError:
+            self.skipTest('boto3/moto not installed')
+
+        import base64
+        import hashlib
+        from unittest import mock
+
+        from . import upload_views
+
+        data = b'direct-upload-bytes'
+        checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+        with mock_aws(), self.settings(
+            DIRECT_UPLOADS_ENABLED=True,
+            CHUNKED_UPLOAD_CHUNK_SIZE=5 * 1024 * 1024,
+            AWS_STORAGE_BUCKET_NAME='mentara-test',
+            AWS_S3_REGION_NAME='us-east-1',
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+        ):
+            s3 = boto3.client('s3', region_name='us-east-1')
+            s3.create_bucket(Bucket='mentara-test')
+
+            self.assertEqual(self._init(data).status_code, 400)  # part checksums are required
+            other = base64.b64encode(hashlib.sha256(b'other').digest()).decode()
+            self.assertEqual(self._init(data, part_sha256=[other]).status_code, 400)
+
+            def upload(init):
+                part = init.data['parts'][0]
+                self.assertEqual(part['checksum_sha256'], checksum)
+                self.assertIn('x-amz-checksum-sha256', part['url'])  # S3 verifies the bytes against it
+                put = requests.put(part['url'], data=data, headers={'x-amz-checksum-sha256': checksum})
+                self.assertEqual(put.status_code, 200)
+                return self.client.post(
+                    reverse('complete_upload', args=[init.data['upload_id']]),
+                    {'parts': [{'part_number': 1, 'etag': put.headers['ETag'], 'checksum_sha256': checksum}]},
+                    format='json',
+                )
+
+            init = self._init(data, part_sha256=[checksum])
+            self.assertEqual(init.status_code, 201)
+            self.assertEqual(init.data['mode'], 'direct')
+            self.assertEqual(len(init.data['parts']), 1)
+            done = upload(init)
+            self.assertEqual(done.status_code, 200)
+            key = done.data['student_uploads'][0]['path']
+            self.assertEqual(s3.get_object(Bucket='mentara-test', Key=key)['Body'].read(), data)
+
+            # The checksum S3 reports for the assembled object must match the declared parts.
+            real_client = upload_views._s3_client
+
+            def mismatching_client():
+                client = real_client()
+                head = client.head_object
+                client.head_object = lambda **kwargs: {**head(**kwargs), 'ChecksumSHA256': f'{other}-1'}
+                return client
+
+            init = self._init(data, part_sha256=[checksum])
+            with mock.patch.object(upload_views, '_s3_client', mismatching_client):
+                done = upload(init)
+            self.assertEqual(done.status_code, 422)
+
+    def test_complete_is_refused_after_the_attempt_window(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        data = b'late'
+        upload_id = self._init(data).data['upload_id']
+        self._put_chunk(upload_id, 0, data)
+        Attempt.objects.filter(pk=self.attempt.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        res = self.client.post(reverse('complete_upload', args=[upload_id]), {}, format='json')
+        self.assertEqual(res.status_code, 410)
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.metadata.get('student_uploads'))
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(
+            MEDIA_ROOT=self.tmpdir, IMAGE_VARIANT_WIDTHS=[320, 640], BACKGROUND_JOBS_EAGER=True,
+        )
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='s_images', password='pw12345', role='STUDENT')
+        self.client.force_authenticate(user=self.student)
+        self.topic = Topic.objects.create(name='Optics')
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _jpeg(self, width=1000, height=500):
+        import io
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buf = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        Image.new('RGB', (width, height), (200, 30, 30)).save(buf, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile('lens.jpg', buf.getvalue(), content_type='image/jpeg')
+
+    def test_upload_builds_stripped_hashed_variants(self):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        from .models import BackgroundJob
+
+        # Resizing runs in a background job after commit, not in the saving request.
+        with self.captureOnCommitCallbacks(execute=True):
+            q = Question.objects.create(topic=self.topic, type='MCQ', statement='focus?', image=self._jpeg())
+            q.refresh_from_db()
+            self.assertEqual(q.image_variants, {})
+            job = BackgroundJob.objects.get(kind='exams.build_image_variants')
+            self.assertEqual(job.params, {'source': 'exams', 'ids': [q.pk]})
+        q.refresh_from_db()
+        variants = q.image_variants
+        self.assertEqual(variants['source'], q.image.name)
+        self.assertEqual([v['width'] for v in variants['webp']], [320, 640])
+        self.assertEqual([v['width'] for v in variants['jpeg']], [320, 640])
+        self.assertIn(variants['hash'][:24], variants['jpeg'][0]['path'])
+        with default_storage.open(variants['jpeg'][1]['path']) as fh:
+            img = Image.open(fh)
+            self.assertEqual(img.size, (640, 320))
+            self.assertFalse(img.getexif())
+
+        # Same bytes on another question reuse the same derivative names.
+        with self.captureOnCommitCallbacks(execute=True):
+            q2 = Question.objects.create(topic=self.topic, type='MCQ', statement='again?', image=self._jpeg())
+        q2.refresh_from_db()
+        self.assertEqual(q2.image_variants['jpeg'], variants['jpeg'])
+
+    def test_bulk_imported_quiz_questions_get_variants(self):
+        from django.core.files.storage import default_storage
+
+        from quizzes.ingest import import_questions
+        from quizzes.models import Question as QuizQuestion
+
+        path = default_storage.save('question_images/lens.jpg', self._jpeg())
+        rows = [(2, {'text': 'focus?', 'image': path}), (3, {'text': 'no image'})]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_questions(iter(rows))
+        with_image, without = QuizQuestion.objects.order_by('id')
+        self.assertEqual(with_image.image_variants['source'], path)
+        self.assertEqual(len(with_image.image_variants['jpeg']), 2)
+        self.assertEqual(without.image_variants, {})
+
+    def test_start_exam_returns_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            q = Question.objects.create(topic=self.topic, type='MCQ', statement='focus?', image=self._jpeg(), choices={'A': '1'})
+        exam = Exam.objects.create(title='Optics Test', topic=self.topic, duration_seconds=600)
+        ExamQuestion.objects.create(exam=exam, question=q, order=1)
+
+        res = self.client.post(reverse('start_exam', args=[exam.id]))
+        self.assertEqual(res.status_code, 200)
+        item = res.json()['questions'][0]
+        self.assertTrue(item['image'].endswith('-640w.jpg'))
+        self.assertIn('320w', item['image_set']['srcset'])
+        self.assertIn('.webp 640w', item['image_set']['webp_srcset'])
+        self.assertTrue(item['image_set']['original'].startswith('http'))
+
+    def test_backfill_command_fills_missing_variants(self):
+        import io
+
+        from django.core.management import call_command
+
+        q = Question.objects.create(topic=self.topic, type='MCQ', statement='focus?', image=self._jpeg())
+        Question.objects.filter(pk=q.pk).update(image_variants={})
+        call_command('build_image_variants', app=['exams'], stdout=io.StringIO())
+        q.refresh_from_db()
+        self.assertEqual(len(q.image_variants['jpeg']), 2)
+
+
+class ImageBackfillTests(TestCase):
+    """backfill_images against a local HTTP server."""
+
+    def setUp(self):
+        import io
+        import tempfile
+        import threading
+        from collections import Counter
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        from PIL import Image
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.tmpdir, IMAGE_VARIANT_WIDTHS=[320])
+        self.settings_override.enable()
+
+        def png(color):
+            buf = io.BytesIO()
+            Image.new('RGB', (400, 200), color).save(buf, 'PNG')
+            return buf.getvalue()
+
+        red, blue = png((200, 0, 0)), png((0, 0, 200))
+        hits = self.hits = Counter()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                hits[self.path] += 1
+                if self.path in ('/red.png', '/copy-of-red.png'):
+                    status, body = 200, red
+                elif self.path == '/flaky.png':
+                    status, body = (503, b'') if hits[self.path] == 1 else (200, blue)
+                else:
+                    status, body = 404, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'image/png' if status == 200 else 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        self.state = f'{self.tmpdir}/state.json'
+
+        from quizzes.models import Question as QuizQuestion, Quiz
+
+        topic = Topic.objects.create(name='Optics')
+        self.quiz_q = QuizQuestion.objects.create(quiz=Quiz.objects.create(title='Lenses'), text='focus?')
+        self.exam_qs = [Question.objects.create(topic=topic, type='MCQ', statement=f'q{i}') for i in range(3)]
+        # As left by a spreadsheet import: the image column holds the source URL.
+        QuizQuestion.objects.filter(pk=self.quiz_q.pk).update(image=f'{self.base}/red.png')
+        for q, path in zip(self.exam_qs, ('copy-of-red.png', 'flaky.png', 'missing.png')):
+            Question.objects.filter(pk=q.pk).update(image=f'{self.base}/{path}')
+
+    def tearDown(self):
+        import shutil
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _run(self, **options):
+        import io
+
+        from django.core.management import call_command
+
+        call_command('backfill_images', state=self.state, backoff=0, workers=4, stdout=io.StringIO(), **options)
+
+    def test_downloads_dedupes_retries_and_resumes(self):
+        import json
+
+        self._run()
+        self.quiz_q.refresh_from_db()
+        copy, flaky, missing = self.exam_qs
+        for q in self.exam_qs:
+            q.refresh_from_db()
+
+        self.assertTrue(self.quiz_q.image.name.startswith('question_images/'))
+        self.assertEqual(copy.image.name, self.quiz_q.image.name)  # identical bytes stored once
+        self.assertEqual(len(self.quiz_q.image_variants['jpeg']), 1)
+        self.assertTrue(flaky.image.name.endswith('.png'))
+        self.assertEqual(self.hits['/flaky.png'], 2)
+        self.assertEqual(missing.image.name, f'{self.base}/missing.png')
+        with open(self.state) as fh:
+            self.assertIn(f'exams:{missing.pk}', json.load(fh)['failed'])
+
+        # A rerun only retries what has not been fetched yet.
+        self._run()
+        self.assertEqual((self.hits['/red.png'], self.hits['/missing.png']), (1, 2))
+
+    def test_manifest_supplies_urls(self):
+        import os
+
+        missing = self.exam_qs[2]
+        manifest = os.path.join(self.tmpdir, 'manifest.csv')
+        with open(manifest, 'w') as fh:
+            fh.write(f'app,id,url\nexams,{missing.pk},{self.base}/red.png\n')
+        self._run(manifest=manifest, skip_variants=True)
+        missing.refresh_from_db()
+        self.assertTrue(missing.image.name.startswith('question_images/'))
+        self.assertEqual(missing.image_variants, {})
+        self.assertEqual(self.hits['/flaky.png'], 0)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.tmpdir, IMAGE_VARIANT_WIDTHS=[320])
+        self.settings_override.enable()
+        self.topic = Topic.objects.create(name='Optics')
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _png(self, color=(10, 120, 10)):
+        import io
+
+        from PIL import Image
+
+        buf = io.BytesIO()
+        Image.new('RGB', (400, 200), color).save(buf, 'PNG')
+        return buf.getvalue()
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        from django.core.files.storage import default_storage
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from ib_project.content_store import is_content_name
+        from .models import MediaBlob
+
+        q1, q2 = [
+            Question.objects.create(topic=self.topic, type='MCQ', statement=f'q{i}',
+                                    image=SimpleUploadedFile(f'diagram{i}.png', self._png()))
+            for i in range(2)
+        ]
+        name = q1.image.name
+        self.assertTrue(is_content_name(name))
+        self.assertEqual(q2.image.name, name)
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 2)
+
+        # Clearing through FieldFile.delete() releases the reference once, on save.
+        with self.captureOnCommitCallbacks(execute=True):
+            q1.image.delete(save=True)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            q2.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replacing_or_deleting_rows_releases_references(self):
+        from django.core.files.storage import default_storage
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from .models import MediaBlob
+
+        with self.captureOnCommitCallbacks(execute=True):
+            q1, q2 = [
+                Question.objects.create(topic=self.topic, type='MCQ', statement=f'q{i}',
+                                        image=SimpleUploadedFile('diagram.png', self._png()))
+                for i in range(2)
+            ]
+        shared = q1.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            q1 = Question.objects.get(pk=q1.pk)
+            q1.image = SimpleUploadedFile('edited.png', self._png((200, 0, 0)))
+            q1.save()
+        self.assertEqual(MediaBlob.objects.get(name=shared).refcount, 1)
+        self.assertEqual(MediaBlob.objects.get(name=q1.image.name).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.get(pk=q2.pk).delete()
+        self.assertFalse(default_storage.exists(shared))
+        self.assertFalse(MediaBlob.objects.filter(name=shared).exists())
+        self.assertTrue(default_storage.exists(q1.image.name))
+
+    def test_concurrent_save_of_new_content_keeps_the_hashed_name(self):
+        import hashlib
+        import os
+        from unittest import mock
+
+        from django.core.files.base import ContentFile
+
+        from ib_project.content_store import content_name, content_storage
+
+        data = self._png()
+        target = content_name('question_images/a.png', hashlib.sha256(data).hexdigest())
+        backend = content_storage.backend
+        backend.save(target, ContentFile(data))  # the other writer won
+        # Our exists() check ran before that write landed; the backend then sees the clash.
+        with mock.patch.object(backend, 'exists', side_effect=[False, True, False]):
+            name = content_storage.save('question_images/b.png', ContentFile(data))
+        self.assertEqual(name, target)
+        self.assertEqual(os.listdir(os.path.dirname(backend.path(target))), [os.path.basename(target)])
+
+    def test_dedupe_media_moves_legacy_files_and_recounts(self):
+        import io
+
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+
+        from learning.models import Material
+        from .models import MediaBlob
+
+        legacy = [default_storage.save(f'question_images/legacy{i}.png', ContentFile(self._png())) for i in range(3)]
+        questions = [Question.objects.create(topic=self.topic, type='MCQ', statement=f'q{i}') for i in range(3)]
+        for q, name in zip(questions, legacy):
+            Question.objects.filter(pk=q.pk).update(image=name, image_variants={'source': name, 'jpeg': []})
+        handout = default_storage.save('materials/handout.pdf', ContentFile(b'%PDF-1.4 handout'))
+        material = Material.objects.create(title='Handout', type='PDF')
+        Material.objects.filter(pk=material.pk).update(file=handout)
+
+        out = io.StringIO()
+        call_command('dedupe_media', '--dry-run', stdout=out)
+        self.assertIn('2 duplicate(s)', out.getvalue())
+        self.assertTrue(default_storage.exists(legacy[0]))
+
+        call_command('dedupe_media', stdout=out)
+        names = {q.image.name for q in Question.objects.filter(pk__in=[q.pk for q in questions])}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertEqual(Question.objects.get(pk=questions[0].pk).image_variants['source'], name)
+        self.assertFalse(any(default_storage.exists(n) for n in legacy + [handout]))
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 3)
+        material.refresh_from_db()
+        self.assertTrue(material.file.name.startswith('materials/'))
+        self.assertTrue(default_storage.exists(material.file.name))
+
+
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from django.core.cache import cache
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        cache.clear()  # cached role versions from earlier tests would reject fresh tokens
+        self.addCleanup(cache.clear)
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.tmpdir, MEDIA_ACCEL_REDIRECT_PREFIX='')
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.owner = User.objects.create_user(username='m_owner', password='pw12345', role='STUDENT')
+        self.other = User.objects.create_user(username='m_other', password='pw12345', role='STUDENT')
+        self.teacher = User.objects.create_user(username='m_teacher', password='pw12345', role='TEACHER')
+        topic = Topic.objects.create(name='Media Topic')
+        exam = Exam.objects.create(title='Media Exam', topic=topic, duration_seconds=600)
+        attempt = Attempt.objects.create(user=self.owner, exam=exam)
+        self.path = default_storage.save(f'answer_uploads/{self.owner.id}/{attempt.id}/scan.pdf', ContentFile(b'%PDF-1.4 owner'))
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _get(self, path=None, **params):
+        return self.client.get(f'/media/{path or self.path}', params)
+
+    def test_owner_and_teacher_can_read_other_student_cannot(self):
+        self.assertIn(self._get().status_code, (401, 403))
+
+        self.client.force_authenticate(user=self.owner)
+        res = self._get()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'%PDF-1.4 owner')
+        self.assertIn('private', res['Cache-Control'])
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self._get().status_code, 403)
+
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(self._get().status_code, 200)
+
+    def test_media_token_and_accel_redirect(self):
+        self.client.force_authenticate(user=self.owner)
+        token = self.client.get(reverse('media_token')).json()['token']
+        self.client.force_authenticate(user=None)
+
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            res = self._get(token=token)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{self.path}')
+        self.assertEqual(res.content, b'')
+
+        self.assertIn(self._get(token=token + 'x').status_code, (401, 403))
+
+    def test_media_token_is_revoked_with_the_role_version(self):
+        self.client.force_authenticate(user=self.owner)
+        token = self.client.get(reverse('media_token')).json()['token']
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self._get(token=token).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.role = 'TEACHER'
+            self.owner.save()
+        self.assertIn(self._get(token=token).status_code, (401, 403))
+
+    def test_path_traversal_is_rejected(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(self._get('../settings.py').status_code, 404)
+
+
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.topic = Topic.objects.create(name='Waves')
+        self.exam = Exam.objects.create(title='Waves Quiz', topic=self.topic, duration_seconds=600)
+
+    def test_exam_list_revalidates_with_304_until_catalog_changes(self):
+        url = reverse('exam-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('public', first['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], etag)
+
+        # Attaching a question changes questions_count without touching Exam.updated_at.
+        with self.captureOnCommitCallbacks(execute=True):
+            q = Question.objects.create(topic=self.topic, type='MCQ', statement='v=f*?', correct_answers=['A'])
+            ExamQuestion.objects.create(exam=self.exam, question=q, order=1)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_only_finishing_an_attempt_changes_the_catalog(self):
+        from .catalog_cache import catalog_version
+
+        student = User.objects.create_user(username='cat_student', password='pw12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt = Attempt.objects.create(user=student, exam=self.exam)
+        version = catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt.status = 'submitted'
+            attempt.save()
+        self.assertNotEqual(catalog_version(), version)
+        version = catalog_version()
+
+        # Grading and metadata saves of a finished attempt leave the counts alone.
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt = Attempt.objects.get(pk=attempt.pk)
+            attempt.metadata = {'rank': 1}
+            attempt.save()
+            attempt.save(update_fields=['metadata'])
+        self.assertEqual(catalog_version(), version)
+
+    def test_topic_archive_via_update_invalidates_detail(self):
+        url = reverse('topic-detail', args=[self.topic.id])
+        etag = self.client.get(url)['ETag']
+        Topic.objects.filter(pk=self.topic.pk).update(is_active=False)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_admin_curriculum_listing_is_private(self):
+        admin = User.objects.create_user(username='cat_admin', password='pw12345', role='ADMIN')
+        self.client.force_authenticate(user=admin)
+        res = self.client.get(reverse('curriculum-list'), {'include_archived': 1})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('private', res['Cache-Control'])
+
+
+class TopicHierarchyTests(TestCase):
+    def setUp(self):
+        from .models import Curriculum
+
+        curriculum = Curriculum.objects.create(name='IB Physics')
+        self.root = Topic.objects.create(name='Mechanics', curriculum=curriculum)
+        self.mid = Topic.objects.create(name='Kinematics', curriculum=curriculum, parent=self.root)
+        self.leaf = Topic.objects.create(name='Projectiles', curriculum=curriculum, parent=self.mid)
+        self.sibling = Topic.objects.create(name='Dynamics', curriculum=curriculum, parent=self.root)
+        self.other = Topic.objects.create(name='Waves', curriculum=curriculum)
+        self.teacher = User.objects.create_user(username='tree_teacher', password='pw', role='TEACHER')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_paths_follow_creates_and_moves(self):
+        r, m, l = self.root.pk, self.mid.pk, self.leaf.pk
+        self.assertEqual((self.leaf.path, self.leaf.depth), (f'{r}/{m}/{l}/', 2))
+        self.assertEqual(self.leaf.ancestor_ids(), [r, m])
+
+        # Moving a topic re-roots its whole subtree.
+        self.mid.parent = self.other
+        self.mid.save()
+        self.leaf.refresh_from_db()
+        self.assertEqual((self.leaf.path, self.leaf.depth), (f'{self.other.pk}/{m}/{l}/', 2))
+
+        res = self.client.patch(f'/api/topics/{self.mid.pk}/', {'parent': self.leaf.pk}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('parent', res.data)
+
+    def test_include_descendants_filters_are_one_join(self):
+        from learning.models import Material
+
+        from .topic_tree import subtree_q
+
+        for topic in (self.leaf, self.sibling, self.other):
+            Exam.objects.create(title=f'{topic.name} test', topic=topic, duration_seconds=600)
+            Question.objects.create(topic=topic, type='MCQ', statement=topic.name, correct_answers=['A'])
+            Material.objects.create(title=topic.name, type='PDF', topic=topic)
+
+        with self.assertNumQueries(1):
+            titles = sorted(Exam.objects.filter(subtree_q('topic', self.root.pk)).values_list('title', flat=True))
+        self.assertEqual(titles, ['Dynamics test', 'Projectiles test'])
+
+        def count(url, **params):
+            data = self.client.get(url, params).json()
+            return len(data['results'] if isinstance(data, dict) else data)
+
+        for url in ('/api/exams/', '/api/questions/', '/api/materials/'):
+            self.assertEqual(count(url, topic=self.root.pk), 0, url)
+            self.assertEqual(count(url, topic=self.root.pk, include_descendants=1), 2, url)
+            self.assertEqual(count(url, topic=self.mid.pk, include_descendants=1), 1, url)
+
+        # A topic that was never given a path matches only itself.
+        Topic.objects.filter(pk=self.sibling.pk).update(path='')
+        self.assertEqual(count('/api/exams/', topic=self.sibling.pk, include_descendants=1), 1)
+
+    def test_subtree_archive_and_restore_are_single_updates(self):
+        Question.objects.create(topic=self.root, type='MCQ', statement='linked', correct_answers=['A'])
+        admin = User.objects.create_user(username='tree_admin', password='pw', role='ADMIN')
+        self.client.force_authenticate(user=admin)
+
+        res = self.client.delete(f'/api/topics/{self.root.pk}/')
+        self.assertTrue(res.data['archived'])
+        self.assertEqual(list(Topic.objects.filter(is_active=True)), [self.other])
+
+        res = self.client.post(f'/api/topics/{self.mid.pk}/restore/')
+        self.assertEqual(res.status_code, 409)  # parent still archived
+        with self.assertNumQueries(2):  # the topic, then one UPDATE over its subtree
+            res = self.client.post(f'/api/topics/{self.root.pk}/restore/')
+        self.assertEqual(res.data['topics'], 4)
+        self.assertEqual(Topic.objects.filter(is_active=True).count(), 5)
+
+        crumbs = self.client.get(f'/api/topics/{self.leaf.pk}/ancestors/').json()['ancestors']
+        self.assertEqual([c['name'] for c in crumbs], ['Mechanics', 'Kinematics'])
+        below = self.client.get(f'/api/topics/{self.root.pk}/descendants/').json()['descendants']
+        self.assertEqual([t['name'] for t in below], ['Kinematics', 'Projectiles', 'Dynamics'])
+
+
+class PreprovisionedAttemptTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from learning.models import LearningAssignment
+
+        self.student = User.objects.create_user(username='pp_student', password='pw', role='STUDENT')
+        self.teacher = User.objects.create_user(username='pp_teacher', password='pw', role='TEACHER')
+        self.topic = Topic.objects.create(name='Waves')
+        self.exam = Exam.objects.create(title='Waves Mock', topic=self.topic, duration_seconds=600)
+        for i in range(3):
+            q = Question.objects.create(topic=self.topic, type='MCQ', statement=f'w{i}?', choices={'A': '1'}, correct_answers=['A'])
+            ExamQuestion.objects.create(exam=self.exam, question=q, order=i)
+        self.assignment = LearningAssignment.objects.create(
+            assigned_by=self.teacher,
+            assigned_by_role='TEACHER',
+            assigned_to=self.student,
+            assignment_type=LearningAssignment.TYPE_MOCK_TEST,
+            exam=self.exam,
+            start_at=timezone.now() + timedelta(minutes=10),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def _provision(self):
+        import io
+
+        from django.core.management import call_command
+
+        out = io.StringIO()
+        call_command('preprovision_attempts', stdout=out)
+        return out.getvalue()
+
+    def test_provisioned_attempt_is_hidden_and_locked_until_start(self):
+        self.assertIn('Provisioned 1 attempts', self._provision())
+        self._provision()  # idempotent
+        attempt = Attempt.objects.get(user=self.student, exam=self.exam)
+        self.assertEqual(attempt.status, 'scheduled')
+        self.assertEqual(len(attempt.metadata['question_order']), 3)
+        self.assertEqual(attempt.metadata['exam_snapshot']['exam_title'], 'Waves Mock')
+
+        self.assertEqual(self.client.get('/api/users/me/attempts/').json()['attempts'], [])
+        # Starting from the catalog still honours the assignment window.
+        res = self.client.post(reverse('start_exam', args=[self.exam.id]))
+        self.assertEqual(res.status_code, 423)
+
+    def test_start_flips_dormant_attempt_with_one_write(self):
+        from datetime import timedelta
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+
+        self._provision()
+        self.assignment.start_at = timezone.now() - timedelta(seconds=1)
+        self.assignment.save(update_fields=['start_at'])
+        attempt = Attempt.objects.get(user=self.student, exam=self.exam)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(reverse('start_exam', args=[self.exam.id]), {'assignment_id': self.assignment.id}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['attempt_id'], attempt.id)
+        writes = [q['sql'] for q in ctx.captured_queries if not q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].lstrip().upper().startswith('UPDATE'))
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, 'inprogress')
+        self.assertGreater(attempt.started_at, self.assignment.start_at)
+        self.assertEqual([q['id'] for q in res.data['questions']], attempt.metadata['question_order'])
+
+    def test_start_refreshes_the_student_dashboard(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        self._provision()
+        self.assignment.start_at = timezone.now() - timedelta(seconds=1)
+        self.assignment.save(update_fields=['start_at'])
+        self.assertEqual(self.client.get('/api/dashboard/student/').json()['exams']['in_progress'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('start_exam', args=[self.exam.id]), {'assignment_id': self.assignment.id}, format='json')
+        self.assertEqual(self.client.get('/api/dashboard/student/').json()['exams']['in_progress'], 1)
+
+
+class CurriculumPurgeJobTests(TestCase):
+    def setUp(self):
+        from learning.models import LearningAssignment
+
+        from .models import Curriculum, Response
+
+        self.admin = User.objects.create_user(username='purge_admin', password='pw', role='ADMIN')
+        self.curriculum = Curriculum.objects.create(name='Old Physics')
+        root = Topic.objects.create(name='Mechanics', curriculum=self.curriculum)
+        child = Topic.objects.create(name='Kinematics', curriculum=self.curriculum, parent=root)
+        self.questions = [
+            Question.objects.create(topic=child, type='MCQ', statement=f'q{i}', correct_answers=['A']) for i in range(3)
+        ]
+        students = [User.objects.create_user(username=f'purge_s{i}', password='pw', role='STUDENT') for i in range(3)]
+        self.exams = []
+        for e in range(2):
+            exam = Exam.objects.create(title=f'Mock {e}', topic=child, duration_seconds=600)
+            self.exams.append(exam)
+            for order, q in enumerate(self.questions, start=1):
+                ExamQuestion.objects.create(exam=exam, question=q, order=order)
+            for student in students:
+                attempt = Attempt.objects.create(user=student, exam=exam, status='submitted')
+                for q in self.questions:
+                    Response.objects.create(attempt=attempt, question=q, answer_payload={'answers': ['A']})
+        self.assignment = LearningAssignment.objects.create(assigned_to=students[0], assignment_type='MOCK_TEST', exam=self.exams[0])
+        # 18 responses, 6 attempts, 6 exam questions, 1 assignment, 2 exams, 3 questions, 2 topics
+        self.expected = {
+            'upload_sessions': 0, 'responses': 18, 'attempts': 6, 'exam_questions': 6, 'assignments_unlinked': 1,
+            'exams': 2, 'questions': 3, 'topics': 2, 'questions_moved_to_shared_pool': 0,
+        }
+        self.url = f'/api/curriculums/{self.curriculum.id}/purge/'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _assert_purged(self):
+        from .models import Curriculum, Response
+
+        self.assertFalse(Curriculum.objects.filter(pk=self.curriculum.pk).exists())
+        self.assertFalse(Topic.objects.exists())
+        self.assertFalse(Response.objects.exists())
+        self.assertFalse(Attempt.objects.exists())
+        self.assignment.refresh_from_db()
+        self.assertIsNone(self.assignment.exam_id)
+
+    def test_large_purge_runs_in_chunks_in_worker(self):
+        import io
+
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        from .models import Curriculum
+
+        with override_settings(CURRICULUM_PURGE_INLINE_LIMIT=10, CURRICULUM_PURGE_CHUNK_SIZE=4, BACKGROUND_JOBS_EAGER=False):
+            res = self.client.delete(f'{self.url}?force=1')
+            self.assertEqual(res.status_code, 202)
+            self.assertEqual(res.data['job']['progress'], {'done': 0, 'total': 38})
+            self.assertFalse(Curriculum.objects.get(pk=self.curriculum.pk).is_active)
+            call_command('run_jobs', once=True, stdout=io.StringIO())
+
+        job = self.client.get(f"/api/jobs/{res.data['job']['id']}/").data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['progress'], {'done': 38, 'total': 38})
+        self.assertEqual(job['result']['counts'], self.expected)
+        self._assert_purged()
+
+    def test_shared_questions_and_materials_are_checked_first(self):
+        from learning.models import Material
+
+        from .models import Curriculum
+
+        other = Exam.objects.create(title='Elsewhere', topic=Topic.objects.create(name='Other'), duration_seconds=600)
+        ExamQuestion.objects.create(exam=other, question=self.questions[0], order=1)
+        res = self.client.delete(f'{self.url}?force=1')
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.data['shared_questions'], 1)
+
+        material = Material.objects.create(title='Notes', type='PDF', curriculum=self.curriculum)
+        res = self.client.delete(f'{self.url}?force=1&keep_shared=1')
+        self.assertEqual((res.status_code, res.data['materials']), (409, 1))
+        material.delete()
+
+        res = self.client.delete(f'{self.url}?force=1&keep_shared=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['counts']['questions_moved_to_shared_pool'], 1)
+        self.assertEqual(res.data['counts']['questions'], 2)
+        self.assertEqual(Question.objects.get(pk=self.questions[0].pk).topic.curriculum.name, '__Shared Question Pool__')
+        self.assertFalse(Curriculum.objects.filter(pk=self.curriculum.pk).exists())
+
+    def test_interrupted_purge_resumes_from_cursor(self):
+        from unittest import mock
+
+        from django.test import override_settings
+
+        from .jobs import enqueue, report_progress, run_job
+        from .models import BackgroundJob
+
+        job = enqueue('exams.purge_curriculum', {'curriculum': self.curriculum.id}, total=38)
+        calls = []
+
+        def dies_on_fourth_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 4:
+                raise RuntimeError('worker killed')
+            report_progress(*args, **kwargs)
+
+        with override_settings(CURRICULUM_PURGE_CHUNK_SIZE=5):
+            with mock.patch('exams.purge.report_progress', side_effect=dies_on_fourth_chunk):
+                run_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.cursor['phase'], job.progress_done), ('failed', 'responses', 15))
+
+            BackgroundJob.objects.filter(pk=job.pk).update(status='queued')
+            run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result['counts'], self.expected)
+        self._assert_purged()
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Routing decisions only; ReplicaEndToEndTests runs them against two aliases."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.override = self.settings(DATABASE_REPLICA_ALIAS='replica', REPLICA_PIN_SECONDS=30)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+    def _route(self, method='get', user_id=7, view=None):
+        """Alias a read made inside `view` would use, as seen through the middleware."""
+        from django.db import router
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from ib_project.db_router import ReplicaRoutingMiddleware
+
+        seen = {}
+
+        def default_view(request):
+            seen['alias'] = router.db_for_read(Exam)
+            return HttpResponse()
+
+        view = view or default_view
+        token = AccessToken()
+        token['user_id'] = user_id
+        request = getattr(RequestFactory(), method)('/api/leaderboard/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        middleware = ReplicaRoutingMiddleware(
+            lambda req: middleware.process_view(req, view, (), {}) or view(req)
+        )
+        middleware(request)
+        seen.setdefault('alias', router.db_for_read(Exam))  # views that do not read
+        return seen['alias'], seen
+
+    def test_safe_reads_use_replica_until_the_user_writes(self):
+        from django.db import router
+
+        self.assertEqual(self._route()[0], 'replica')
+        self.assertEqual(router.db_for_read(Exam), 'default')  # outside a request
+        self.assertEqual(router.db_for_read(User), 'default')
+
+        self.assertEqual(self._route('post')[0], 'default')
+        self.assertEqual(self._route()[0], 'default')  # pinned after the write
+        self.assertEqual(self._route(user_id=8)[0], 'replica')  # other users are not
+
+    def test_writes_inside_a_request_switch_reads_to_primary(self):
+        from django.db import router
+        from django.http import HttpResponse
+
+        def view(request):
+            seen['before'] = router.db_for_read(Exam)
+            router.db_for_write(Exam)
+            seen['after'] = router.db_for_read(Exam)
+            return HttpResponse()
+
+        seen = {}
+        self._route(view=view)
+        self.assertEqual((seen['before'], seen['after']), ('replica', 'default'))
+
+    def test_view_overrides(self):
+        from django.db import router
+        from django.http import HttpResponse
+
+        from ib_project.db_router import pin_to_primary, use_primary, use_replica
+
+        def read(request):
+            read.alias = router.db_for_read(Exam)
+            return HttpResponse()
+
+        primary_view = use_primary(lambda request: read(request))
+        self._route(view=primary_view)
+        self.assertEqual(read.alias, 'default')
+
+        pin_to_primary('7')
+        replica_view = use_replica(lambda request: read(request))
+        self._route(view=replica_view)
+        self.assertEqual(read.alias, 'replica')
+
+        with self.settings(DATABASE_REPLICA_ALIAS=''):
+            self._route(view=replica_view)
+        self.assertEqual(read.alias, 'default')
+
+    def test_shared_caches_are_rebuilt_from_primary(self):
+        from unittest import mock
+
+        from django.core.cache import cache
+        from django.db import router
+        from django.http import HttpResponse
+
+        from dashboard.student_stats import student_summary
+        from dashboard.teacher_stats import teacher_dashboard
+        from learning.feed import student_feed
+        from questionpapers.navigation import paper_index
+
+        builders = {
+            'dashboard.teacher_stats.build_teacher_dashboard': lambda: teacher_dashboard(7),
+            'dashboard.student_stats.build_student_summary': lambda: student_summary(7),
+            'learning.feed.build_student_feed': lambda: student_feed(7),
+            'questionpapers.navigation.build_paper_index': lambda: paper_index(3),
+        }
+        for target, fill in builders.items():
+            seen = {}
+
+            def build(*args, **kwargs):
+                seen['build'] = router.db_for_read(Exam)
+                return {'next_boundary': None}
+
+            def view(request):
+                fill()
+                seen['after'] = router.db_for_read(Exam)
+                return HttpResponse()
+
+            cache.clear()  # the invalidation; the next read rebuilds the entry
+            with self.subTest(target), mock.patch(target, side_effect=build):
+                self._route(view=view)
+                self.assertEqual((seen['build'], seen['after']), ('default', 'replica'))
+
+    def test_catalog_reads_primary_after_a_catalog_write(self):
+        from unittest import mock
+
+        from django.db import router
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from .catalog_cache import ConditionalCatalogMixin, _incr_catalog_version
+
+        def catalog_view(request):
+            def render():
+                seen.append(router.db_for_read(Exam))
+                return HttpResponse()
+
+            ConditionalCatalogMixin().conditional_response(RequestFactory().get('/api/exams/'), Exam.objects.none(), render)
+            return HttpResponse()
+
+        def etag(*args):
+            seen.append(router.db_for_read(Exam))
+            return '"v"'
+
+        seen = []
+        with mock.patch('exams.catalog_cache.catalog_etag', side_effect=etag):
+            self._route(view=catalog_view)
+            _incr_catalog_version()
+            self._route(view=catalog_view)
+            self._route(view=catalog_view, user_id=8)
+        self.assertEqual(seen, ['replica'] * 2 + ['default'] * 4)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS='replica')
+class ReplicaEndToEndTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(username='replica_reader', password='pw')
+        self.exam = Exam.objects.create(title='Replica', topic=Topic.objects.create(name='Optics'), duration_seconds=600)
+        self.client = APIClient()
+        self.client.login(username='replica_reader', password='pw')  # session: the pin needs a user id
+
+    def _queries(self, method, url):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            res = getattr(self.client, method)(url)
+        self.assertLess(res.status_code, 400)
+        return len(primary), len(replica)
+
+    def test_reads_follow_writes(self):
+        primary, replica = self._queries('get', '/api/leaderboard/')
+        self.assertGreater(replica, 0)
+
+        self._queries('post', reverse('start_exam', args=[self.exam.id]))
+        primary, replica = self._queries('get', reverse('my_attempts'))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
@@ -0,0 +1,35 @@
+"""Subtree and ancestor queries over the materialized Topic.path (see Topic.save)."""
+from django.db.models import Q, Subquery
+
+from .models import Topic
+
+
+def wants_descendants(request) -> bool:
+    return (request.query_params.get('include_descendants') or '').strip().lower() in ('1', 'true', 'yes')
+
+
+def subtree_q(lookup: str, topic_id) -> Q:
+    """Rows whose topic (reached through `lookup`, e.g. 'topic') is `topic_id` or below it.
+
+    Compiles to one join on the indexed path prefix; the topic's own path is read in a
+    subquery, so no separate lookup is needed. A topic without a path (never placed)
+    matches only itself, never every topic.
+    """
+    path = Subquery(Topic.objects.filter(pk=topic_id).exclude(path='').values('path')[:1])
+    return Q(**{f'{lookup}__path__startswith': path}) | Q(**{f'{lookup}_id': topic_id})
+
+
+def topic_q(lookup: str, topic_id, include_descendants: bool) -> Q:
+    return subtree_q(lookup, topic_id) if include_descendants else Q(**{f'{lookup}_id': topic_id})
+
+
+def subtree(topic):
+    """The topic and all its descendants."""
+    if not topic.path:  # not placed yet; never widen to every topic
+        return Topic.objects.filter(pk=topic.pk)
+    return Topic.objects.filter(path__startswith=topic.path)
+
+
+def ancestors(topic):
+    """The topic's ancestors, root first, in one query."""
+    return Topic.objects.filter(pk__in=topic.ancestor_ids()).order_by('depth')
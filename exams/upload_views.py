@@ -0,0 +1,450 @@
+"""Resumable (chunked) uploads for attempt submissions.
+
+Proxy mode (default):
+    1. POST   /api/attempts/<attempt_id>/uploads/   {filename, size, sha256, content_type}
+    2. PUT    /api/uploads/<upload_id>/chunk/       raw bytes, header "Upload-Offset: <n>"
+    3. GET    /api/uploads/<upload_id>/             current offset, to resume after a dropped connection
+    4. POST   /api/uploads/<upload_id>/complete/    verifies assembled size + sha256, stores the file
+
+Direct mode (DIRECT_UPLOADS_ENABLED with S3): step 1 also takes part_sha256, the base64
+SHA-256 of each part, and returns presigned part URLs that sign those checksums, so S3
+rejects a part whose bytes differ. The client PUTs each part straight to the bucket with
+an x-amz-checksum-sha256 header and step 4 sends the part ETags and checksums. The API
+worker never reads the bytes: it compares the checksum S3 computed for the assembled
+object with the declared ones.
+
+Both modes refuse chunks and completion once a student's attempt window has closed.
+"""
+import base64
+import binascii
+import hashlib
+import math
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser
+from rest_framework.response import Response as DRFResponse
+
+from accounts.roles import is_teacher_or_admin
+
+from .models import Attempt, UploadSession
+from .views import (
+    _attempt_expires_at,
+    _mark_attempt_timedout,
+    _record_student_uploads,
+    _submission_storage_path,
+)
+
+_READ_BLOCK = 64 * 1024
+
+
+class ChunkParser(BaseParser):
+    """Hand the raw request stream to the view so chunks are streamed to disk, not buffered."""
+
+    media_type = 'application/offset+octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+class OctetStreamChunkParser(ChunkParser):
+    media_type = 'application/octet-stream'
+
+
+def _staging_path(session: UploadSession) -> str:
+    return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f'{session.id}.part')
+
+
+def _s3_client():
+    # boto3 is only required when direct-to-bucket uploads are enabled.
+    import boto3
+
+    return boto3.client(
+        's3',
+        endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None) or None,
+        region_name=getattr(settings, 'AWS_S3_REGION_NAME', None) or None,
+        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None) or None,
+        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None) or None,
+    )
+
+
+def _s3_key(storage_path: str) -> str:
+    location = (getattr(settings, 'AWS_LOCATION', '') or '').strip('/')
+    return f'{location}/{storage_path}' if location else storage_path
+
+
+def _expected_parts(session: UploadSession) -> int:
+    return max(1, math.ceil(session.total_size / settings.CHUNKED_UPLOAD_CHUNK_SIZE))
+
+
+def _part_checksums(value, count: int):
+    """The declared base64 SHA-256 digest of each direct-upload part, or None if malformed."""
+    if not isinstance(value, list) or len(value) != count:
+        return None
+    try:
+        digests = [base64.b64decode(str(v), validate=True) for v in value]
+    except (binascii.Error, ValueError):
+        return None
+    if any(len(d) != 32 for d in digests):
+        return None
+    return [base64.b64encode(d).decode() for d in digests]
+
+
+def _composite_checksum(part_checksums) -> str:
+    """S3's SHA-256 of a multipart object: the digest of the concatenated part digests."""
+    joined = b''.join(base64.b64decode(c) for c in part_checksums)
+    return base64.b64encode(hashlib.sha256(joined).digest()).decode()
+
+
+def _session_payload(session: UploadSession) -> dict:
+    return {
+        'upload_id': str(session.id),
+        'attempt_id': session.attempt_id,
+        'filename': session.filename,
+        'size': session.total_size,
+        'offset': session.received_bytes,
+        'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        'mode': session.mode,
+        'status': session.status,
+    }
+
+
+def _check_upload_window(request, attempt: Attempt):
+    """Return an error response if a student's upload window has closed, else None."""
+    if is_teacher_or_admin(request.user):
+        return None
+    expires_at_dt = _attempt_expires_at(attempt)
+    if expires_at_dt and timezone.now() >= expires_at_dt:
+        _mark_attempt_timedout(attempt, expires_at_dt)
+        return DRFResponse({'detail': 'Attempt timed out. Upload window has ended.'}, status=status.HTTP_410_GONE)
+    return None
+
+
+def _get_session(request, upload_id) -> UploadSession:
+    return get_object_or_404(
+        UploadSession.objects.select_related('attempt', 'attempt__exam'),
+        pk=upload_id,
+        user=request.user,
+    )
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def init_upload(request, attempt_id):
+    """Start a resumable upload for an attempt submission."""
+    attempt = get_object_or_404(Attempt.objects.exclude(status='scheduled').select_related('exam'), pk=attempt_id)
+    if not is_teacher_or_admin(request.user) and attempt.user_id != request.user.id:
+        return DRFResponse({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
+    closed = _check_upload_window(request, attempt)
+    if closed is not None:
+        return closed
+
+    filename = (request.data.get('filename') or '').strip()
+    content_type = (request.data.get('content_type') or '').strip()[:120]
+    sha256 = (request.data.get('sha256') or '').strip().lower()
+    try:
+        size = int(request.data.get('size'))
+    except (TypeError, ValueError):
+        size = 0
+
+    if not filename:
+        return DRFResponse({'detail': 'filename is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    if size <= 0:
+        return DRFResponse({'detail': 'size must be a positive number of bytes.'}, status=status.HTTP_400_BAD_REQUEST)
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return DRFResponse(
+            {'detail': f'File too large. Maximum size is {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+    if not sha256:
+        return DRFResponse({'detail': 'sha256 is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256):
+        return DRFResponse({'detail': 'sha256 must be a hex-encoded SHA-256 digest.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    direct = bool(settings.DIRECT_UPLOADS_ENABLED) and (request.data.get('mode') or '').strip().lower() != 'proxy'
+    session = UploadSession(
+        attempt=attempt,
+        user=request.user,
+        filename=filename[:255],
+        content_type=content_type,
+        total_size=size,
+        sha256=sha256,
+        mode='direct' if direct else 'proxy',
+        storage_path=_submission_storage_path(attempt, filename),
+    )
+
+    payload = {}
+    if direct:
+        checksums = _part_checksums(request.data.get('part_sha256'), _expected_parts(session))
+        if checksums is None:
+            return DRFResponse(
+                {'detail': 'part_sha256 must list the base64 SHA-256 digest of each part.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(checksums) == 1 and base64.b64decode(checksums[0]) != bytes.fromhex(sha256):
+            return DRFResponse({'detail': 'part_sha256 does not match sha256.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        client = _s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        key = _s3_key(session.storage_path)
+        extra = {'ContentType': content_type} if content_type else {}
+        created = client.create_multipart_upload(Bucket=bucket, Key=key, ChecksumAlgorithm='SHA256', **extra)
+        session.remote_upload_id = created['UploadId']
+        payload['parts'] = [
+            {
+                'part_number': n,
+                'checksum_sha256': checksum,
+                'url': client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': bucket,
+                        'Key': key,
+                        'UploadId': session.remote_upload_id,
+                        'PartNumber': n,
+                        'ChecksumSHA256': checksum,
+                    },
+                    ExpiresIn=settings.DIRECT_UPLOAD_URL_EXPIRY,
+                ),
+            }
+            for n, checksum in enumerate(checksums, start=1)
+        ]
+    else:
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        open(_staging_path(session), 'wb').close()
+
+    session.save()
+    return DRFResponse({**_session_payload(session), **payload}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_status(request, upload_id):
+    """GET: current offset (resume point). DELETE: abort the upload and discard received bytes."""
+    session = _get_session(request, upload_id)
+
+    if request.method == 'DELETE':
+        if session.status == 'pending':
+            _discard_session_data(session)
+            session.status = 'aborted'
+            session.save(update_fields=['status', 'updated_at'])
+        return DRFResponse(_session_payload(session), status=status.HTTP_200_OK)
+
+    payload = _session_payload(session)
+    if session.mode == 'direct' and session.status == 'pending':
+        listed = _s3_client().list_parts(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=_s3_key(session.storage_path),
+            UploadId=session.remote_upload_id,
+        )
+        parts = listed.get('Parts', []) or []
+        payload['offset'] = sum(int(p.get('Size') or 0) for p in parts)
+        payload['uploaded_parts'] = [{'part_number': p['PartNumber'], 'etag': p['ETag']} for p in parts]
+    return DRFResponse(payload, status=status.HTTP_200_OK)
+
+
+@api_view(['PUT', 'PATCH', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([ChunkParser, OctetStreamChunkParser, MultiPartParser])
+def upload_chunk(request, upload_id):
+    """Append a chunk at the given offset (proxy mode only).
+
+    The offset must equal the number of bytes already received; on mismatch the
+    current offset is returned with 409 so the client can resume from there.
+    """
+    session = _get_session(request, upload_id)
+    if session.mode != 'proxy':
+        return DRFResponse({'detail': 'Direct uploads send parts to storage, not to the API.'}, status=status.HTTP_400_BAD_REQUEST)
+    if session.status != 'pending':
+        return DRFResponse({'detail': f'Upload is {session.status}.', **_session_payload(session)}, status=status.HTTP_409_CONFLICT)
+    closed = _check_upload_window(request, session.attempt)
+    if closed is not None:
+        return closed
+
+    raw_offset = request.headers.get('Upload-Offset', request.query_params.get('offset'))
+    try:
+        offset = int(raw_offset)
+    except (TypeError, ValueError):
+        return DRFResponse({'detail': 'Upload-Offset header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    if offset != session.received_bytes:
+        return DRFResponse({'detail': 'Offset mismatch.', **_session_payload(session)}, status=status.HTTP_409_CONFLICT)
+
+    source = request.FILES.get('chunk')
+    if source is not None:
+        blocks = source.chunks(_READ_BLOCK)
+    elif hasattr(request.data, 'read'):
+        stream = request.data
+        blocks = iter(lambda: stream.read(_READ_BLOCK), b'')
+    else:
+        return DRFResponse({'detail': 'Empty chunk.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    remaining = session.total_size - offset
+    written = 0
+    # Seek + truncate so bytes left behind by an interrupted request are overwritten.
+    with open(_staging_path(session), 'r+b') as fh:
+        fh.seek(offset)
+        for block in blocks:
+            written += len(block)
+            if written > remaining:
+                fh.truncate(offset)
+                return DRFResponse(
+                    {'detail': 'Chunk exceeds the declared file size.', **_session_payload(session)},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+            fh.write(block)
+        fh.truncate()
+
+    if written == 0:
+        return DRFResponse({'detail': 'Empty chunk.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Optimistic advance: a concurrent retry of the same chunk loses the race and gets 409.
+    updated = UploadSession.objects.filter(pk=session.pk, received_bytes=offset, status='pending').update(
+        received_bytes=offset + written,
+        updated_at=timezone.now(),
+    )
+    session.refresh_from_db()
+    if not updated:
+        return DRFResponse({'detail': 'Offset mismatch.', **_session_payload(session)}, status=status.HTTP_409_CONFLICT)
+    return DRFResponse(_session_payload(session), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([JSONParser])
+def complete_upload(request, upload_id):
+    """Verify the assembled upload and attach it to the attempt's student_uploads."""
+    session = _get_session(request, upload_id)
+    if session.status == 'complete':
+        attempt = session.attempt
+        uploads = (attempt.metadata or {}).get('student_uploads', []) if isinstance(attempt.metadata, dict) else []
+        return DRFResponse({'status': 'uploaded', 'upload': _session_payload(session), 'student_uploads': uploads})
+    if session.status != 'pending':
+        return DRFResponse({'detail': f'Upload is {session.status}.'}, status=status.HTTP_409_CONFLICT)
+    closed = _check_upload_window(request, session.attempt)
+    if closed is not None:
+        return closed
+
+    if session.mode == 'direct':
+        error = _complete_direct(session, request.data.get('parts'))
+        saved_path = session.storage_path
+    else:
+        error, saved_path = _complete_proxy(session)
+    if error is not None:
+        return error
+
+    session.status = 'complete'
+    session.storage_path = saved_path
+    session.received_bytes = session.total_size
+    session.completed_at = timezone.now()
+    session.save(update_fields=['status', 'storage_path', 'received_bytes', 'completed_at', 'updated_at'])
+
+    uploads = _record_student_uploads(session.attempt_id, [(session.filename, saved_path)])
+    return DRFResponse(
+        {'status': 'uploaded', 'upload': _session_payload(session), 'student_uploads': uploads},
+        status=status.HTTP_200_OK,
+    )
+
+
+def _complete_proxy(session: UploadSession):
+    path = _staging_path(session)
+    try:
+        on_disk = os.path.getsize(path)
+    except OSError:
+        on_disk = -1
+    if session.received_bytes != session.total_size or on_disk != session.total_size:
+        return DRFResponse(
+            {'detail': 'Upload is incomplete.', **_session_payload(session)},
+            status=status.HTTP_409_CONFLICT,
+        ), None
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(_READ_BLOCK), b''):
+            digest.update(block)
+    if session.sha256 and digest.hexdigest() != session.sha256:
+        # The bytes are unusable; discard them so the client restarts cleanly.
+        _discard_session_data(session)
+        session.status = 'aborted'
+        session.save(update_fields=['status', 'updated_at'])
+        return DRFResponse(
+            {'detail': 'Checksum mismatch. Please upload the file again.', **_session_payload(session)},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        ), None
+
+    with open(path, 'rb') as fh:
+        saved_path = default_storage.save(session.storage_path, File(fh, name=session.filename))
+    _discard_session_data(session)
+    return None, saved_path
+
+
+def _complete_direct(session: UploadSession, parts):
+    from botocore.exceptions import ClientError
+
+    if not isinstance(parts, list) or not parts:
+        return DRFResponse(
+            {'detail': 'parts is required: [{part_number, etag, checksum_sha256}, ...]'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        normalized = sorted(
+            (
+                {'PartNumber': int(p['part_number']), 'ETag': str(p['etag']), 'ChecksumSHA256': str(p['checksum_sha256'])}
+                for p in parts
+            ),
+            key=lambda p: p['PartNumber'],
+        )
+    except (KeyError, TypeError, ValueError):
+        return DRFResponse({'detail': 'Each part needs part_number, etag and checksum_sha256.'}, status=status.HTTP_400_BAD_REQUEST)
+    if [p['PartNumber'] for p in normalized] != list(range(1, _expected_parts(session) + 1)):
+        return DRFResponse({'detail': 'Missing or unexpected part numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    client = _s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = _s3_key(session.storage_path)
+    try:
+        # S3 refuses parts whose checksum differs from the one it verified on upload.
+        client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=session.remote_upload_id,
+            MultipartUpload={'Parts': normalized},
+        )
+    except ClientError:
+        return DRFResponse({'detail': 'Storage rejected the parts.', **_session_payload(session)}, status=status.HTTP_409_CONFLICT)
+
+    def reject(detail):
+        client.delete_object(Bucket=bucket, Key=key)
+        session.status = 'aborted'
+        session.save(update_fields=['status', 'updated_at'])
+        return DRFResponse({'detail': f'{detail} Please upload the file again.'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    head = client.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+    if int(head.get('ContentLength') or 0) != session.total_size:
+        return reject('Assembled size does not match the declared size.')
+    # S3 reports '<base64>-<part count>' for multipart objects.
+    reported = (head.get('ChecksumSHA256') or '').split('-')[0]
+    if reported != _composite_checksum(p['ChecksumSHA256'] for p in normalized):
+        return reject('Checksum mismatch.')
+    return None
+
+
+def _discard_session_data(session: UploadSession) -> None:
+    if session.mode == 'direct':
+        try:
+            _s3_client().abort_multipart_upload(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=_s3_key(session.storage_path),
+                UploadId=session.remote_upload_id,
+            )
+        except Exception:
+            pass
+        return
+    try:
+        os.remove(_staging_path(session))
+    except OSError:
+        pass
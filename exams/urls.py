@@ -5,13 +5,14 @@ from .views import (
     start_exam, submit_exam, resume_attempt, save_attempt,
     bulk_create_questions, my_attempts, review_attempt, analytics_user_topics, leaderboard,
     grade_response, upload_evaluated_pdf, analytics_exams_summary, upload_attempt_submission,
-    finalize_attempt_grading
+    finalize_attempt_grading, job_status
 )
 from .admin_views import (
     admin_overview, admin_users_list, admin_delete_user, 
     admin_analytics, add_questions_to_exam,
     exam_questions_list, exam_question_remove, exam_questions_reorder
 )
+from .upload_views import init_upload, upload_status, upload_chunk, complete_upload
 
 router = DefaultRouter()
 router.register(r'curriculums', CurriculumViewSet)
@@ -47,4 +48,11 @@ urlpatterns = [
     path('attempts/<int:attempt_id>/finalize-grading/', finalize_attempt_grading, name='finalize_attempt_grading'),
     path('attempts/<int:attempt_id>/upload-pdf/', upload_evaluated_pdf, name='upload_evaluated_pdf'),
     path('attempts/<int:attempt_id>/upload-submission/', upload_attempt_submission, name='upload_attempt_submission'),
+    # Resumable (chunked) submission uploads
+    path('attempts/<int:attempt_id>/uploads/', init_upload, name='init_upload'),
+    path('uploads/<uuid:upload_id>/', upload_status, name='upload_status'),
+    path('uploads/<uuid:upload_id>/chunk/', upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:upload_id>/complete/', complete_upload, name='complete_upload'),
+    # Background jobs (bulk assignment, imports, purges)
+    path('jobs/<uuid:job_id>/', job_status, name='job_status'),
 ]
@@ -1,17 +1,26 @@
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, action
 from rest_framework.response import Response as DRFResponse
 from rest_framework.exceptions import ValidationError
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models.deletion import ProtectedError
 from django.db.models import Avg, Count, Exists, Max, OuterRef, Q
 from django.utils import timezone
 import random
 from datetime import timedelta
 
-from .models import Curriculum, Topic, Question, Exam, ExamQuestion, Attempt, Response, LeaderboardEntry
+from .models import BackgroundJob, Curriculum, Topic, Question, Exam, ExamQuestion, Attempt, Response, LeaderboardEntry
+from .jobs import enqueue, job_payload, run_job
+from .purge import move_to_shared_pool, purge_blockers, purge_totals
+from .topic_tree import ancestors as topic_ancestors, subtree, topic_q, wants_descendants
 from django.core.mail import send_mail
+from accounts.jwt import TOKEN_USER_AUTHENTICATION
+from accounts.roles import is_admin, is_teacher_or_admin
+from ib_project.db_router import use_primary
+from ib_project.images import responsive_image
+from .catalog_cache import ConditionalCatalogMixin, bump_catalog_version
 from .serializers import CurriculumSerializer, TopicSerializer, QuestionSerializer, ExamSerializer, AttemptSerializer, ResponseSerializer
 
 
@@ -92,34 +101,14 @@ def _compute_attempt_rank(attempt: Attempt) -> int | None:
 
 class IsAdminOrTeacher(permissions.BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        if not (u and u.is_authenticated):
-            return False
-        role = getattr(u, 'role', None)
-        # Back-compat: allow staff/admins and legacy "Teachers" group.
-        return bool(
-            u.is_staff
-            or role in ('ADMIN', 'TEACHER')
-            or u.groups.filter(name__iexact='Teachers').exists()
-        )
+        return is_teacher_or_admin(request.user)
 
 
 class IsAdminOnly(permissions.BasePermission):
     def has_permission(self, request, view):
-        u = request.user
-        if not (u and u.is_authenticated):
-            return False
-        role = getattr(u, 'role', None)
-        return bool(u.is_staff or role == 'ADMIN')
-
-
-def _is_teacher_or_admin(user):
-    if not (user and user.is_authenticated):
-        return False
-    role = getattr(user, 'role', None)
-    return bool(user.is_staff or role in ('ADMIN', 'TEACHER') or user.groups.filter(name__iexact='Teachers').exists())
+        return is_admin(request.user)
 
-class TopicViewSet(viewsets.ModelViewSet):
+class TopicViewSet(ConditionalCatalogMixin, viewsets.ModelViewSet):
     queryset = Topic.objects.filter(is_active=True).filter(Q(curriculum__isnull=True) | Q(curriculum__is_active=True))
     serializer_class = TopicSerializer
 
@@ -141,6 +130,42 @@ class TopicViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [IsAdminOrTeacher()]
 
+    def get_object(self):
+        if self.action == 'restore':
+            # Archived topics are outside the default queryset.
+            return get_object_or_404(Topic.objects.all(), pk=self.kwargs.get('pk'))
+        return super().get_object()
+
+    @staticmethod
+    def _tree_rows(qs):
+        return list(qs.values('id', 'name', 'parent_id', 'curriculum_id', 'depth', 'is_active'))
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        """Every active topic below this one (flat, depth-first by path)."""
+        topic = self.get_object()
+        qs = subtree(topic).exclude(pk=topic.pk).filter(is_active=True).order_by('path')
+        return DRFResponse({'id': topic.id, 'descendants': self._tree_rows(qs)})
+
+    @action(detail=True, methods=['get'])
+    def ancestors(self, request, pk=None):
+        """Breadcrumb from the root down to this topic's parent."""
+        topic = self.get_object()
+        return DRFResponse({'id': topic.id, 'ancestors': self._tree_rows(topic_ancestors(topic))})
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """Restore an archived topic together with its subtree (one UPDATE)."""
+        topic = self.get_object()
+        if Topic.objects.filter(pk__in=topic.ancestor_ids(), is_active=False).exists():
+            return DRFResponse(
+                {'detail': 'A parent topic is archived. Restore it first.', 'restored': False, 'id': topic.id},
+                status=status.HTTP_409_CONFLICT,
+            )
+        restored = subtree(topic).filter(is_active=False).update(is_active=True)
+        bump_catalog_version()
+        return DRFResponse({'detail': 'Topic restored successfully.', 'restored': True, 'id': topic.id, 'topics': restored})
+
     def perform_create(self, serializer):
         # Enforce the requested rule: Topics must belong to a Curriculum.
         curriculum = serializer.validated_data.get('curriculum')
@@ -157,17 +182,8 @@ class TopicViewSet(viewsets.ModelViewSet):
         except ProtectedError:
             # Production-safe behavior: if topic is referenced (questions/exams),
             # archive the topic (and its subtree) instead of failing.
-            to_archive = [instance.id]
-            idx = 0
-            while idx < len(to_archive):
-                parent_id = to_archive[idx]
-                child_ids = list(
-                    Topic.objects.filter(parent_id=parent_id, is_active=True).values_list('id', flat=True)
-                )
-                to_archive.extend([cid for cid in child_ids if cid not in to_archive])
-                idx += 1
-
-            Topic.objects.filter(id__in=to_archive).update(is_active=False)
+            subtree(instance).filter(is_active=True).update(is_active=False)
+            bump_catalog_version()
             return DRFResponse(
                 {
                     'detail': (
@@ -182,6 +198,14 @@ class TopicViewSet(viewsets.ModelViewSet):
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.filter(is_active=True)
     serializer_class = QuestionSerializer
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        topic_id = self.request.query_params.get('topic')
+        if topic_id:
+            qs = qs.filter(topic_q('topic', topic_id, wants_descendants(self.request)))
+        return qs
+
     def get_permissions(self):
         if self.request.method in ('GET','HEAD','OPTIONS'):
             return [permissions.IsAuthenticated()]
@@ -208,7 +232,7 @@ class QuestionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK,
             )
 
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(ConditionalCatalogMixin, viewsets.ModelViewSet):
     queryset = Exam.objects.filter(is_active=True)
     serializer_class = ExamSerializer
 
@@ -218,7 +242,7 @@ class ExamViewSet(viewsets.ModelViewSet):
 
         topic_id = qp.get('topic')
         if topic_id:
-            qs = qs.filter(topic_id=topic_id)
+            qs = qs.filter(topic_q('topic', topic_id, wants_descendants(self.request)))
 
         curriculum_id = qp.get('curriculum')
         if curriculum_id:
@@ -316,7 +340,7 @@ class ExamViewSet(viewsets.ModelViewSet):
         return DRFResponse(ser.data, status=status.HTTP_201_CREATED)
 
 
-class CurriculumViewSet(viewsets.ModelViewSet):
+class CurriculumViewSet(ConditionalCatalogMixin, viewsets.ModelViewSet):
     queryset = Curriculum.objects.all()
     serializer_class = CurriculumSerializer
 
@@ -332,25 +356,13 @@ class CurriculumViewSet(viewsets.ModelViewSet):
             'true',
             'yes',
         )
-        user = getattr(self.request, 'user', None)
-        is_admin = bool(
-            user
-            and user.is_authenticated
-            and (getattr(user, 'is_staff', False) or getattr(user, 'role', None) == 'ADMIN')
-        )
-        if is_admin and include_archived:
+        if is_admin(self.request.user) and include_archived:
             return qs
         return qs.filter(is_active=True)
 
     def get_object(self):
         """Allow admins to access archived curriculums for restore/purge actions."""
-        user = getattr(self.request, 'user', None)
-        is_admin = bool(
-            user
-            and user.is_authenticated
-            and (getattr(user, 'is_staff', False) or getattr(user, 'role', None) == 'ADMIN')
-        )
-        base_qs = Curriculum.objects.all() if is_admin else self.get_queryset()
+        base_qs = Curriculum.objects.all() if is_admin(self.request.user) else self.get_queryset()
         return get_object_or_404(base_qs, pk=self.kwargs.get('pk'))
 
     def get_permissions(self):
@@ -358,13 +370,27 @@ class CurriculumViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [IsAdminOnly()]
 
+    def catalog_cache_is_public(self):
+        # Admins may see archived curriculums, so their responses must not be shared.
+        return not is_admin(self.request.user)
+
     @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
     def tree(self, request, pk=None):
         """Return folder-like navigation: top-level topics for this curriculum, with nested children."""
         curriculum = self.get_object()
         roots = Topic.objects.filter(is_active=True, curriculum=curriculum, parent__isnull=True).select_related('curriculum')
-        data = TopicSerializer(roots, many=True).data
-        return DRFResponse({'curriculum': CurriculumSerializer(curriculum).data, 'roots': data})
+
+        def render():
+            data = TopicSerializer(roots, many=True).data
+            return DRFResponse({'curriculum': CurriculumSerializer(curriculum).data, 'roots': data})
+
+        return self.conditional_response(
+            request,
+            Topic.objects.filter(curriculum=curriculum),
+            render,
+            curriculum.updated_at.isoformat(),
+            curriculum.is_active,
+        )
 
     @action(detail=True, methods=['post'])
     def restore(self, request, pk=None):
@@ -415,8 +441,11 @@ class CurriculumViewSet(viewsets.ModelViewSet):
 
         Default behavior is safe: if the curriculum is referenced, return 409.
         Use ?force=1 to delete ALL content under this curriculum (topics/questions/exams/attempts).
+        Small curriculums are purged within the request; larger ones return 202 with a
+        background job to poll at /api/jobs/<id>/ (see exams.purge).
 
-        Note: force deletion is refused if questions under this curriculum are used outside it.
+        Note: force deletion is refused if questions under this curriculum are used outside it
+        (unless keep_shared=1), or if learning materials still reference it.
         """
         instance = self.get_object()
         force = (request.query_params.get('force') or '').strip().lower() in ('1', 'true', 'yes')
@@ -449,81 +478,84 @@ class CurriculumViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_409_CONFLICT,
                 )
 
-        with transaction.atomic():
-            topic_ids = list(Topic.objects.filter(curriculum=instance).values_list('id', flat=True))
-            question_ids = list(Question.objects.filter(topic_id__in=topic_ids).values_list('id', flat=True))
-
-            outside_exam_qids = list(
-                ExamQuestion.objects.filter(question_id__in=question_ids)
-                .exclude(exam__topic__curriculum=instance)
-                .values_list('question_id', flat=True)
-                .distinct()
+        blockers = purge_blockers(instance)
+        shared_question_ids = blockers['shared_question_ids']
+        if shared_question_ids and not keep_shared:
+            return DRFResponse(
+                {
+                    'detail': (
+                        'Cannot force-delete this curriculum because one or more of its questions are '
+                        'used in exams/attempts outside this curriculum. Unlink them first, or call purge '
+                        'with keep_shared=1 to keep those questions and delete the curriculum.'
+                    ),
+                    'deleted': False,
+                    'forced': True,
+                    'keep_shared': False,
+                    'shared_questions': len(shared_question_ids),
+                    'id': instance.id,
+                },
+                status=status.HTTP_409_CONFLICT,
             )
-            outside_resp_qids = list(
-                Response.objects.filter(question_id__in=question_ids)
-                .exclude(attempt__exam__topic__curriculum=instance)
-                .values_list('question_id', flat=True)
-                .distinct()
+        if blockers['materials'] or blockers['foreign_topics']:
+            return DRFResponse(
+                {
+                    'detail': (
+                        'Cannot force-delete this curriculum because learning materials or topics of other '
+                        'curriculums still reference it. Retag or delete them first.'
+                    ),
+                    'deleted': False,
+                    'forced': True,
+                    'materials': blockers['materials'],
+                    'foreign_topics': blockers['foreign_topics'],
+                    'id': instance.id,
+                },
+                status=status.HTTP_409_CONFLICT,
             )
-            shared_question_ids = sorted(set(outside_exam_qids) | set(outside_resp_qids))
-            used_outside = len(shared_question_ids) > 0
-
-            moved_shared = 0
-            if used_outside and keep_shared:
-                shared_curriculum, _ = Curriculum.objects.get_or_create(
-                    name='__Shared Question Pool__',
-                    defaults={'description': 'System: Holds questions shared across curriculums.', 'order': 9999, 'is_active': True},
-                )
-                shared_topic, _ = Topic.objects.get_or_create(
-                    curriculum=shared_curriculum,
-                    parent=None,
-                    name='Shared Questions',
-                    defaults={'description': 'System: Questions moved here to preserve history.', 'icon': '🗂️', 'order': 0, 'is_active': True},
-                )
-                moved_shared = Question.objects.filter(id__in=shared_question_ids).update(topic=shared_topic)
-                question_ids = [qid for qid in question_ids if qid not in set(shared_question_ids)]
 
-            if used_outside and not keep_shared:
-                return DRFResponse(
-                    {
-                        'detail': (
-                            'Cannot force-delete this curriculum because one or more of its questions are '
-                            'used in exams/attempts outside this curriculum. Unlink them first, or call purge '
-                            'with keep_shared=1 to keep those questions and delete the curriculum.'
-                        ),
-                        'deleted': False,
-                        'forced': True,
-                        'keep_shared': False,
-                        'shared_questions': len(shared_question_ids),
-                        'id': instance.id,
-                    },
-                    status=status.HTTP_409_CONFLICT,
-                )
-
-            exam_ids = list(Exam.objects.filter(topic_id__in=topic_ids).values_list('id', flat=True))
-
-            attempts_deleted = Attempt.objects.filter(exam_id__in=exam_ids).delete()[0]
-            exams_deleted = Exam.objects.filter(id__in=exam_ids).delete()[0]
-            questions_deleted = Question.objects.filter(id__in=question_ids).delete()[0]
-            topics_deleted = Topic.objects.filter(id__in=topic_ids).delete()[0]
-            curriculum_id = instance.id
-            instance.delete()
+        # The purge itself runs as a chunked background job; archive the curriculum now so
+        # it drops out of listings while the job works through its content.
+        with transaction.atomic():
+            moved_shared = move_to_shared_pool(shared_question_ids) if shared_question_ids else 0
+            if instance.is_active:
+                instance.is_active = False
+                instance.save(update_fields=['is_active'])
+            totals = purge_totals(instance.id)
+            job = enqueue(
+                'exams.purge_curriculum',
+                {'curriculum': instance.id, 'keep_shared': keep_shared, 'moved_shared': moved_shared},
+                user=request.user,
+                total=sum(totals.values()),
+            )
+        if sum(totals.values()) <= getattr(settings, 'CURRICULUM_PURGE_INLINE_LIMIT', 2000):
+            run_job(job.pk)
+        job.refresh_from_db()
 
+        if job.status == 'succeeded':
+            return DRFResponse(
+                {
+                    'detail': 'Curriculum permanently deleted (forced).',
+                    'deleted': True,
+                    'forced': True,
+                    'id': instance.id,
+                    'counts': job.result['counts'],
+                    'job': job_payload(job),
+                },
+                status=status.HTTP_200_OK,
+            )
+        if job.status == 'failed':
+            return DRFResponse(
+                {'detail': job.error, 'deleted': False, 'forced': True, 'id': instance.id, 'job': job_payload(job)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
         return DRFResponse(
             {
-                'detail': 'Curriculum permanently deleted (forced).',
-                'deleted': True,
+                'detail': 'Curriculum purge started.',
+                'deleted': False,
                 'forced': True,
-                'id': curriculum_id,
-                'counts': {
-                    'attempts': attempts_deleted,
-                    'exams': exams_deleted,
-                    'questions': questions_deleted,
-                    'topics': topics_deleted,
-                    'questions_moved_to_shared_pool': moved_shared,
-                },
+                'id': instance.id,
+                'job': job_payload(job),
             },
-            status=status.HTTP_200_OK,
+            status=status.HTTP_202_ACCEPTED,
         )
 
 class AttemptViewSet(viewsets.ModelViewSet):
@@ -532,11 +564,12 @@ class AttemptViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related('user', 'exam', 'exam__topic', 'exam__topic__curriculum')
+        # Pre-provisioned attempts stay invisible until the student starts them.
+        qs = super().get_queryset().exclude(status='scheduled').select_related('user', 'exam', 'exam__topic', 'exam__topic__curriculum')
         qp = self.request.query_params
 
         # Non-admin/teacher can only see their attempts.
-        if not _is_teacher_or_admin(self.request.user):
+        if not is_teacher_or_admin(self.request.user):
             qs = qs.filter(user=self.request.user)
 
         topic_id = qp.get('topic')
@@ -587,187 +620,235 @@ class ResponseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('attempt', 'question', 'attempt__user')
-        if _is_teacher_or_admin(self.request.user):
+        if is_teacher_or_admin(self.request.user):
             return qs
         return qs.filter(attempt__user=self.request.user)
 
+# Columns start_exam needs to render a question; keeps the fetch narrow.
+_START_QUESTION_FIELDS = ('id', 'type', 'statement', 'choices', 'estimated_time', 'marks', 'image', 'image_variants')
+
+
+def _normalize_question_order(raw) -> list[int]:
+    if not isinstance(raw, list):
+        return []
+    normalized: list[int] = []
+    seen: set[int] = set()
+    for item in raw:
+        try:
+            qid = int(item)
+        except Exception:
+            continue
+        if qid in seen:
+            continue
+        seen.add(qid)
+        normalized.append(qid)
+    return normalized
+
+
+def _pick_questions_for_exam(exam) -> list:
+    """The exam's questions in attempt order (one query)."""
+    questions = list(
+        Question.objects.filter(examquestion__exam=exam)
+        .order_by('examquestion__order')
+        .only(*_START_QUESTION_FIELDS)
+    )
+    if not questions:
+        questions = list(Question.objects.filter(topic_id=exam.topic_id, is_active=True).only(*_START_QUESTION_FIELDS))
+    if exam.shuffle_questions:
+        random.shuffle(questions)
+    return questions
+
+
+def _exam_snapshot(exam) -> dict:
+    # Snapshot of "what the student is attempting" for professional display
+    # and for historical records (even if topics/curriculums get archived later).
+    return {
+        'exam_id': exam.id,
+        'exam_title': exam.title,
+        'level': exam.level,
+        'paper_number': exam.paper_number,
+        'topic_id': getattr(exam.topic, 'id', None),
+        'topic_name': getattr(exam.topic, 'name', None),
+        'curriculum_id': getattr(getattr(exam.topic, 'curriculum', None), 'id', None),
+        'curriculum_name': getattr(getattr(exam.topic, 'curriculum', None), 'name', None),
+    }
+
+
+def _load_start_assignment(user, assignment_id):
+    """The caller's assignment, with `sequence_blocked` taken from the precomputed feed."""
+    from learning.feed import sequence_blocked
+    from learning.models import LearningAssignment
+
+    try:
+        assignment_id = int(assignment_id)
+    except (TypeError, ValueError):
+        return None
+    assignment = LearningAssignment.objects.filter(id=assignment_id, assigned_to=user).first()
+    if assignment is not None:
+        assignment.sequence_blocked = sequence_blocked(user.id, assignment.id)
+    return assignment
+
+
+def _assignment_gate(assignment, exam, now):
+    """Error response when `assignment` may not be started on `exam` right now, else None."""
+    if assignment.assignment_type != 'MOCK_TEST' or not assignment.exam_id:
+        return DRFResponse({'detail': 'Assignment is not a mock test'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if int(assignment.exam_id) != int(exam.id):
+        return DRFResponse({'detail': 'Assignment does not match this exam'}, status=status.HTTP_409_CONFLICT)
+
+    # Enforce lock rules at API level (time window + basic sequence).
+    if not assignment.unlock_override:
+        if assignment.end_at and now > assignment.end_at:
+            return DRFResponse({'detail': 'Assignment expired'}, status=status.HTTP_410_GONE)
+        if assignment.start_at and now < assignment.start_at:
+            return DRFResponse({'detail': 'Assignment is locked (not started yet)'}, status=status.HTTP_423_LOCKED)
+        if assignment.sequence_blocked:
+            return DRFResponse({'detail': 'Assignment is locked by sequence'}, status=status.HTTP_423_LOCKED)
+    return None
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def start_exam(request, exam_id):
+    """Start (or resume) the caller's attempt on an exam.
+
+    A fresh start costs one INSERT that already carries the question order and exam
+    snapshot, and a pre-provisioned ("scheduled") attempt is started with one UPDATE.
+    Gating is one attempts query, plus one assignment query when an assignment is
+    involved. No row locks are taken.
+    """
     exam = get_object_or_404(Exam.objects.select_related('topic__curriculum'), pk=exam_id, is_active=True)
     now = timezone.now()
 
     assignment_id = request.data.get('assignment_id') or request.query_params.get('assignment_id')
     assignment = None
     if assignment_id:
-        try:
-            from learning.models import LearningAssignment
-
-            assignment = (
-                LearningAssignment.objects.select_related('assigned_to')
-                .filter(id=int(assignment_id), assigned_to=request.user)
-                .first()
-            )
-        except Exception:
-            assignment = None
+        assignment = _load_start_assignment(request.user, assignment_id)
 
         if not assignment:
             return DRFResponse({'detail': 'Assignment not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if assignment.assignment_type != 'MOCK_TEST' or not assignment.exam_id:
-            return DRFResponse({'detail': 'Assignment is not a mock test'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if int(assignment.exam_id) != int(exam.id):
-            return DRFResponse({'detail': 'Assignment does not match this exam'}, status=status.HTTP_409_CONFLICT)
+        blocked = _assignment_gate(assignment, exam, now)
+        if blocked is not None:
+            return blocked
 
-        # Enforce lock rules at API level (time window + basic sequence).
-        if not assignment.unlock_override:
-            if assignment.end_at and now > assignment.end_at:
-                return DRFResponse({'detail': 'Assignment expired'}, status=status.HTTP_410_GONE)
-            if assignment.start_at and now < assignment.start_at:
-                return DRFResponse({'detail': 'Assignment is locked (not started yet)'}, status=status.HTTP_423_LOCKED)
-
-            # Sequence lock: earlier incomplete teacher-mandatory assignments block later ones.
-            try:
-                from learning.models import LearningAssignment as LA
-
-                blocked = (
-                    LA.objects.filter(
-                        assigned_to=request.user,
-                        priority=LA.PRIORITY_MANDATORY,
-                        completed_at__isnull=True,
-                        sequence_order__lt=assignment.sequence_order,
-                    )
-                    .exclude(assigned_by_role='ADMIN')
-                    .exists()
-                )
-            except Exception:
-                blocked = False
-
-            if blocked:
-                return DRFResponse({'detail': 'Assignment is locked by sequence'}, status=status.HTTP_423_LOCKED)
-
-    # Enforce: one exam can only be attempted once per student.
-    # If already submitted/timedout, do not allow a new attempt.
-    completed = (
-        Attempt.objects.filter(user=request.user, exam=exam, status__in=['submitted', 'timedout'])
-        .order_by('-finished_at', '-started_at')
-        .first()
+    # One query answers both gates: a completed attempt (one exam can only be attempted
+    # once per student) and an open (in-progress or pre-provisioned) attempt to resume.
+    existing = list(
+        Attempt.objects.filter(user=request.user, exam=exam, status__in=['inprogress', 'scheduled', 'submitted', 'timedout'])
+        .only('id', 'status', 'started_at', 'finished_at', 'updated_at', 'assignment_id', 'metadata')
     )
+    completed = [a for a in existing if a.status in ('submitted', 'timedout')]
     if completed:
+        latest = max(completed, key=lambda a: (a.finished_at or a.started_at, a.started_at))
         return DRFResponse(
             {
                 'detail': 'This exam has already been attempted and submitted.',
-                'attempt_id': completed.id,
-                'status': completed.status,
+                'attempt_id': latest.id,
+                'status': latest.status,
             },
             status=status.HTTP_409_CONFLICT,
         )
 
-    def _pick_question_ids_for_exam() -> list[int]:
-        eqs = list(ExamQuestion.objects.filter(exam=exam).select_related('question').order_by('order'))
-        if eqs:
-            ids = [int(eq.question_id) for eq in eqs]
+    # The exams_attempt_one_open constraint guarantees at most one open attempt per
+    # user+exam, so starting is insert-or-fetch with no row locks.
+    attempt = next((a for a in existing if a.status in ('inprogress', 'scheduled')), None)
+    question_objs = None
+    if attempt is not None and attempt.assignment_id:
+        if assignment is None and attempt.status == 'scheduled':
+            # Started from the catalog: the provisioned attempt's assignment window still applies.
+            assignment = _load_start_assignment(request.user, attempt.assignment_id)
+            blocked = _assignment_gate(assignment, exam, now) if assignment else None
+            if blocked is not None:
+                return blocked
+        if assignment is not None and int(attempt.assignment_id) != int(assignment.id):
+            return DRFResponse({'detail': 'Attempt already linked to a different assignment'}, status=status.HTTP_409_CONFLICT)
+    if attempt is not None and attempt.status == 'scheduled':
+        # Pre-provisioned by preprovision_attempts: one UPDATE starts the clock.
+        changes = {'status': 'inprogress', 'started_at': now, 'updated_at': now}
+        if assignment is not None and not attempt.assignment_id:
+            changes['assignment'] = assignment
+        if Attempt.objects.filter(pk=attempt.pk, status='scheduled').update(**changes):
+            for field, value in changes.items():
+                setattr(attempt, field, value)
+            # .update() sends no post_save; the dashboard counts this attempt as in progress now.
+            from dashboard.student_stats import invalidate_student_summaries
+
+            invalidate_student_summaries([request.user.id])
         else:
-            ids = list(Question.objects.filter(topic=exam.topic, is_active=True).values_list('id', flat=True))
-            ids = [int(x) for x in ids]
-        if exam.shuffle_questions:
-            random.shuffle(ids)
-        return ids
+            # A concurrent start flipped it first.
+            attempt.refresh_from_db(fields=['status', 'started_at', 'updated_at', 'assignment', 'metadata'])
+    if attempt is None:
+        question_objs = _pick_questions_for_exam(exam)
+        question_order = [q.id for q in question_objs]
+        try:
+            with transaction.atomic():
+                attempt = Attempt.objects.create(
+                    user=request.user,
+                    exam=exam,
+                    started_at=now,
+                    assignment=assignment,
+                    metadata={'question_order': question_order, 'exam_snapshot': _exam_snapshot(exam)},
+                )
+        except IntegrityError:
+            # A concurrent start (double click, refresh storm) won the insert: resume it.
+            attempt = (
+                Attempt.objects.filter(user=request.user, exam=exam, status='inprogress')
+                .only('id', 'status', 'started_at', 'updated_at', 'assignment_id', 'metadata')
+                .first()
+            )
+            if attempt is None:
+                return DRFResponse({'detail': 'Attempt state changed; please retry.'}, status=status.HTTP_409_CONFLICT)
+            question_objs = None
 
-    with transaction.atomic():
-        # If there's an active attempt, resume it instead of creating a new one.
-        # IMPORTANT: if older buggy behavior created multiple in-progress attempts,
-        # always resume the earliest start time so refresh cannot "reset" the timer.
-        inprogress = list(
-            Attempt.objects.select_for_update()
-            .filter(user=request.user, exam=exam, status='inprogress')
-            .order_by('started_at')
-        )
+    if question_objs is None:
+        # Resuming an existing attempt.
+        if assignment is not None and attempt.assignment_id and int(attempt.assignment_id) != int(assignment.id):
+            return DRFResponse({'detail': 'Attempt already linked to a different assignment'}, status=status.HTTP_409_CONFLICT)
 
-        if inprogress:
-            attempt = inprogress[0]
-            # Close out any newer duplicates created previously (defensive cleanup).
-            for dup in inprogress[1:]:
-                dup.status = 'timedout'
-                dup.finished_at = now
-                dup.duration_seconds = int(max(0, (now - dup.started_at).total_seconds()))
-                dup.save(update_fields=['status', 'finished_at', 'duration_seconds'])
-        else:
-            attempt = Attempt.objects.create(user=request.user, exam=exam, started_at=now)
+        meta = attempt.metadata if isinstance(attempt.metadata, dict) else {}
+        question_order = _normalize_question_order(meta.get('question_order'))
+        if not question_order or 'exam_snapshot' not in meta:
+            # Legacy attempt without stored order/snapshot. Compare-and-set on updated_at
+            # so concurrent resumes agree on a single shuffle without locking the row.
+            if not question_order:
+                question_objs = _pick_questions_for_exam(exam)
+                question_order = [q.id for q in question_objs]
+                meta['question_order'] = question_order
+            meta.setdefault('exam_snapshot', _exam_snapshot(exam))
+            stored = Attempt.objects.filter(pk=attempt.pk, updated_at=attempt.updated_at).update(
+                metadata=meta, updated_at=timezone.now()
+            )
+            if not stored:
+                attempt.refresh_from_db(fields=['metadata'])
+                question_order = _normalize_question_order((attempt.metadata or {}).get('question_order'))
+                question_objs = None
 
-        if assignment is not None:
+        if assignment is not None and not attempt.assignment_id:
             # Attach attempt to assignment for progress tracking.
-            if attempt.assignment_id and int(attempt.assignment_id) != int(assignment.id):
-                return DRFResponse({'detail': 'Attempt already linked to a different assignment'}, status=status.HTTP_409_CONFLICT)
-            if not attempt.assignment_id:
-                attempt.assignment = assignment
-                attempt.save(update_fields=['assignment'])
-
-        expires_at_dt = attempt.started_at + timedelta(seconds=exam.duration_seconds)
-        expires_at = expires_at_dt.isoformat()
-
-        # If time has already elapsed, mark timed out and return (do not restart timer).
-        if now >= expires_at_dt:
-            if attempt.status == 'inprogress':
-                attempt.status = 'timedout'
-                attempt.finished_at = expires_at_dt
-                attempt.duration_seconds = int(exam.duration_seconds)
-                attempt.save(update_fields=['status', 'finished_at', 'duration_seconds'])
-            return DRFResponse(
-                {'attempt_id': attempt.id, 'expires_at': expires_at, 'detail': 'Attempt timed out.'},
-                status=status.HTTP_410_GONE,
-            )
+            Attempt.objects.filter(pk=attempt.pk, assignment__isnull=True).update(assignment=assignment)
+            attempt.assignment = assignment
 
-        meta = attempt.metadata if isinstance(attempt.metadata, dict) else {}
-        raw_question_order = meta.get('question_order')
-
-        def _normalize_question_order(raw) -> list[int]:
-            if not isinstance(raw, list):
-                return []
-            normalized: list[int] = []
-            seen: set[int] = set()
-            for item in raw:
-                try:
-                    qid = int(item)
-                except Exception:
-                    continue
-                if qid in seen:
-                    continue
-                seen.add(qid)
-                normalized.append(qid)
-            return normalized
-
-        question_order = _normalize_question_order(raw_question_order)
-        if not question_order:
-            question_order = _pick_question_ids_for_exam()
-            meta['question_order'] = question_order
-            attempt.metadata = meta
-            attempt.save(update_fields=['metadata'])
-
-        # Store a snapshot of "what the student is attempting" for professional display
-        # and for historical records (even if topics/curriculums get archived later).
-        try:
-            snapshot = {
-                'exam_id': exam.id,
-                'exam_title': exam.title,
-                'level': exam.level,
-                'paper_number': exam.paper_number,
-                'topic_id': getattr(exam.topic, 'id', None),
-                'topic_name': getattr(exam.topic, 'name', None),
-                'curriculum_id': getattr(getattr(exam.topic, 'curriculum', None), 'id', None),
-                'curriculum_name': getattr(getattr(exam.topic, 'curriculum', None), 'name', None),
-            }
-            meta = attempt.metadata if isinstance(attempt.metadata, dict) else {}
-            meta['exam_snapshot'] = snapshot
-            attempt.metadata = meta
-            attempt.save(update_fields=['metadata'])
-        except Exception:
-            pass
+    expires_at_dt = attempt.started_at + timedelta(seconds=exam.duration_seconds)
+    expires_at = expires_at_dt.isoformat()
+
+    # If time has already elapsed, mark timed out and return (do not restart timer).
+    if now >= expires_at_dt:
+        if attempt.status == 'inprogress':
+            attempt.status = 'timedout'
+            attempt.finished_at = expires_at_dt
+            attempt.duration_seconds = int(exam.duration_seconds)
+            attempt.save(update_fields=['status', 'finished_at', 'duration_seconds'])
+        return DRFResponse(
+            {'attempt_id': attempt.id, 'expires_at': expires_at, 'detail': 'Attempt timed out.'},
+            status=status.HTTP_410_GONE,
+        )
 
     # Build questions list in the stored order.
-    qs = Question.objects.filter(id__in=question_order)
-    by_id = {q.id: q for q in qs}
+    if question_objs is None:
+        question_objs = Question.objects.filter(id__in=question_order).only(*_START_QUESTION_FIELDS)
+    by_id = {q.id: q for q in question_objs}
 
     def map_type(t):
         return {'MCQ': 'mcq', 'MULTI': 'multi', 'FIB': 'fib', 'STRUCT': 'structured'}.get(t, 'mcq')
@@ -781,7 +862,8 @@ def start_exam(request, exam_id):
         choices = q.choices if isinstance(q.choices, dict) else {}
         if not choices and q.type == 'MCQ':
             choices = {'A': 'Option A', 'B': 'Option B', 'C': 'Option C', 'D': 'Option D'}
-        
+        image_set = responsive_image(q.image, q.image_variants, request) if q.image else None
+
         questions.append({
             'id': q.id,
             'type': map_type(q.type),
@@ -789,8 +871,10 @@ def start_exam(request, exam_id):
             'choices': choices,
             'time_est': q.estimated_time,
             'marks': q.marks,
-            # Frontend runs on a different origin (e.g. :3000), so return an absolute URL.
-            'image': request.build_absolute_uri(q.image.url) if q.image else None,
+            # Frontend runs on a different origin (e.g. :3000), so return absolute URLs.
+            # 'image' is the largest resized derivative; 'image_set' carries srcset variants.
+            'image': image_set['src'] if image_set else None,
+            'image_set': image_set,
         })
 
     return DRFResponse(
@@ -819,7 +903,7 @@ def start_exam(request, exam_id):
 @permission_classes([permissions.IsAuthenticated])
 def submit_exam(request, exam_id):
     attempt_id = request.data.get('attempt_id')
-    attempt = get_object_or_404(Attempt, pk=attempt_id, user=request.user, exam_id=exam_id)
+    attempt = get_object_or_404(Attempt.objects.exclude(status='scheduled'), pk=attempt_id, user=request.user, exam_id=exam_id)
     responses = request.data.get('responses', [])  # [{question_id, answer_payload, time_spent_seconds}]
 
     now = timezone.now()
@@ -973,7 +1057,7 @@ def finalize_attempt_grading(request, attempt_id):
 
     After finalization, grades become read-only.
     """
-    if not _is_teacher_or_admin(request.user):
+    if not is_teacher_or_admin(request.user):
         return DRFResponse({'detail': 'Only teachers/admins can finalize grading.'}, status=status.HTTP_403_FORBIDDEN)
 
     attempt = get_object_or_404(Attempt, pk=attempt_id)
@@ -1013,9 +1097,10 @@ def finalize_attempt_grading(request, attempt_id):
     return DRFResponse({'detail': 'Grades finalized.', 'attempt_id': attempt.id, 'rank': attempt.rank}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
+@authentication_classes(TOKEN_USER_AUTHENTICATION)
 @permission_classes([permissions.IsAuthenticated])
 def resume_attempt(request, attempt_id):
-    attempt = get_object_or_404(Attempt, pk=attempt_id, user=request.user)
+    attempt = get_object_or_404(Attempt.objects.exclude(status='scheduled'), pk=attempt_id, user_id=request.user.id)
     answers = {}
     times = {}
     flagged = attempt.metadata.get('flagged', {}) if isinstance(attempt.metadata, dict) else {}
@@ -1027,7 +1112,7 @@ def resume_attempt(request, attempt_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def save_attempt(request, attempt_id):
-    attempt = get_object_or_404(Attempt, pk=attempt_id, user=request.user)
+    attempt = get_object_or_404(Attempt.objects.exclude(status='scheduled'), pk=attempt_id, user=request.user)
     expires_at_dt = _attempt_expires_at(attempt)
     if expires_at_dt and timezone.now() >= expires_at_dt:
         _mark_attempt_timedout(attempt, expires_at_dt)
@@ -1140,6 +1225,7 @@ def bulk_create_questions(request):
 
 
 @api_view(['GET'])
+@authentication_classes(TOKEN_USER_AUTHENTICATION)
 @permission_classes([permissions.IsAuthenticated])
 def my_attempts(request):
     needs_grading_sq = Response.objects.filter(
@@ -1153,7 +1239,8 @@ def my_attempts(request):
     )
 
     qs = (
-        Attempt.objects.filter(user=request.user)
+        Attempt.objects.filter(user_id=request.user.id)
+        .exclude(status='scheduled')
         .select_related('exam', 'exam__topic', 'exam__topic__curriculum')
         .annotate(
             needs_grading=Exists(needs_grading_sq),
@@ -1193,11 +1280,11 @@ def my_attempts(request):
 @permission_classes([permissions.IsAuthenticated])
 def analytics_exams_summary(request):
     """Teacher/Admin: summary of attempts by exam (how many attempts, who attempted, last attempted, avg score)."""
-    if not _is_teacher_or_admin(request.user):
+    if not is_teacher_or_admin(request.user):
         return DRFResponse({'detail': 'Only teachers/admins can view exam analytics.'}, status=status.HTTP_403_FORBIDDEN)
 
     exam_id = request.query_params.get('exam_id')
-    qs = Attempt.objects.select_related('exam')
+    qs = Attempt.objects.exclude(status='scheduled').select_related('exam')
     if exam_id:
         qs = qs.filter(exam_id=exam_id)
 
@@ -1237,7 +1324,7 @@ def analytics_exams_summary(request):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def review_attempt(request, attempt_id):
-    if _is_teacher_or_admin(request.user):
+    if is_teacher_or_admin(request.user):
         attempt = get_object_or_404(Attempt, pk=attempt_id)
     else:
         attempt = get_object_or_404(Attempt, pk=attempt_id, user=request.user)
@@ -1378,6 +1465,7 @@ def analytics_user_topics(request, user_id=None):
 
 
 @api_view(['GET'])
+@authentication_classes(TOKEN_USER_AUTHENTICATION)
 @permission_classes([permissions.AllowAny])
 def leaderboard(request):
     from datetime import timedelta
@@ -1469,7 +1557,7 @@ def upload_attempt_submission(request, attempt_id):
     """Student (or teacher/admin) uploads submission files for an attempt."""
     attempt = get_object_or_404(Attempt, pk=attempt_id)
 
-    is_privileged = _is_teacher_or_admin(request.user)
+    is_privileged = is_teacher_or_admin(request.user)
     if not is_privileged and attempt.user_id != request.user.id:
         return DRFResponse({'detail': 'Not allowed.'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -1489,43 +1577,63 @@ def upload_attempt_submission(request, attempt_id):
         return DRFResponse({'detail': 'No files uploaded. Use multipart field "files".'}, status=status.HTTP_400_BAD_REQUEST)
 
     from django.core.files.storage import default_storage
+
+    saved = []
+    for uploaded in files:
+        saved_path = default_storage.save(_submission_storage_path(attempt, uploaded.name), uploaded)
+        saved.append((uploaded.name, saved_path))
+
+    uploads = _record_student_uploads(attempt.id, saved)
+    return DRFResponse({'status': 'uploaded', 'student_uploads': uploads}, status=status.HTTP_200_OK)
+
+
+def _submission_storage_path(attempt: Attempt, filename: str | None) -> str:
+    """Storage path for a student submission file of an attempt."""
     import os
 
-    meta = attempt.metadata or {}
-    uploads = meta.get('student_uploads', []) or []
+    base, ext = os.path.splitext(filename or '')
+    ext = (ext or '').lower()
+    safe_name = f"{base[:80]}{ext}" if base else f"upload{ext}"
+    return f"answer_uploads/{attempt.user_id}/{attempt.id}/{timezone.now().strftime('%Y%m%d%H%M%S')}_{safe_name}"
 
-    for uploaded in files:
-        base, ext = os.path.splitext(uploaded.name or '')
-        ext = (ext or '').lower()
-        safe_name = f"{base[:80]}{ext}" if base else f"upload{ext}"
-        file_path = f"answer_uploads/{attempt.user_id}/{attempt.id}/{timezone.now().strftime('%Y%m%d%H%M%S')}_{safe_name}"
-        saved_path = default_storage.save(file_path, uploaded)
-        url = None
-        try:
-            url = default_storage.url(saved_path)
-        except Exception:
-            url = None
-        uploads.append(
-            {
-                'name': uploaded.name,
-                'path': saved_path,
-                'url': url,
-                'uploaded_at': timezone.now().isoformat(),
-            }
-        )
 
-    meta['student_uploads'] = uploads
-    attempt.metadata = meta
-    attempt.save(update_fields=['metadata'])
+def _record_student_uploads(attempt_id: int, saved: list[tuple[str, str]]) -> list[dict]:
+    """Append saved (name, path) pairs to the attempt's student_uploads metadata.
 
-    return DRFResponse({'status': 'uploaded', 'student_uploads': uploads}, status=status.HTTP_200_OK)
+    The attempt row is locked so concurrent uploads (e.g. several resumable uploads
+    completing at once) cannot overwrite each other's entries.
+    """
+    from django.core.files.storage import default_storage
+
+    with transaction.atomic():
+        attempt = Attempt.objects.select_for_update().get(pk=attempt_id)
+        meta = attempt.metadata if isinstance(attempt.metadata, dict) else {}
+        uploads = meta.get('student_uploads', []) or []
+        for name, saved_path in saved:
+            url = None
+            try:
+                url = default_storage.url(saved_path)
+            except Exception:
+                url = None
+            uploads.append(
+                {
+                    'name': name,
+                    'path': saved_path,
+                    'url': url,
+                    'uploaded_at': timezone.now().isoformat(),
+                }
+            )
+        meta['student_uploads'] = uploads
+        attempt.metadata = meta
+        attempt.save(update_fields=['metadata'])
+    return uploads
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def grade_response(request, response_id):
     """Teacher grades a structured response"""
-    if not _is_teacher_or_admin(request.user):
+    if not is_teacher_or_admin(request.user):
         return DRFResponse({'detail': 'Only teachers/admins can grade responses.'}, status=status.HTTP_403_FORBIDDEN)
     resp = get_object_or_404(Response, pk=response_id)
 
@@ -1588,7 +1696,7 @@ def grade_response(request, response_id):
 @permission_classes([permissions.IsAuthenticated])
 def upload_evaluated_pdf(request, attempt_id):
     """Upload evaluated PDF for an attempt"""
-    if not _is_teacher_or_admin(request.user):
+    if not is_teacher_or_admin(request.user):
         return DRFResponse({'detail': 'Only teachers/admins can upload evaluated PDFs.'}, status=status.HTTP_403_FORBIDDEN)
     attempt = get_object_or_404(Attempt, pk=attempt_id)
     pdf_file = request.FILES.get('pdf')
@@ -1616,3 +1724,14 @@ def upload_evaluated_pdf(request, attempt_id):
     attempt.save(update_fields=['metadata'])
     
     return DRFResponse({'status': 'uploaded', 'path': saved_path, 'url': url}, status=status.HTTP_200_OK)
+
+
+@use_primary  # progress is written by the job runner; the replica may lag behind it
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def job_status(request, job_id):
+    """Progress of a background job started by the caller (admins can see any)."""
+    job = get_object_or_404(BackgroundJob, pk=job_id)
+    if job.created_by_id != request.user.id and not is_admin(request.user):
+        return DRFResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return DRFResponse(job_payload(job))
@@ -8,6 +8,23 @@ import api from '../../services/api';
 import { toast } from 'react-hot-toast';
 import { useAuth } from '../../contexts/AuthContext';
 
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Large curriculum purges run as a background job (202 + job); poll until it finishes.
+const purgeCurriculum = async (curriculumId, params) => {
+  const res = await api.delete(`curriculums/${curriculumId}/purge/`, { params });
+  let job = res.data?.job;
+  while (job && (job.status === 'queued' || job.status === 'running')) {
+    toast.loading(`Permanently deleting curriculum… ${job.progress.done}/${job.progress.total}`, { id: 'purge-curriculum' });
+    await sleep(1500);
+    job = (await api.get(`jobs/${job.id}/`)).data;
+  }
+  if (job?.status === 'failed') {
+    throw new Error(job.error || 'Failed to permanently delete curriculum');
+  }
+  return job;
+};
+
 const TOPIC_ICON_GROUPS = [
   {
     label: 'Core',
@@ -492,14 +509,14 @@ const TopicManagerNew = () => {
 
     try {
       toast.loading('Permanently deleting curriculum…', { id: 'purge-curriculum' });
-      await api.delete(`curriculums/${selectedCurriculumId}/purge/`, { params: { force: 1 } });
+      await purgeCurriculum(selectedCurriculumId, { force: 1 });
       toast.success('Curriculum permanently deleted', { id: 'purge-curriculum' });
       await fetchCurriculums();
       await fetchTopics();
     } catch (error) {
       console.error('Failed to permanently delete curriculum:', error);
       const data = error.response?.data;
-      const detail = data?.detail || (data ? JSON.stringify(data) : null);
+      const detail = data?.detail || (data ? JSON.stringify(data) : error.message);
 
       const sharedCount = Number(data?.shared_questions || 0);
       if (error.response?.status === 409 && sharedCount > 0) {
@@ -514,7 +531,7 @@ const TopicManagerNew = () => {
         }
         try {
           toast.loading('Deleting curriculum (keeping shared questions)…', { id: 'purge-curriculum' });
-          await api.delete(`curriculums/${selectedCurriculumId}/purge/`, { params: { force: 1, keep_shared: 1 } });
+          await purgeCurriculum(selectedCurriculumId, { force: 1, keep_shared: 1 });
           toast.success('Curriculum permanently deleted', { id: 'purge-curriculum' });
           await fetchCurriculums();
           await fetchTopics();
@@ -522,7 +539,7 @@ const TopicManagerNew = () => {
         } catch (error2) {
           console.error('Failed to delete curriculum with keep_shared:', error2);
           const data2 = error2.response?.data;
-          const detail2 = data2?.detail || (data2 ? JSON.stringify(data2) : null);
+          const detail2 = data2?.detail || (data2 ? JSON.stringify(data2) : error2.message);
           toast.error(detail2 || 'Failed to permanently delete curriculum', { id: 'purge-curriculum' });
           return;
         }
@@ -1,6 +1,7 @@
 import { useEffect, useMemo, useState } from 'react';
 import toast from 'react-hot-toast';
 import api from '../../services/api';
+import { withMediaToken } from '../../utils/media';
 
 const asList = (data) => {
   if (Array.isArray(data)) return data;
@@ -19,6 +20,20 @@ const toIsoOrNull = (dtLocal) => {
   }
 };
 
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Bulk assignment runs as a background job; poll until it finishes.
+const waitForJob = async (job, onProgress) => {
+  let current = job;
+  while (current && (current.status === 'queued' || current.status === 'running')) {
+    onProgress?.(current);
+    await sleep(1500);
+    const res = await api.get(`jobs/${current.id}/`);
+    current = res.data;
+  }
+  return current;
+};
+
 const toLocalInputValue = (iso) => {
   if (!iso) return '';
   try {
@@ -192,11 +207,33 @@ export default function AssignmentsManager() {
     loadAssigned({ includeInactive: showArchived });
   }, [showArchived]);
 
-  // keep group members in sync when selecting a group
+  // keep group members in sync when selecting a group (members are paginated server-side)
   useEffect(() => {
-    const g = (groups || []).find((x) => String(x.id) === String(selectedGroupId));
-    const ids = new Set((g?.student_ids || []).map((id) => Number(id)));
-    setGroupMembers(ids);
+    let cancelled = false;
+    const loadMembers = async () => {
+      if (!selectedGroupId) {
+        setGroupMembers(new Set());
+        return;
+      }
+      try {
+        const ids = new Set();
+        let page = 1;
+        for (;;) {
+          const res = await api.get(`student-groups/${selectedGroupId}/members/`, { params: { page, page_size: 1000 } });
+          (res.data?.results || []).forEach((m) => ids.add(Number(m.id)));
+          if (!res.data?.next) break;
+          page += 1;
+        }
+        if (!cancelled) setGroupMembers(ids);
+      } catch (e) {
+        console.error('Failed to load group members:', e);
+        if (!cancelled) setGroupMembers(new Set());
+      }
+    };
+    loadMembers();
+    return () => {
+      cancelled = true;
+    };
   }, [groups, selectedGroupId]);
 
   const createMaterial = async (e) => {
@@ -247,10 +284,11 @@ export default function AssignmentsManager() {
     }
     try {
       toast.loading('Saving members…', { id: 'members' });
-      await api.put(`student-groups/${selectedGroupId}/`, {
-        students: Array.from(groupMembers),
+      const res = await api.put(`student-groups/${selectedGroupId}/members/`, {
+        student_ids: Array.from(groupMembers),
       });
-      toast.success('Group updated', { id: 'members' });
+      const { added = 0, removed = 0 } = res.data || {};
+      toast.success(`Group updated (+${added} / -${removed})`, { id: 'members' });
       await loadGroups();
     } catch (e) {
       console.error('Failed to save group members:', e);
@@ -280,8 +318,20 @@ export default function AssignmentsManager() {
 
     try {
       toast.loading('Assigning…', { id: 'assign' });
-      await api.post('assignments/bulk/', payload);
-      toast.success('Assigned successfully', { id: 'assign' });
+      const res = await api.post('assignments/bulk/', payload);
+      const job = await waitForJob(res.data, (j) => {
+        const { done = 0, total = 0 } = j?.progress || {};
+        toast.loading(`Assigning… ${done}/${total}`, { id: 'assign' });
+      });
+      if (job?.status === 'failed') {
+        throw new Error(job?.error || 'Failed to assign');
+      }
+      const created = job?.result?.created ?? 0;
+      const skipped = job?.result?.already_assigned ?? 0;
+      toast.success(
+        skipped ? `Assigned to ${created} students (${skipped} already had it)` : `Assigned to ${created} students`,
+        { id: 'assign' },
+      );
       setAssignmentForm({
         assignment_type: 'MATERIAL',
         material: '',
@@ -296,7 +346,7 @@ export default function AssignmentsManager() {
       await loadAssigned();
     } catch (e2) {
       console.error('Failed to assign:', e2);
-      toast.error(e2?.response?.data?.detail || 'Failed to assign', { id: 'assign' });
+      toast.error(e2?.response?.data?.detail || e2?.message || 'Failed to assign', { id: 'assign' });
     }
   };
 
@@ -588,7 +638,7 @@ export default function AssignmentsManager() {
                     </div>
                     <a
                       className="text-xs text-primary hover:underline"
-                      href={m.file_url || m.url || '#'}
+                      href={withMediaToken(m.file_url || m.url) || '#'}
                       target="_blank"
                       rel="noreferrer"
                     >
@@ -627,7 +677,7 @@ export default function AssignmentsManager() {
             <select className="input" value={selectedGroupId} onChange={(e) => setSelectedGroupId(e.target.value)}>
               <option value="">Select group…</option>
               {(groups || []).map((g) => (
-                <option key={g.id} value={String(g.id)}>{g.name}</option>
+                <option key={g.id} value={String(g.id)}>{g.name} ({g.student_count ?? 0})</option>
               ))}
             </select>
 
@@ -689,7 +739,7 @@ export default function AssignmentsManager() {
                 <select className="input" value={selectedGroupId} onChange={(e) => setSelectedGroupId(e.target.value)}>
                   <option value="">Select group…</option>
                   {(groups || []).map((g) => (
-                    <option key={g.id} value={String(g.id)}>{g.name}</option>
+                    <option key={g.id} value={String(g.id)}>{g.name} ({g.student_count ?? 0})</option>
                   ))}
                 </select>
               ) : (
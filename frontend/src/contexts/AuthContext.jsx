@@ -1,5 +1,6 @@
 import React, { createContext, useState, useContext, useEffect } from 'react';
 import { authAPI, userAPI } from '../services/api';
+import { clearMediaToken, getMediaToken, refreshMediaToken } from '../utils/media';
 
 const AuthContext = createContext(null);
 
@@ -27,6 +28,8 @@ export const AuthProvider = ({ children }) => {
         return;
       }
 
+      if (!getMediaToken()) refreshMediaToken().catch(() => {});
+
       let hydratedUser = null;
       if (storedUser) {
         try {
@@ -80,6 +83,7 @@ export const AuthProvider = ({ children }) => {
       localStorage.setItem('access_token', access);
       localStorage.setItem('refresh_token', refresh);
       localStorage.setItem('user', JSON.stringify(userData));
+      refreshMediaToken().catch(() => {});
 
       setUser(userData);
       return { success: true, user: userData };
@@ -100,6 +104,7 @@ export const AuthProvider = ({ children }) => {
       localStorage.setItem('access_token', access);
       localStorage.setItem('refresh_token', refresh);
       localStorage.setItem('user', JSON.stringify(newUser));
+      refreshMediaToken().catch(() => {});
 
       setUser(newUser);
       return { success: true, user: newUser };
@@ -133,6 +138,7 @@ export const AuthProvider = ({ children }) => {
       localStorage.removeItem('access_token');
       localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
+      clearMediaToken();
       setUser(null);
     }
   };
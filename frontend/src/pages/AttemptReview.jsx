@@ -4,6 +4,7 @@ import { BookOpen, CheckCircle, XCircle, ArrowLeft } from 'lucide-react';
 import toast from 'react-hot-toast';
 
 import api from '../services/api';
+import { withMediaToken } from '../utils/media';
 import AppShell from '../components/layout/AppShell';
 import StudentNav from '../components/layout/StudentNav';
 import EmptyState from '../components/ui/EmptyState';
@@ -24,9 +25,9 @@ function AttemptReview() {
   const resolveMediaUrl = (maybeUrl) => {
     if (!maybeUrl) return null;
     if (typeof maybeUrl !== 'string') return null;
-    if (/^https?:\/\//i.test(maybeUrl)) return maybeUrl;
-    if (maybeUrl.startsWith('/')) return `${BACKEND_ORIGIN}${maybeUrl}`;
-    return `${BACKEND_ORIGIN}/${maybeUrl}`;
+    if (/^https?:\/\//i.test(maybeUrl)) return withMediaToken(maybeUrl);
+    if (maybeUrl.startsWith('/')) return withMediaToken(`${BACKEND_ORIGIN}${maybeUrl}`);
+    return withMediaToken(`${BACKEND_ORIGIN}/${maybeUrl}`);
   };
 
   async function load() {
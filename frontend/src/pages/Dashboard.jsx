@@ -71,28 +71,28 @@ const Dashboard = () => {
     recentAttempts: [],
     topicProgress: [],
     leaderboard: [],
+    summary: null,
   });
 
   const loadDashboardData = async () => {
     setLoading(true);
     try {
-      const [examsRes, attemptsRes, topicsRes, leaderboardRes] = await Promise.all([
+      const [examsRes, summaryRes, leaderboardRes] = await Promise.all([
         api.get('exams/'),
-        api.get('users/me/attempts/'),
-        api.get('analytics/user/me/topics/'),
+        api.get('dashboard/student/'),
         api.get('leaderboard/?period=weekly'),
       ]);
 
       const examsArray = Array.isArray(examsRes.data) ? examsRes.data : (examsRes.data?.results || []);
-      const attemptsArray = attemptsRes.data?.attempts || [];
-      const topicsArray = topicsRes.data?.topics || [];
+      const summary = summaryRes.data || {};
       const leaders = leaderboardRes.data?.leaders || [];
 
       setDashboardData({
         upcomingExams: examsArray,
-        recentAttempts: attemptsArray,
-        topicProgress: topicsArray,
+        recentAttempts: summary.recent_attempts || [],
+        topicProgress: summary.topics || [],
         leaderboard: leaders,
+        summary,
       });
     } catch (error) {
       console.error('Failed to load dashboard:', error);
@@ -119,11 +119,6 @@ const Dashboard = () => {
     [dashboardData.recentAttempts]
   );
 
-  const gradedSubmittedAttempts = useMemo(
-    () => submittedAttempts.filter((a) => !a?.needs_grading),
-    [submittedAttempts]
-  );
-
   const latestAttempt = useMemo(() => {
     const attempts = (dashboardData.recentAttempts || []).filter(Boolean);
     if (!attempts.length) return null;
@@ -157,34 +152,8 @@ const Dashboard = () => {
     writeWeeklyGoal(weeklyGoal);
   }, [weeklyGoal]);
 
-  const avgScore = useMemo(() => {
-    const scores = gradedSubmittedAttempts.map((a) => Number(a.percentage ?? 0)).filter((n) => Number.isFinite(n));
-    if (!scores.length) return 0;
-    const sum = scores.reduce((acc, v) => acc + v, 0);
-    return Math.round((sum / scores.length) * 10) / 10;
-  }, [gradedSubmittedAttempts]);
-
-  const streak = useMemo(() => {
-    const dates = submittedAttempts
-      .map((a) => (a.started_at ? new Date(a.started_at).toDateString() : null))
-      .filter(Boolean);
-    if (!dates.length) return 0;
-
-    const uniqueDates = [...new Set(dates)].sort((a, b) => new Date(b) - new Date(a));
-    const today = new Date().toDateString();
-    const yesterday = new Date(Date.now() - 86400000).toDateString();
-    if (uniqueDates[0] !== today && uniqueDates[0] !== yesterday) return 0;
-
-    let count = 1;
-    for (let i = 1; i < uniqueDates.length; i++) {
-      const prev = new Date(uniqueDates[i - 1]);
-      const curr = new Date(uniqueDates[i]);
-      const diffDays = Math.floor((prev - curr) / 86400000);
-      if (diffDays === 1) count += 1;
-      else break;
-    }
-    return count;
-  }, [submittedAttempts]);
+  const avgScore = dashboardData.summary?.exams?.average_percentage ?? 0;
+  const streak = dashboardData.summary?.streak?.submission_days ?? 0;
 
   const myLeaderboardRank = useMemo(() => {
     const username = user?.username;
@@ -197,28 +166,10 @@ const Dashboard = () => {
   const recentTwo = useMemo(() => submittedAttempts.slice(0, 2), [submittedAttempts]);
   const topTopics = useMemo(() => (dashboardData.topicProgress || []).slice(0, 4), [dashboardData.topicProgress]);
 
-  const trendPoints = useMemo(() => {
-    const days = Array.from({ length: 7 }, (_, i) => {
-      const d = new Date();
-      d.setDate(d.getDate() - (6 - i));
-      return d;
-    });
-    const buckets = days.map((d) => ({ key: d.toDateString(), values: [] }));
-
-    for (const attempt of submittedAttempts) {
-      if (!attempt?.started_at) continue;
-      if (attempt?.needs_grading) continue;
-      const key = new Date(attempt.started_at).toDateString();
-      const idx = buckets.findIndex((b) => b.key === key);
-      if (idx >= 0) buckets[idx].values.push(Number(attempt.percentage ?? 0));
-    }
-
-    return buckets.map((b) => {
-      if (!b.values.length) return 0;
-      const sum = b.values.reduce((acc, v) => acc + v, 0);
-      return Math.round((sum / b.values.length) * 10) / 10;
-    });
-  }, [submittedAttempts]);
+  const trendPoints = useMemo(
+    () => (dashboardData.summary?.trend || []).map((d) => Number(d.average_percentage ?? 0)),
+    [dashboardData.summary]
+  );
 
   const trendPath = useMemo(() => {
     const w = 520;
@@ -4,6 +4,7 @@ import { ClipboardCheck, ArrowLeft, Upload, Save, CheckCircle, XCircle, Lock } f
 import toast from 'react-hot-toast';
 
 import api from '../services/api';
+import { withMediaToken } from '../utils/media';
 import AppShell from '../components/layout/AppShell';
 import TeacherNav from '../components/layout/TeacherNav';
 import EmptyState from '../components/ui/EmptyState';
@@ -26,9 +27,9 @@ function GradingPage() {
   const resolveMediaUrl = (maybeUrl) => {
     if (!maybeUrl) return null;
     if (typeof maybeUrl !== 'string') return null;
-    if (/^https?:\/\//i.test(maybeUrl)) return maybeUrl;
-    if (maybeUrl.startsWith('/')) return `${BACKEND_ORIGIN}${maybeUrl}`;
-    return `${BACKEND_ORIGIN}/${maybeUrl}`;
+    if (/^https?:\/\//i.test(maybeUrl)) return withMediaToken(maybeUrl);
+    if (maybeUrl.startsWith('/')) return withMediaToken(`${BACKEND_ORIGIN}${maybeUrl}`);
+    return withMediaToken(`${BACKEND_ORIGIN}/${maybeUrl}`);
   };
 
   useEffect(() => {
@@ -5,6 +5,7 @@ import toast from 'react-hot-toast';
 import { BookOpen, FileText, Lock, CheckCircle2, Clock, ListFilter, Search } from 'lucide-react';
 
 import api from '../services/api';
+import { withMediaToken } from '../utils/media';
 import { useAuth } from '../contexts/AuthContext';
 import AppShell from '../components/layout/AppShell';
 import StudentNav from '../components/layout/StudentNav';
@@ -150,7 +151,7 @@ export default function MyAssignments() {
       toast.error('No material link found');
       return;
     }
-    window.open(url, '_blank', 'noopener,noreferrer');
+    window.open(withMediaToken(url), '_blank', 'noopener,noreferrer');
   };
 
   const startTest = (a) => {
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import api from '../services/api';
+import { withMediaToken } from '../utils/media';
 import { 
   Award, TrendingUp, Clock, Target, Home, Download,
   CheckCircle, XCircle, Circle, BarChart3
@@ -24,9 +25,9 @@ const Results = () => {
   const resolveMediaUrl = (maybeUrl) => {
     if (!maybeUrl) return null;
     if (typeof maybeUrl !== 'string') return null;
-    if (/^https?:\/\//i.test(maybeUrl)) return maybeUrl;
-    if (maybeUrl.startsWith('/')) return `${BACKEND_ORIGIN}${maybeUrl}`;
-    return `${BACKEND_ORIGIN}/${maybeUrl}`;
+    if (/^https?:\/\//i.test(maybeUrl)) return withMediaToken(maybeUrl);
+    if (maybeUrl.startsWith('/')) return withMediaToken(`${BACKEND_ORIGIN}${maybeUrl}`);
+    return withMediaToken(`${BACKEND_ORIGIN}/${maybeUrl}`);
   };
 
   useEffect(() => {
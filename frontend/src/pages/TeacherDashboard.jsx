@@ -6,6 +6,7 @@ import { useAuth } from '../contexts/AuthContext';
 import AppShell from '../components/layout/AppShell';
 import TeacherNav from '../components/layout/TeacherNav';
 import ThemeToggle from '../components/ui/ThemeToggle';
+import { withMediaToken } from '../utils/media';
 
 const BASE_API = (import.meta.env.VITE_BASE_API || import.meta.env.VITE_API_URL || '/api').replace(/\/$/, '');
 const getToken = () => localStorage.getItem('access_token');
@@ -41,9 +42,9 @@ const BACKEND_ORIGIN = BASE_API.replace(/\/?api\/?$/, '');
 const getAvatarUrl = (avatar) => {
   if (!avatar) return null;
   if (typeof avatar !== 'string') return null;
-  if (avatar.startsWith('http://') || avatar.startsWith('https://')) return avatar;
-  if (avatar.startsWith('/')) return `${BACKEND_ORIGIN}${avatar}`;
-  return `${BACKEND_ORIGIN}/${avatar}`;
+  if (avatar.startsWith('http://') || avatar.startsWith('https://')) return withMediaToken(avatar);
+  if (avatar.startsWith('/')) return withMediaToken(`${BACKEND_ORIGIN}${avatar}`);
+  return withMediaToken(`${BACKEND_ORIGIN}/${avatar}`);
 };
 
 function TeacherDashboard() {
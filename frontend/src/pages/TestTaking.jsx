@@ -2,6 +2,7 @@ import { useState, useEffect, useMemo, useRef } from 'react';
 import { useParams, useNavigate, useSearchParams } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import api from '../services/api';
+import { withMediaToken, withMediaTokenSrcset } from '../utils/media';
 import { 
   Clock, Flag, ChevronLeft, ChevronRight, CheckCircle, 
   AlertCircle, BookOpen, Save, Upload
@@ -20,14 +21,14 @@ const resolveMediaUrl = (maybeUrl) => {
   if (/^https?:\/\//i.test(maybeUrl)) {
     // Avoid mixed-content issues if proxy produced http URLs.
     if (window?.location?.protocol === 'https:' && maybeUrl.startsWith('http://') && maybeUrl.includes('onrender.com')) {
-      return maybeUrl.replace(/^http:\/\//i, 'https://');
+      return withMediaToken(maybeUrl.replace(/^http:\/\//i, 'https://'));
     }
-    return maybeUrl;
+    return withMediaToken(maybeUrl);
   }
 
   // Convert relative /media/... into backend absolute URL.
-  if (maybeUrl.startsWith('/')) return `${BACKEND_ORIGIN}${maybeUrl}`;
-  return `${BACKEND_ORIGIN}/${maybeUrl}`;
+  if (maybeUrl.startsWith('/')) return withMediaToken(`${BACKEND_ORIGIN}${maybeUrl}`);
+  return withMediaToken(`${BACKEND_ORIGIN}/${maybeUrl}`);
 };
 
 const LSK = {
@@ -320,7 +321,8 @@ const TestTaking = () => {
         choices: q.choices || {},
         marks: q.marks || 1,
         time_est: q.time_est,
-        image: q.image
+        image: q.image,
+        imageSet: q.image_set || null
       }));
       
       console.log('Mapped questions:', mappedQuestions);
@@ -858,11 +860,23 @@ const TestTaking = () => {
                     </div>
                     
                     {currentQuestion.image && (
-                      <img 
-                        src={resolveMediaUrl(currentQuestion.image)} 
-                        alt="Question" 
-                        className="mt-4 rounded-xl max-w-full"
-                      />
+                      <picture>
+                        {currentQuestion.imageSet?.webp_srcset && (
+                          <source
+                            type="image/webp"
+                            srcSet={withMediaTokenSrcset(currentQuestion.imageSet.webp_srcset)}
+                            sizes="(max-width: 768px) 100vw, 768px"
+                          />
+                        )}
+                        <img 
+                          src={resolveMediaUrl(currentQuestion.image)} 
+                          srcSet={withMediaTokenSrcset(currentQuestion.imageSet?.srcset) || undefined}
+                          sizes={currentQuestion.imageSet?.srcset ? '(max-width: 768px) 100vw, 768px' : undefined}
+                          alt="Question" 
+                          className="mt-4 rounded-xl max-w-full"
+                          decoding="async"
+                        />
+                      </picture>
                     )}
                   </div>
 
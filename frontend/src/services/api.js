@@ -81,6 +81,7 @@ api.interceptors.response.use(
         localStorage.removeItem('access_token');
         localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
+        localStorage.removeItem('media_token');
         window.location.href = '/login';
         return Promise.reject(refreshError);
       }
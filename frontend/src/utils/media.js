@@ -0,0 +1,63 @@
+import api from '../services/api';
+
+// <img src> / <a href> requests can't carry the JWT header, so protected /media/ URLs
+// get a short-lived ?token= issued by /api/media/token/, renewed before it expires.
+const KEY = 'media_token';
+let renewTimer = null;
+
+export const getMediaToken = () => {
+  try {
+    const raw = JSON.parse(localStorage.getItem(KEY) || 'null');
+    if (raw?.token && raw.expiresAt > Date.now()) return raw.token;
+  } catch {
+    // ignore malformed storage
+  }
+  return null;
+};
+
+export const refreshMediaToken = async () => {
+  const res = await api.get('/media/token/');
+  const { token, expires_in: expiresIn } = res.data || {};
+  if (!token) return null;
+  // Renew a minute early so URLs rendered right before expiry still work.
+  const lifetime = Math.max(0, (expiresIn || 0) - 60) * 1000;
+  localStorage.setItem(KEY, JSON.stringify({ token, expiresAt: Date.now() + lifetime }));
+  clearTimeout(renewTimer);
+  if (lifetime > 0) {
+    renewTimer = setTimeout(() => {
+      if (localStorage.getItem('access_token')) refreshMediaToken().catch(() => {});
+    }, lifetime);
+  }
+  return token;
+};
+
+export const clearMediaToken = () => {
+  clearTimeout(renewTimer);
+  renewTimer = null;
+  localStorage.removeItem(KEY);
+};
+
+export const withMediaToken = (url) => {
+  if (!url || typeof url !== 'string') return url;
+  const token = getMediaToken();
+  if (!token) return url;
+  let pathname = url;
+  try {
+    pathname = new URL(url, window.location.origin).pathname;
+  } catch {
+    return url;
+  }
+  if (!pathname.startsWith('/media/') || /[?&]token=/.test(url)) return url;
+  return `${url}${url.includes('?') ? '&' : '?'}token=${encodeURIComponent(token)}`;
+};
+
+export const withMediaTokenSrcset = (srcset) => {
+  if (!srcset) return srcset;
+  return srcset
+    .split(',')
+    .map((candidate) => {
+      const [url, descriptor] = candidate.trim().split(/\s+/);
+      return descriptor ? `${withMediaToken(url)} ${descriptor}` : withMediaToken(url);
+    })
+    .join(', ');
+};
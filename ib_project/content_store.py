@@ -0,0 +1,213 @@
+"""Content-addressed storage for shared media.
+
+Files saved through ContentAddressedStorage are stored under the SHA-256 of their
+bytes, keeping the top-level folder of the requested name so media permission rules
+(ib_project.media) still apply:
+
+    question_images/diagram.png  ->  question_images/3f/3f9a...c1.png
+
+The same diagram attached to fifty questions is therefore stored once and, because the
+name changes whenever the bytes do, served with an immutable Cache-Control. Each stored
+blob has an exams.MediaBlob row counting the saved fields that point at it. Rows own the
+references: when a row is deleted or its file replaced, exams.signals calls
+release_reference(), which decrements the count and removes the file with the last
+reference. Storage.delete() on a hashed name therefore does nothing, so FieldFile.delete()
+followed by a save does not release the same reference twice. Queryset .update() and raw
+deletes bypass those hooks; `manage.py dedupe_media` moves existing media onto hashed names
+and recounts every reference from the database.
+
+The wrapper delegates to default_storage (local disk, S3 or Cloudinary).
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+_CONTENT_NAME = re.compile(r'^[^/]+/[0-9a-f]{2}/[0-9a-f]{64}(\.[A-Za-z0-9]{1,10})?$')
+
+
+def content_fields():
+    """(label, model, file field) for every model field stored by content hash."""
+    from exams.models import Question as ExamQuestion
+    from learning.models import Material
+    from questionpapers.models import Answer, PaperAttempt, Question as PaperQuestion
+    from quizzes.models import Question as QuizQuestion
+
+    return [
+        ('exams.question', ExamQuestion, 'image'),
+        ('quizzes.question', QuizQuestion, 'image'),
+        ('questionpapers.question', PaperQuestion, 'question_image'),
+        ('questionpapers.answer', Answer, 'answer_file'),
+        ('questionpapers.paperattempt', PaperAttempt, 'answer_file'),
+        ('learning.material', Material, 'file'),
+    ]
+
+
+def is_content_name(name: str) -> bool:
+    return bool(name) and bool(_CONTENT_NAME.match(name))
+
+
+def content_name(name: str, digest: str) -> str:
+    """Hashed storage name for `digest`, kept under the requested name's top-level folder."""
+    folder = name.replace('\\', '/').lstrip('/').split('/', 1)[0] if '/' in name else 'media'
+    ext = os.path.splitext(name)[1].lower()
+    if not re.fullmatch(r'\.[a-z0-9]{1,10}', ext):
+        ext = ''
+    return f'{folder}/{digest[:2]}/{digest}{ext}'
+
+
+def file_digest(content) -> tuple[str, int]:
+    """(sha256 hex, size) of a Django File, read in chunks."""
+    sha = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        sha.update(chunk)
+        size += len(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha.hexdigest(), size
+
+
+def add_reference(name: str, digest: str, size: int) -> None:
+    from exams.models import MediaBlob
+
+    if MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, sha256=digest, size=size, refcount=1)
+    except IntegrityError:  # created concurrently
+        MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+
+
+def release_reference(name: str, count: int = 1) -> None:
+    """`count` saved fields stopped using `name`; the file goes with the last reference."""
+    from exams.models import MediaBlob
+
+    if not is_content_name(name):
+        return
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+        if blob is None:
+            return  # unindexed: other rows may use it; recount_references(prune=True) decides
+        if blob.refcount > count:
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - count)
+            return
+        blob.delete()
+    content_storage.backend.delete(name)
+
+
+def recount_references(prune: bool = False) -> dict:
+    """Reset every MediaBlob.refcount from the rows that reference it.
+
+    Queryset updates and raw deletes skip release_reference(), so counts can drift; this
+    restores them (creating index rows for hashed files that lack one). With `prune`,
+    blobs nothing references are deleted from storage.
+    """
+    from exams.models import MediaBlob
+
+    counts = Counter()
+    for _, model, field in content_fields():
+        rows = (
+            model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .values_list(field).annotate(n=Count('pk')).order_by()
+        )
+        for name, n in rows:
+            if is_content_name(name):
+                counts[name] += n
+
+    backend = content_storage.backend
+    blobs = {blob.name: blob for blob in MediaBlob.objects.all()}
+    changed, created, pruned = [], [], 0
+    for name, n in counts.items():
+        blob = blobs.pop(name, None)
+        if blob is None:
+            try:
+                size = backend.size(name)
+            except Exception:
+                size = 0
+            digest = os.path.splitext(name.rsplit('/', 1)[-1])[0]
+            created.append(MediaBlob(name=name, sha256=digest, size=size, refcount=n))
+        elif blob.refcount != n:
+            blob.refcount = n
+            changed.append(blob)
+    for blob in blobs.values():  # no longer referenced
+        if prune:
+            backend.delete(blob.name)
+            blob.delete()
+            pruned += 1
+        elif blob.refcount:
+            blob.refcount = 0
+            changed.append(blob)
+    MediaBlob.objects.bulk_create(created, batch_size=500)
+    MediaBlob.objects.bulk_update(changed, ['refcount'], batch_size=500)
+    return {'blobs': len(counts), 'references': sum(counts.values()), 'pruned': pruned}
+
+
+class ContentAddressedStorage(Storage):
+    """Stores files by content hash in default_storage, with reference counting."""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from .images import immutable_storage
+
+            self._backend = immutable_storage()
+        return self._backend
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save().
+        return name
+
+    def _save(self, name, content):
+        digest, size = file_digest(content)
+        target = content_name(name, digest)
+        if not self.backend.exists(target):
+            saved = self.backend.save(target, content)
+            if saved != target:
+                # A concurrent save wrote the same bytes first and the backend picked a
+                # suffixed name; the existing blob is identical, so use it.
+                self.backend.delete(saved)
+        add_reference(target, digest, size)
+        return target
+
+    def delete(self, name):
+        """Hashed files are shared; they are removed by release_reference(), never directly."""
+        if not is_content_name(name):
+            return self.backend.delete(name)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+content_storage = ContentAddressedStorage()
+
+
+def get_content_storage():
+    """FileField(storage=...) callable, so migrations do not serialise the backend."""
+    return content_storage
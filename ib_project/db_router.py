@@ -0,0 +1,157 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+When DATABASE_REPLICA_ALIAS names a configured database (REPLICA_DATABASE_URL), reads
+made while serving a GET/HEAD/OPTIONS request go to that replica: leaderboards,
+analytics, admin dashboards, attempt history and the catalog lists. Everything else
+reads from 'default'. That covers unsafe requests, management commands, background
+jobs and anything outside a request.
+
+Replicas lag, so a user who has just submitted, saved or graded something must not
+read an older copy of it. ReplicaRoutingMiddleware pins the caller to the primary for
+REPLICA_PIN_SECONDS after any unsafe request. The pin is kept in the shared cache,
+keyed by the user id from the JWT or session, so it holds across workers. Within a
+request, the first write switches the rest of that request's reads to the primary,
+and reads inside an open transaction stay there too. User rows are always read from
+the primary, because authentication and role revocation must not see stale rows.
+
+Pinning one user does not protect shared caches. Whoever refills a dropped entry would
+copy lagging replica rows into it for the whole TTL, so cache builders run under
+primary_reads(). Catalog responses read from the primary for REPLICA_PIN_SECONDS after
+a catalog write (exams.catalog_cache), so no ETag is minted over stale rows.
+
+Views can override the choice with @use_primary or @use_replica. Put the decorator
+above @api_view, or on the ViewSet class.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_PIN_KEY = 'db:primary-pin:{}'
+
+# Alias that reads go to in the current request; the primary outside requests.
+_read_alias = contextvars.ContextVar('db_read_alias', default=DEFAULT_DB_ALIAS)
+# Set by the first write of a request; reads stay on the primary from then on.
+_wrote = contextvars.ContextVar('db_wrote', default=False)
+
+
+def replica_alias() -> str:
+    return getattr(settings, 'DATABASE_REPLICA_ALIAS', '') or ''
+
+
+def _pin_seconds() -> int:
+    return int(getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def pin_to_primary(user_id) -> None:
+    """Send this user's (or scope's) reads to the primary for the next REPLICA_PIN_SECONDS."""
+    if user_id is not None and replica_alias():
+        cache.set(_PIN_KEY.format(user_id), 1, _pin_seconds())
+
+
+def is_pinned(user_id) -> bool:
+    return user_id is not None and cache.get(_PIN_KEY.format(user_id)) is not None
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, e.g. while refilling a shared cache entry."""
+    token = _read_alias.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary(view):
+    """Always read from the primary in this view, e.g. for progress that must be current."""
+    view.db_reads = 'primary'
+    return view
+
+
+def use_replica(view):
+    """Read from the replica on safe requests even while the caller is pinned.
+
+    Only for views whose data may lag by a few seconds, such as aggregate analytics.
+    """
+    view.db_reads = 'replica'
+    return view
+
+
+def _view_override(view_func):
+    override = getattr(view_func, 'db_reads', None)
+    if override is None:  # ViewSet.as_view() / APIView.as_view() keep the class on .cls
+        override = getattr(getattr(view_func, 'cls', None), 'db_reads', None)
+    return override
+
+
+def request_user_id(request):
+    """The caller's user id from the bearer token or the session, without a query."""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        try:
+            return str(AccessToken(header[7:].strip())[api_settings.USER_ID_CLAIM])
+        except (TokenError, KeyError):
+            return None
+    session = getattr(request, 'session', None)
+    return session.get(SESSION_KEY) if session is not None else None
+
+
+class ReplicaRouter:
+    """Route reads to the request's read alias; all writes and migrations go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias == DEFAULT_DB_ALIAS or _wrote.get():
+            return DEFAULT_DB_ALIAS
+        if model._meta.label == settings.AUTH_USER_MODEL or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db  # related rows come from where the instance came from
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Read-your-writes within the request: nothing after a write comes from the replica.
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # the replica holds the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Pick the read alias for each request and pin writers to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token, wrote_token = _read_alias.set(DEFAULT_DB_ALIAS), _wrote.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+            _wrote.reset(wrote_token)
+        if replica_alias() and request.method not in SAFE_METHODS:
+            pin_to_primary(request_user_id(request))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        alias = replica_alias()
+        if not alias or request.method not in SAFE_METHODS:
+            return None
+        override = _view_override(view_func)
+        if override == 'replica' or (override is None and not is_pinned(request_user_id(request))):
+            _read_alias.set(alias)
+        return None
@@ -0,0 +1,221 @@
+"""Responsive image derivatives for question images.
+
+Question images are often multi-megabyte phone photos. For every source image we
+generate resized WebP and JPEG copies at a few widths, with EXIF/ICC metadata
+stripped, stored under content-hashed names (so they can be cached forever) and
+recorded on the owning row as a small JSON document:
+
+    {
+        "source": "question_images/p1.jpg",
+        "hash": "<sha256 of the source bytes>",
+        "width": 3024, "height": 4032,
+        "webp": [{"width": 320, "path": "derivatives/ab/abcd...-320w.webp"}, ...],
+        "jpeg": [{"width": 320, "path": "derivatives/ab/abcd...-320w.jpg"}, ...],
+    }
+
+Resizing is too slow for the request that saves a question, so saves (and bulk imports)
+queue the 'exams.build_image_variants' background job (exams.jobs) instead. Until it has
+run, responsive_image() falls back to the original upload.
+
+Use responsive_image() to turn that document into src/srcset values for APIs and templates.
+"""
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_PREFIX = 'derivatives'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def variant_widths() -> list[int]:
+    return sorted({int(w) for w in getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1024, 1600])})
+
+
+def image_sources():
+    """(label, model, image field, variants field) for every model with a question image."""
+    from exams.models import Question as ExamQuestion
+    from questionpapers.models import Question as PaperQuestion
+    from quizzes.models import Question as QuizQuestion
+
+    return [
+        ('exams', ExamQuestion, 'image', 'image_variants'),
+        ('quizzes', QuizQuestion, 'image', 'image_variants'),
+        ('questionpapers', PaperQuestion, 'question_image', 'question_image_variants'),
+    ]
+
+
+def immutable_storage():
+    """default_storage, with far-future Cache-Control on S3 objects it writes."""
+    storage = default_storage
+    # S3: attach far-future Cache-Control to content-hashed objects only. Local media gets
+    # the same header from ib_project.media (or the nginx "/media/derivatives/" location).
+    object_parameters = getattr(storage, 'object_parameters', None)
+    if isinstance(object_parameters, dict):
+        return storage.__class__(object_parameters={**object_parameters, 'CacheControl': IMMUTABLE_CACHE_CONTROL})
+    return storage
+
+
+def _target_widths(source_width: int) -> list[int]:
+    widths = variant_widths()
+    targets = [w for w in widths if w < source_width]
+    targets.append(min(source_width, widths[-1]))
+    return sorted(set(targets))
+
+
+def build_image_variants(field_file) -> dict:
+    """Generate derivatives for a stored image file and return the variants document.
+
+    Returns {} when the file is missing or is not a readable image. Derivative names
+    depend only on the source bytes, so re-running is idempotent and identical uploads
+    share derivatives.
+    """
+    from PIL import Image, ImageOps
+
+    if not field_file or not getattr(field_file, 'name', ''):
+        return {}
+    try:
+        field_file.open('rb')
+        try:
+            raw = field_file.read()
+        finally:
+            field_file.close()
+    except Exception:
+        logger.warning('Could not read image %s for derivatives', getattr(field_file, 'name', ''), exc_info=True)
+        return {}
+
+    digest = hashlib.sha256(raw).hexdigest()
+    try:
+        img = Image.open(io.BytesIO(raw))
+        largest = variant_widths()[-1]
+        # JPEG only: let the decoder downscale by a power of two instead of decoding every pixel.
+        img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    except Exception:
+        logger.warning('Could not decode image %s for derivatives', field_file.name, exc_info=True)
+        return {}
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    base = img.convert('RGBA' if has_alpha else 'RGB')
+    storage = immutable_storage()
+
+    doc = {'source': field_file.name, 'hash': digest, 'width': base.width, 'height': base.height, 'webp': [], 'jpeg': []}
+    for width in _target_widths(base.width):
+        height = max(1, round(base.height * width / base.width))
+        resized = base if width == base.width else base.resize((width, height), Image.LANCZOS)
+        for fmt, ext in (('webp', 'webp'), ('jpeg', 'jpg')):
+            name = f'{DERIVATIVE_PREFIX}/{digest[:2]}/{digest[:24]}-{width}w.{ext}'
+            if not storage.exists(name):
+                buf = io.BytesIO()
+                if fmt == 'webp':
+                    resized.save(buf, 'WEBP', quality=WEBP_QUALITY, method=4)
+                else:
+                    flat = resized
+                    if has_alpha:
+                        flat = Image.new('RGB', resized.size, (255, 255, 255))
+                        flat.paste(resized, mask=resized.getchannel('A'))
+                    flat.save(buf, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                # No exif=/icc_profile= arguments: the derivative carries no metadata.
+                name = storage.save(name, ContentFile(buf.getvalue()))
+            doc[fmt].append({'width': width, 'path': name})
+    return doc
+
+
+def _source_label(model) -> str:
+    return next(label for label, source_model, _, _ in image_sources() if source_model is model)
+
+
+def queue_image_variants(model, ids) -> None:
+    """Build derivatives for these rows in the background, after the transaction commits."""
+    from exams.jobs import enqueue
+
+    ids = [pk for pk in ids if pk is not None]
+    if ids:
+        enqueue('exams.build_image_variants', {'source': _source_label(model), 'ids': ids})
+
+
+def sync_image_variants(instance, image_field: str = 'image', variants_field: str = 'image_variants') -> None:
+    """Queue new derivatives when the row's image changed since they were last built.
+
+    Called from model save() after the file has been committed to storage.
+    """
+    field_file = getattr(instance, image_field)
+    current = getattr(instance, variants_field) or {}
+    name = field_file.name if field_file else ''
+    if (current.get('source') or '') == (name or ''):
+        return
+    if name:
+        queue_image_variants(type(instance), [instance.pk])
+    elif current:
+        setattr(instance, variants_field, {})
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+
+
+def build_variants_job(job) -> dict:
+    """Background job 'exams.build_image_variants': build derivatives for params['ids'].
+
+    Rows whose derivatives already match their image are skipped, so a rerun is cheap.
+    Remote URLs left by spreadsheet imports are skipped too; backfill_images fetches those.
+    """
+    sources = {label: (model, image_field, variants_field) for label, model, image_field, variants_field in image_sources()}
+    model, image_field, variants_field = sources[job.params['source']]
+    built = 0
+    for row in model.objects.filter(pk__in=job.params['ids']).only('pk', image_field, variants_field):
+        field_file = getattr(row, image_field)
+        name = field_file.name if field_file else ''
+        if not name or '://' in name or (getattr(row, variants_field) or {}).get('source') == name:
+            continue
+        try:
+            variants = build_image_variants(field_file)
+        except Exception:
+            logger.exception('Image derivative generation failed for %s', name)
+            variants = {}
+        # The image may have been replaced while this ran; its own job builds the new one.
+        model.objects.filter(pk=row.pk, **{image_field: name}).update(**{variants_field: variants})
+        built += 1
+    return {'built': built}
+
+
+def responsive_image(field_file, variants: dict | None, request=None) -> dict | None:
+    """src/srcset payload for an image, falling back to the original when no derivatives exist."""
+    if not field_file:
+        return None
+
+    def _url(path_or_url):
+        try:
+            url = default_storage.url(path_or_url)
+        except Exception:
+            return None
+        return request.build_absolute_uri(url) if request is not None else url
+
+    try:
+        original = field_file.url
+    except Exception:
+        return None
+    original = request.build_absolute_uri(original) if request is not None else original
+
+    variants = variants or {}
+    if variants.get('source') != field_file.name or not variants.get('jpeg'):
+        return {'src': original, 'srcset': '', 'webp_srcset': '', 'width': None, 'height': None, 'original': original}
+
+    def _srcset(entries):
+        return ', '.join(f"{_url(e['path'])} {e['width']}w" for e in entries)
+
+    jpeg = variants.get('jpeg') or []
+    largest = jpeg[-1]
+    return {
+        'src': _url(largest['path']),
+        'srcset': _srcset(jpeg),
+        'webp_srcset': _srcset(variants.get('webp') or []),
+        'width': variants.get('width'),
+        'height': variants.get('height'),
+        'original': original,
+    }
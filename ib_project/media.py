@@ -0,0 +1,177 @@
+"""Authenticated delivery of local MEDIA_ROOT files.
+
+Replaces the unauthenticated static() media route when media lives on local disk.
+Django only decides *whether* a user may read a file; the bytes are sent by nginx
+through X-Accel-Redirect (which also handles Range, ETag and Last-Modified). Without
+MEDIA_ACCEL_REDIRECT_PREFIX the file is streamed by Django with FileResponse (dev).
+
+Browsers cannot attach the JWT header to <img src> / <a href> requests, so besides
+session and JWT auth the view accepts ?token=<media token> issued by /api/media/token/.
+It is only valid for media requests. The token signs the user id together with the
+user's role_version and lasts MEDIA_TOKEN_MAX_AGE (seconds), so a leaked media link
+stops working soon, and at once when the account is deactivated or its role changes.
+"""
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from rest_framework import exceptions, permissions, status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response as DRFResponse
+from rest_framework.settings import api_settings
+
+from accounts.jwt import current_role_version
+from accounts.roles import is_teacher_or_admin
+
+from .content_store import is_content_name
+
+MEDIA_TOKEN_SALT = 'ib_project.media'
+
+# Question content visible to any signed-in user.
+_SHARED_PREFIXES = ('question_images/', 'derivatives/', 'avatars/')
+# Content-hashed files never change, so clients may keep them.
+_IMMUTABLE_PREFIXES = ('derivatives/',)
+
+
+def _media_token_max_age() -> int:
+    return int(getattr(settings, 'MEDIA_TOKEN_MAX_AGE', 15 * 60))
+
+
+def make_media_token(user) -> str:
+    return signing.TimestampSigner(salt=MEDIA_TOKEN_SALT).sign(f'{user.pk}:{int(user.role_version or 0)}')
+
+
+class MediaTokenAuthentication(BaseAuthentication):
+    """Authenticate media requests from the ?token= query parameter."""
+
+    def authenticate(self, request):
+        token = request.query_params.get('token')
+        if not token:
+            return None
+        try:
+            value = signing.TimestampSigner(salt=MEDIA_TOKEN_SALT).unsign(token, max_age=_media_token_max_age())
+            user_id, role_version = (int(part) for part in value.split(':'))
+        except (signing.BadSignature, ValueError):
+            raise exceptions.AuthenticationFailed('Invalid or expired media token.')
+        # Same revocation check as the JWTs: deactivation or a role change bumps role_version.
+        if current_role_version(user_id) != role_version:
+            raise exceptions.AuthenticationFailed('Invalid or expired media token.')
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired media token.')
+        return (user, None)
+
+
+def _normalize(path: str) -> str | None:
+    path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    if path in ('', '.', '..') or path.startswith('../'):
+        return None
+    return path
+
+
+def can_access_media(user, path: str) -> bool:
+    """Whether `user` may read the media file at storage-relative `path`."""
+    if is_teacher_or_admin(user):
+        return True
+    if path.startswith(_SHARED_PREFIXES):
+        return True
+
+    parts = path.split('/')
+    if parts[0] == 'answer_uploads':
+        # Exam submissions: answer_uploads/<user_id>/<attempt_id>/<file>
+        if len(parts) == 4 and parts[1].isdigit() and parts[2].isdigit():
+            from exams.models import Attempt
+
+            if Attempt.objects.filter(pk=int(parts[2]), user_id=user.pk).exists():
+                return True
+        # Question-paper answers: answer_uploads/YYYY/MM/DD/<file>
+        from questionpapers.models import Answer, PaperAttempt
+
+        return (
+            Answer.objects.filter(answer_file=path, user_id=user.pk).exists()
+            or PaperAttempt.objects.filter(answer_file=path, user_id=user.pk).exists()
+        )
+    if parts[0] == 'evaluated_pdfs':
+        # evaluated_pdfs/<user_id>/<attempt_id>_<name>
+        return len(parts) >= 3 and parts[1] == str(user.pk)
+    if parts[0] == 'materials':
+        from learning.models import LearningAssignment
+
+        return LearningAssignment.objects.filter(
+            assigned_to_id=user.pk,
+            is_active=True,
+            material__file=path,
+            material__is_active=True,
+        ).exists()
+    return False
+
+
+def _cache_control(path: str) -> str:
+    if path.startswith(_IMMUTABLE_PREFIXES) or is_content_name(path):
+        return 'private, max-age=31536000, immutable'
+    return 'private, max-age=3600'
+
+
+def _accel_response(path: str, prefix: str) -> HttpResponse:
+    response = HttpResponse()
+    content_type, encoding = mimetypes.guess_type(path)
+    # nginx keeps the upstream headers (type, Cache-Control) on internal redirects.
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+    return response
+
+
+def _file_response(request, path: str):
+    full_path = default_storage.path(path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found.')
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+    content_type, encoding = mimetypes.guess_type(path)
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes([MediaTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+@permission_classes([permissions.IsAuthenticated])
+def protected_media(request, path):
+    path = _normalize(path)
+    if path is None:
+        raise Http404('File not found.')
+    if not can_access_media(request.user, path):
+        return DRFResponse({'detail': 'You do not have permission to access this file.'}, status=status.HTTP_403_FORBIDDEN)
+
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if prefix:
+        response = _accel_response(path, prefix)
+    else:
+        response = _file_response(request, path)
+    response['Cache-Control'] = _cache_control(path)
+    response['Vary'] = 'Cookie, Authorization'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def media_token(request):
+    return DRFResponse({
+        'token': make_media_token(request.user),
+        'expires_in': _media_token_max_age(),
+    })
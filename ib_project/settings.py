@@ -1,6 +1,7 @@
 from pathlib import Path
 from django.contrib.messages import constants as messages
 import os
+import sys
 
 # -------------------------------------------------------------------
 # BASE SETTINGS
@@ -74,6 +75,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ib_project.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -153,6 +155,64 @@ else:
             }
         }
 
+# Optional read replica (ib_project/db_router.py): safe requests read from it, and users
+# who just wrote are pinned to the primary for REPLICA_PIN_SECONDS. A sqlite:/// URL
+# gives a second local alias, e.g. REPLICA_DATABASE_URL=sqlite:///db.sqlite3.
+REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL', '')
+if REPLICA_DATABASE_URL:
+    from urllib.parse import urlparse
+
+    parsed = urlparse(REPLICA_DATABASE_URL)
+    if parsed.scheme == 'sqlite':
+        replica_db = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, parsed.path[1:]),
+        }
+    else:
+        replica_db = {
+            **DATABASES['default'],
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': (parsed.path or '').lstrip('/') or DATABASES['default'].get('NAME', ''),
+            'USER': parsed.username or DATABASES['default'].get('USER', ''),
+            'PASSWORD': parsed.password or DATABASES['default'].get('PASSWORD', ''),
+            'HOST': parsed.hostname or DATABASES['default'].get('HOST', ''),
+            'PORT': str(parsed.port or DATABASES['default'].get('PORT', '')),
+        }
+    # Tests read the primary's test database through the replica connection.
+    replica_db['TEST'] = {'MIRROR': 'default'}
+    DATABASES['replica'] = replica_db
+
+DATABASE_REPLICA_ALIAS = 'replica' if 'replica' in DATABASES else ''
+if 'replica' not in DATABASES and (sys.argv[1:2] == ['test'] or 'pytest' in sys.modules):
+    # Test runs always get a replica alias mirroring the primary, so the end-to-end
+    # routing tests run; routing stays off unless a test sets DATABASE_REPLICA_ALIAS.
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['ib_project.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+# -------------------------------------------------------------------
+# CACHE
+# -------------------------------------------------------------------
+# Shared Redis cache when REDIS_URL is set (docker-compose / production), so cache-backed
+# state such as catalog ETag versions is consistent across gunicorn workers.
+# Falls back to per-process memory for local development and tests.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL and not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'mentara',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'mentara-default',
+        }
+    }
+
 # -------------------------------------------------------------------
 # PASSWORD VALIDATION
 # -------------------------------------------------------------------
@@ -233,6 +293,48 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = os.getenv('MEDIA_ROOT') or os.path.join(str(BASE_DIR), 'media')
 
+# Local media is served by ib_project.media.protected_media after a permission check.
+# Behind nginx, set this to the `internal` location aliasing MEDIA_ROOT (e.g. /protected-media/)
+# so the transfer is handed off with X-Accel-Redirect; leave blank to stream from Django.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+# Lifetime of the ?token= media tokens used by <img>/<a> tags in the SPA. Kept short
+# because the token ends up in URLs; the SPA renews it before it expires.
+MEDIA_TOKEN_MAX_AGE = int(os.getenv('MEDIA_TOKEN_MAX_AGE', str(15 * 60)))
+
+# Background jobs (exams.jobs) are executed by `manage.py run_jobs`. When eager, they run
+# inline right after the enqueuing request commits, so development needs no worker.
+BACKGROUND_JOBS_EAGER = os.getenv('BACKGROUND_JOBS_EAGER', str(DEBUG)) == 'True'
+# Bulk assignment inserts this many students per chunk; cohorts up to the inline limit
+# finish within the request, larger ones are left to the job worker.
+BULK_ASSIGN_CHUNK_SIZE = int(os.getenv('BULK_ASSIGN_CHUNK_SIZE', '1000'))
+BULK_ASSIGN_INLINE_LIMIT = int(os.getenv('BULK_ASSIGN_INLINE_LIMIT', '200'))
+# Quiz spreadsheet uploads (quizzes.ingest) insert questions in chunks of this size;
+# files up to the inline limit are imported within the request, larger ones by the worker.
+QUIZ_IMPORT_CHUNK_SIZE = int(os.getenv('QUIZ_IMPORT_CHUNK_SIZE', '1000'))
+QUIZ_IMPORT_INLINE_MAX_BYTES = int(os.getenv('QUIZ_IMPORT_INLINE_MAX_BYTES', str(2 * 1024 * 1024)))
+# Forced curriculum purges (exams.purge) delete this many rows per chunk; purges of up to
+# the inline limit rows finish within the request, larger ones are left to the job worker.
+CURRICULUM_PURGE_CHUNK_SIZE = int(os.getenv('CURRICULUM_PURGE_CHUNK_SIZE', '1000'))
+CURRICULUM_PURGE_INLINE_LIMIT = int(os.getenv('CURRICULUM_PURGE_INLINE_LIMIT', '2000'))
+
+# `manage.py preprovision_attempts` (opt-in, run from cron) creates dormant attempts for
+# mock tests whose start_at falls within this window, so start_exam only flips them.
+PREPROVISION_ATTEMPTS_LEAD_MINUTES = int(os.getenv('PREPROVISION_ATTEMPTS_LEAD_MINUTES', '30'))
+
+# Resumable (chunked) submission uploads.
+# Chunks are staged on local disk (even when media lives on S3/Cloudinary) and moved
+# into default storage once the assembled size and checksum have been verified.
+CHUNKED_UPLOAD_TEMP_DIR = os.getenv('CHUNKED_UPLOAD_TEMP_DIR') or os.path.join(str(BASE_DIR), 'tmp', 'upload_chunks')
+# 5 MB matches the S3 minimum multipart part size, so both modes use the same chunking.
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))
+# When True (and USE_S3), clients upload parts straight to the bucket using presigned URLs.
+DIRECT_UPLOADS_ENABLED = USE_S3 and os.getenv('DIRECT_UPLOADS_ENABLED', 'False') == 'True'
+DIRECT_UPLOAD_URL_EXPIRY = int(os.getenv('DIRECT_UPLOAD_URL_EXPIRY', '3600'))
+
+# Question image derivatives (ib_project/images.py): resized WebP/JPEG widths in pixels.
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1024,1600').split(',') if w.strip()]
+
 
 # -------------------------------------------------------------------
 # AUTHENTICATION
@@ -284,7 +386,8 @@ else:
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication plus the role-version revocation check (accounts/jwt.py).
+        'accounts.jwt.RoleClaimJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -297,7 +400,12 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Tokens carry role/is_staff/role_version claims (accounts/jwt.py).
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.jwt.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.jwt.RoleTokenRefreshSerializer',
 }
+# How long stateless JWT auth may trust a cached role_version before re-reading it.
+ROLE_VERSION_CACHE_TTL = int(os.getenv('ROLE_VERSION_CACHE_TTL', '300'))
 
 # CORS
 if DEBUG:
@@ -3,11 +3,13 @@ import os
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from dashboard.views import student_dashboard_api
+
 from .health import health_check
+from .media import media_token, protected_media
 
 
 def api_root(request):
@@ -41,11 +43,13 @@ urlpatterns = [
 
     # Health
     path('api/health/', health_check, name='health_check'),
+    path('api/media/token/', media_token, name='media_token'),
 
     # API routes
     path('api/', include('exams.urls')),
     path('api/', include('accounts.urls')),  # Includes all accounts API routes
     path('api/', include('learning.urls')),
+    path('api/dashboard/student/', student_dashboard_api, name='student_dashboard_api'),
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
@@ -57,9 +61,10 @@ urlpatterns = [
 ]
 
 # Serve media files.
-# In production this is not ideal for high-traffic deployments, but it unblocks
-# showing uploaded question images/PDFs on Render when not using S3.
+# Local media goes through a permission check; the transfer itself is handed to nginx
+# via X-Accel-Redirect when MEDIA_ACCEL_REDIRECT_PREFIX is set (see ib_project/media.py).
 serve_media = os.getenv('SERVE_MEDIA', 'True') == 'True'
 use_s3 = bool(getattr(settings, 'USE_S3', False))
 if not use_s3 and (settings.DEBUG or serve_media):
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    media_prefix = settings.MEDIA_URL.lstrip('/')
+    urlpatterns += [path(f'{media_prefix}<path:path>', protected_media, name='protected_media')]
@@ -0,0 +1,146 @@
+"""Precomputed per-student assignment feed.
+
+A student's feed is every active assignment with its computed `status`,
+`blocked_by_sequence` and `is_visible`, built in one query and kept in the shared
+cache. It is rebuilt lazily:
+- when an assignment, material or exam it shows changes (learning.signals),
+- when the earliest upcoming start_at/end_at passes: the cache entry's timeout never
+  extends past the next time-window boundary, so time-based status is always current.
+
+MyAssignmentsViewSet serves the feed directly, and start_exam reads its lock state
+instead of re-deriving the sequence lock with a query.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ib_project.db_router import primary_reads
+
+from .models import LearningAssignment
+
+_FEED_KEY = 'learning:feed:{}'
+
+
+def _feed_max_ttl() -> int:
+    return int(getattr(settings, 'ASSIGNMENT_FEED_CACHE_TTL', 600))
+
+
+def _material_info(material) -> dict | None:
+    if material is None:
+        return None
+    try:
+        file_url = material.file.url if material.file else None
+    except Exception:
+        file_url = None
+    return {
+        'id': material.id,
+        'title': material.title,
+        'description': material.description,
+        'type': material.type,
+        # Relative here; made absolute per request in MyAssignmentsViewSet.
+        'file_url': file_url,
+        'url': material.url,
+    }
+
+
+def _exam_info(exam) -> dict | None:
+    if exam is None:
+        return None
+    return {
+        'id': exam.id,
+        'title': exam.title,
+        'duration_seconds': exam.duration_seconds,
+        'total_marks': exam.total_marks,
+        'passing_marks': exam.passing_marks,
+        'topic_id': exam.topic_id,
+    }
+
+
+def build_student_feed(user_id, now=None) -> dict:
+    """Compute a student's feed: items in sequence order plus the next time boundary."""
+    now = now or timezone.now()
+    assignments = (
+        LearningAssignment.objects.filter(assigned_to_id=user_id, is_active=True)
+        .select_related('material', 'exam')
+        .only(
+            'id', 'assigned_by_role', 'assignment_type', 'material', 'exam', 'start_at', 'end_at',
+            'sequence_order', 'priority', 'unlock_override', 'completed_at',
+            'material__id', 'material__title', 'material__description', 'material__type', 'material__file', 'material__url',
+            'exam__id', 'exam__title', 'exam__duration_seconds', 'exam__total_marks', 'exam__passing_marks', 'exam__topic_id',
+        )
+        .order_by('sequence_order', 'id')
+    )
+
+    # Sequence lock: block items after first incomplete MANDATORY teacher assignment.
+    # Admin mandatory items can bypass this (override) to satisfy client requirement.
+    blocked = False
+    items = []
+    next_boundary = None
+    for a in assignments:
+        time_status = a.compute_time_status(now=now)
+
+        is_admin_override = (a.assigned_by_role or '').upper() == 'ADMIN' and a.priority == LearningAssignment.PRIORITY_MANDATORY
+        blocked_for_sequence = False if (a.unlock_override or is_admin_override) else blocked
+
+        status_value = time_status
+        if blocked_for_sequence and time_status in [LearningAssignment.STATUS_PENDING, LearningAssignment.STATUS_LOCKED]:
+            status_value = LearningAssignment.STATUS_LOCKED
+
+        items.append({
+            'id': a.id,
+            'assigned_by_role': a.assigned_by_role,
+            'assignment_type': a.assignment_type,
+            'material': a.material_id,
+            'material_info': _material_info(a.material),
+            'exam': a.exam_id,
+            'exam_info': _exam_info(a.exam),
+            'start_at': a.start_at,
+            'end_at': a.end_at,
+            'sequence_order': a.sequence_order,
+            'priority': a.priority,
+            'unlock_override': a.unlock_override,
+            'completed_at': a.completed_at,
+            'status': status_value,
+            'blocked_by_sequence': blocked_for_sequence,
+            'is_visible': status_value != LearningAssignment.STATUS_LOCKED or a.unlock_override,
+        })
+
+        if a.priority == LearningAssignment.PRIORITY_MANDATORY and a.completed_at is None and not is_admin_override:
+            blocked = True
+        if a.completed_at is None:
+            for boundary in (a.start_at, a.end_at):
+                if boundary and boundary > now and (next_boundary is None or boundary < next_boundary):
+                    next_boundary = boundary
+
+    return {'items': items, 'next_boundary': next_boundary}
+
+
+def student_feed(user_id) -> dict:
+    """The student's feed from cache, rebuilding (and caching) it when missing."""
+    key = _FEED_KEY.format(user_id)
+    feed = cache.get(key)
+    if feed is None:
+        now = timezone.now()
+        with primary_reads():  # shared entry: never fill it from a lagging replica
+            feed = build_student_feed(user_id, now=now)
+        timeout = _feed_max_ttl()
+        if feed['next_boundary'] is not None:
+            timeout = max(1, min(timeout, int((feed['next_boundary'] - now).total_seconds()) + 1))
+        cache.set(key, feed, timeout)
+    return feed
+
+
+def sequence_blocked(user_id, assignment_id) -> bool:
+    """Whether the precomputed feed has `assignment_id` locked by sequence."""
+    for item in student_feed(user_id)['items']:
+        if item['id'] == assignment_id:
+            return item['blocked_by_sequence']
+    return False
+
+
+def invalidate_student_feeds(user_ids) -> None:
+    """Drop cached feeds once the current transaction (if any) commits."""
+    keys = [_FEED_KEY.format(uid) for uid in set(user_ids) if uid is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
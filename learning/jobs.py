@@ -0,0 +1,79 @@
+"""Background job handlers for the learning app (run by exams.jobs)."""
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import CustomUser
+from exams.jobs import report_progress
+
+from .feed import invalidate_student_feeds
+from .models import LearningAssignment
+
+
+def bulk_assign_student_ids(student_ids, group_id, after_id=0):
+    """Ids of the targeted students, ascending, starting after `after_id`."""
+    target = Q(id__in=student_ids or [])
+    if group_id:
+        target |= Q(student_groups__id=group_id)
+    return list(
+        CustomUser.objects.filter(target, role='STUDENT', id__gt=after_id)
+        .order_by('id')
+        .values_list('id', flat=True)
+        .distinct()
+    )
+
+
+def bulk_assign(job):
+    """Create one assignment per targeted student in chunks, skipping existing ones.
+
+    Resumable: the cursor records the last student id processed, and inserts ignore
+    the active-assignment unique constraints, so re-running never duplicates.
+    """
+    p = job.params
+    cursor = job.cursor or {}
+    student_ids = bulk_assign_student_ids(p.get('student_ids'), p.get('group_id'), after_id=cursor.get('after_id', 0))
+    done = cursor.get('done', 0)
+    created = cursor.get('created', 0)
+    total = done + len(student_ids)
+
+    target_field = 'material_id' if p['assignment_type'] == LearningAssignment.TYPE_MATERIAL else 'exam_id'
+    key = {
+        'assignment_type': p['assignment_type'],
+        target_field: p.get('material') if target_field == 'material_id' else p.get('exam'),
+        'sequence_order': p.get('sequence_order') or 0,
+        'is_active': True,
+    }
+    start_at = parse_datetime(p['start_at']) if p.get('start_at') else None
+    end_at = parse_datetime(p['end_at']) if p.get('end_at') else None
+
+    chunk_size = max(1, int(getattr(settings, 'BULK_ASSIGN_CHUNK_SIZE', 1000)))
+    for i in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[i:i + chunk_size]
+        before = LearningAssignment.objects.filter(assigned_to_id__in=chunk, **key).count()
+        LearningAssignment.objects.bulk_create(
+            [
+                LearningAssignment(
+                    assigned_by_id=p.get('assigned_by'),
+                    assigned_by_role=p.get('assigned_by_role', ''),
+                    assigned_to_id=student_id,
+                    assignment_type=p['assignment_type'],
+                    material_id=p.get('material') or None,
+                    exam_id=p.get('exam') or None,
+                    start_at=start_at,
+                    end_at=end_at,
+                    sequence_order=p.get('sequence_order') or 0,
+                    priority=p.get('priority') or LearningAssignment.PRIORITY_OPTIONAL,
+                    unlock_override=bool(p.get('unlock_override') or False),
+                )
+                for student_id in chunk
+            ],
+            batch_size=chunk_size,
+            ignore_conflicts=True,
+        )
+        created += LearningAssignment.objects.filter(assigned_to_id__in=chunk, **key).count() - before
+        done += len(chunk)
+        # bulk_create sends no post_save signals.
+        invalidate_student_feeds(chunk)
+        report_progress(job, done, total=total, cursor={'after_id': chunk[-1], 'done': done, 'created': created})
+
+    return {'students': total, 'created': created, 'already_assigned': total - created}
@@ -0,0 +1,63 @@
+"""Set-based StudentGroup membership changes.
+
+Ids are validated with one IN query per chunk and the M2M through table is written
+with bulk insert/delete diffs, so groups of thousands of students never load or
+save members one row at a time. (Like queryset .update(), these bypass m2m_changed.)
+"""
+from accounts.models import CustomUser
+
+from .models import StudentGroup
+
+# Keeps IN lists under SQLite's bound-parameter limit.
+_CHUNK = 500
+
+Membership = StudentGroup.students.through
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), _CHUNK):
+        yield ids[i:i + _CHUNK]
+
+
+def invalid_student_ids(ids) -> set:
+    """The ids in `ids` that are not existing students."""
+    wanted = set(ids)
+    found = set()
+    for chunk in _chunks(wanted):
+        found.update(CustomUser.objects.filter(id__in=chunk, role='STUDENT').values_list('id', flat=True))
+    return wanted - found
+
+
+def _member_ids(group) -> set:
+    return set(Membership.objects.filter(studentgroup_id=group.pk).values_list('customuser_id', flat=True))
+
+
+def add_members(group, ids) -> int:
+    to_add = set(ids) - _member_ids(group)
+    Membership.objects.bulk_create(
+        [Membership(studentgroup_id=group.pk, customuser_id=uid) for uid in to_add],
+        batch_size=_CHUNK,
+        ignore_conflicts=True,
+    )
+    return len(to_add)
+
+
+def remove_members(group, ids) -> int:
+    removed = 0
+    for chunk in _chunks(set(ids)):
+        removed += Membership.objects.filter(studentgroup_id=group.pk, customuser_id__in=chunk).delete()[0]
+    return removed
+
+
+def replace_members(group, ids) -> tuple[int, int]:
+    """Make the membership exactly `ids`; returns (added, removed)."""
+    wanted = set(ids)
+    current = _member_ids(group)
+    removed = remove_members(group, current - wanted)
+    Membership.objects.bulk_create(
+        [Membership(studentgroup_id=group.pk, customuser_id=uid) for uid in wanted - current],
+        batch_size=_CHUNK,
+        ignore_conflicts=True,
+    )
+    return len(wanted - current), removed
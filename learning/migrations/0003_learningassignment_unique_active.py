@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def archive_duplicate_assignments(apps, schema_editor):
+    """Archive active duplicates, keeping a completed row if any, else the oldest."""
+    LearningAssignment = apps.get_model('learning', 'LearningAssignment')
+    now = timezone.now()
+    for target in ('material', 'exam'):
+        atype = 'MATERIAL' if target == 'material' else 'MOCK_TEST'
+        duplicated = (
+            LearningAssignment.objects.filter(assignment_type=atype, is_active=True, **{f'{target}__isnull': False})
+            .values('assigned_to_id', f'{target}_id', 'sequence_order')
+            .annotate(n=Count('id'))
+            .filter(n__gt=1)
+        )
+        for row in list(duplicated):
+            ids = list(
+                LearningAssignment.objects.filter(
+                    assignment_type=atype,
+                    is_active=True,
+                    assigned_to_id=row['assigned_to_id'],
+                    sequence_order=row['sequence_order'],
+                    **{f'{target}_id': row[f'{target}_id']},
+                )
+                .order_by('id')
+                .values_list('id', 'completed_at')
+            )
+            keep = next((pk for pk, done in ids if done is not None), ids[0][0])
+            LearningAssignment.objects.filter(id__in=[pk for pk, _ in ids if pk != keep]).update(
+                is_active=False, archived_at=now
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_backgroundjob'),
+        ('learning', '0002_learningassignment_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(archive_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='learningassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('assignment_type', 'MATERIAL'), ('is_active', True)), fields=('assigned_to', 'material', 'sequence_order'), name='learning_assignment_unique_material'),
+        ),
+        migrations.AddConstraint(
+            model_name='learningassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('assignment_type', 'MOCK_TEST'), ('is_active', True)), fields=('assigned_to', 'exam', 'sequence_order'), name='learning_assignment_unique_mock_test'),
+        ),
+    ]
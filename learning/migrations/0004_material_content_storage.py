@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:20
+
+import ib_project.content_store
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0003_learningassignment_unique_active'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='material',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=ib_project.content_store.get_content_storage, upload_to='materials/'),
+        ),
+    ]
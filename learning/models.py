@@ -4,6 +4,8 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from ib_project.content_store import get_content_storage
+
 
 class Material(models.Model):
     TYPE_PDF = 'PDF'
@@ -25,7 +27,7 @@ class Material(models.Model):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
 
     # Either file or url is used depending on type.
-    file = models.FileField(upload_to='materials/', blank=True, null=True)
+    file = models.FileField(upload_to='materials/', storage=get_content_storage, blank=True, null=True)
     url = models.URLField(blank=True)
 
     # Tagging (keep it minimal; can expand later)
@@ -128,6 +130,19 @@ class LearningAssignment(models.Model):
             models.Index(fields=['assigned_by_role', 'priority']),
             models.Index(fields=['is_active', 'assigned_by']),
         ]
+        constraints = [
+            # Re-running a bulk assignment must not duplicate active assignments.
+            models.UniqueConstraint(
+                fields=['assigned_to', 'material', 'sequence_order'],
+                condition=models.Q(assignment_type='MATERIAL', is_active=True),
+                name='learning_assignment_unique_material',
+            ),
+            models.UniqueConstraint(
+                fields=['assigned_to', 'exam', 'sequence_order'],
+                condition=models.Q(assignment_type='MOCK_TEST', is_active=True),
+                name='learning_assignment_unique_mock_test',
+            ),
+        ]
 
     def clean(self):
         # Exactly one target should be set.
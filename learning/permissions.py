@@ -1,38 +1,34 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-
-def _role(user):
-    return (getattr(user, 'role', '') or '').upper()
+from accounts.roles import is_admin, is_student, is_teacher, is_teacher_or_admin
 
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and (_role(request.user) == 'ADMIN' or request.user.is_staff))
+        return is_admin(request.user)
 
 
 class IsTeacher(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and _role(request.user) == 'TEACHER')
+        return is_teacher(request.user)
 
 
 class IsAdminOrTeacher(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and (_role(request.user) in ['ADMIN', 'TEACHER'] or request.user.is_staff))
+        return is_teacher_or_admin(request.user)
 
 
 class IsStudent(BasePermission):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and _role(request.user) == 'STUDENT')
+        return is_student(request.user)
 
 
 class ReadOnlyForTeacher(BasePermission):
     """Allow safe methods for teacher, full for admin."""
 
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if _role(request.user) == 'ADMIN' or request.user.is_staff:
+        if is_admin(request.user):
             return True
-        if _role(request.user) == 'TEACHER':
+        if is_teacher(request.user):
             return request.method in SAFE_METHODS
         return False
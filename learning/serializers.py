@@ -41,28 +41,57 @@ class MaterialSerializer(serializers.ModelSerializer):
 
 
 class StudentGroupSerializer(serializers.ModelSerializer):
-    student_ids = serializers.PrimaryKeyRelatedField(source='students', many=True, read_only=True)
+    # Annotated by StudentGroupViewSet; members are listed at /student-groups/<id>/members/.
+    student_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = StudentGroup
-        fields = ['id', 'name', 'description', 'created_by', 'created_at', 'student_ids']
-        read_only_fields = ['created_by', 'created_at', 'student_ids']
+        fields = ['id', 'name', 'description', 'created_by', 'created_at', 'student_count']
+        read_only_fields = ['created_by', 'created_at', 'student_count']
 
 
 class StudentGroupUpdateSerializer(serializers.ModelSerializer):
-    students = serializers.PrimaryKeyRelatedField(
-        many=True,
-        required=False,
-        queryset=CustomUser.objects.none(),
-    )
+    # Optional full replacement of the membership, applied as an insert/delete diff.
+    students = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
 
     class Meta:
         model = StudentGroup
         fields = ['id', 'name', 'description', 'students']
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['students'].queryset = CustomUser.objects.filter(role='STUDENT')
+    def validate_students(self, value):
+        from .membership import invalid_student_ids
+
+        invalid = invalid_student_ids(value)
+        if invalid:
+            raise serializers.ValidationError(f'Not students: {sorted(invalid)[:20]}')
+        return value
+
+    def update(self, instance, validated_data):
+        from .membership import replace_members
+
+        student_ids = validated_data.pop('students', None)
+        instance = super().update(instance, validated_data)
+        if student_ids is not None:
+            replace_members(instance, student_ids)
+        return instance
+
+
+class StudentGroupMemberSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'first_name', 'last_name', 'email']
+
+
+class StudentGroupMembershipSerializer(serializers.Serializer):
+    student_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=True)
+
+    def validate_student_ids(self, value):
+        from .membership import invalid_student_ids
+
+        invalid = invalid_student_ids(value)
+        if invalid:
+            raise serializers.ValidationError(f'Not students: {sorted(invalid)[:20]}')
+        return value
 
 
 class LearningAssignmentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,25 @@
+"""Model signal hooks for the learning app."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from exams.models import Exam
+
+from .feed import invalidate_student_feeds
+from .models import LearningAssignment, Material
+
+
+@receiver(post_save, sender=LearningAssignment)
+@receiver(post_delete, sender=LearningAssignment)
+def _assignment_changed(sender, instance, **kwargs):
+    # Completion, unlock, archive/restore and edits all change the student's feed.
+    invalidate_student_feeds([instance.assigned_to_id])
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Exam)
+def _feed_target_changed(sender, instance, **kwargs):
+    # Feeds embed material/exam titles; refresh the students who see this one.
+    field = 'material' if sender is Material else 'exam'
+    invalidate_student_feeds(
+        LearningAssignment.objects.filter(**{field: instance}, is_active=True).values_list('assigned_to_id', flat=True)
+    )
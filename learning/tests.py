@@ -0,0 +1,158 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from exams.jobs import enqueue, run_job
+from exams.models import Exam, ExamQuestion, Question, Topic
+
+from .feed import build_student_feed
+from .models import LearningAssignment, StudentGroup
+
+User = get_user_model()
+
+
+class AssignmentFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username='feed_student', password='pw', role='STUDENT')
+        self.teacher = User.objects.create_user(username='feed_teacher', password='pw', role='TEACHER')
+        topic = Topic.objects.create(name='Optics')
+        self.exam = Exam.objects.create(title='Optics Mock', topic=topic, duration_seconds=600)
+        q = Question.objects.create(topic=topic, type='MCQ', statement='n?', choices={'A': '1'}, correct_answers=['A'])
+        ExamQuestion.objects.create(exam=self.exam, question=q, order=1)
+
+        def assign(order, **extra):
+            return LearningAssignment.objects.create(
+                assigned_by=self.teacher, assigned_by_role='TEACHER', assigned_to=self.student,
+                assignment_type=LearningAssignment.TYPE_MOCK_TEST, exam=self.exam, sequence_order=order, **extra,
+            )
+
+        self.first = assign(1, priority=LearningAssignment.PRIORITY_MANDATORY)
+        self.second = assign(2)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+
+    def test_feed_is_cached_and_start_exam_uses_its_lock_state(self):
+        res = self.client.get('/api/my/assignments/')
+        self.assertEqual([(i['id'], i['blocked_by_sequence']) for i in res.json()], [(self.first.id, False), (self.second.id, True)])
+        with self.assertNumQueries(0):
+            self.client.get('/api/my/assignments/')
+
+        start_url = reverse('start_exam', args=[self.exam.id])
+        self.assertEqual(self.client.post(start_url, {'assignment_id': self.second.id}, format='json').status_code, 423)
+
+        # Completing the mandatory assignment invalidates the feed and unlocks the next one.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.completed_at = timezone.now()
+            self.first.save(update_fields=['completed_at', 'updated_at'])
+        self.assertFalse(self.client.get('/api/my/assignments/').json()[1]['blocked_by_sequence'])
+        self.assertEqual(self.client.post(start_url, {'assignment_id': self.second.id}, format='json').status_code, 200)
+
+    def test_feed_expires_at_the_next_time_boundary(self):
+        soon = timezone.now() + timedelta(minutes=5)
+        self.second.start_at = soon
+        self.second.save(update_fields=['start_at'])
+        feed = build_student_feed(self.student.id)
+        self.assertEqual(feed['next_boundary'], soon)
+        self.assertEqual(feed['items'][1]['status'], 'LOCKED')
+
+
+class BulkAssignmentJobTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='bulk_teacher', password='pw', role='TEACHER')
+        self.students = [User.objects.create_user(username=f'bulk_s{i}', password='pw', role='STUDENT') for i in range(5)]
+        self.group = StudentGroup.objects.create(name='Cohort', created_by=self.teacher)
+        self.group.students.set(self.students[:4])
+        topic = Topic.objects.create(name='Bulk')
+        self.exam = Exam.objects.create(title='Bulk Mock', topic=topic)
+        self.payload = {'assignment_type': 'MOCK_TEST', 'exam': self.exam.id, 'group_id': self.group.id, 'student_ids': [self.students[4].id]}
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_small_cohort_finishes_inline_and_rerun_is_idempotent(self):
+        res = self.client.post('/api/assignments/bulk/', self.payload, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['status'], 'succeeded')
+        self.assertEqual(res.data['result'], {'students': 5, 'created': 5, 'already_assigned': 0})
+
+        again = self.client.post('/api/assignments/bulk/', self.payload, format='json')
+        self.assertEqual(again.data['result'], {'students': 5, 'created': 0, 'already_assigned': 5})
+        self.assertEqual(LearningAssignment.objects.filter(exam=self.exam).count(), 5)
+
+    def test_large_cohort_runs_in_worker_with_progress(self):
+        with override_settings(BULK_ASSIGN_INLINE_LIMIT=2, BULK_ASSIGN_CHUNK_SIZE=2, BACKGROUND_JOBS_EAGER=False):
+            res = self.client.post('/api/assignments/bulk/', self.payload, format='json')
+            self.assertEqual(res.status_code, 202)
+            self.assertEqual(res.data['status'], 'queued')
+            self.assertEqual(res.data['progress'], {'done': 0, 'total': 5})
+            call_command('run_jobs', once=True, stdout=io.StringIO())
+
+        job = self.client.get(f"/api/jobs/{res.data['id']}/").data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['progress'], {'done': 5, 'total': 5})
+        self.assertEqual(job['result']['created'], 5)
+
+        other = APIClient()
+        other.force_authenticate(user=self.students[0])
+        self.assertEqual(other.get(f"/api/jobs/{res.data['id']}/").status_code, 404)
+
+    def test_interrupted_job_resumes_from_cursor(self):
+        ids = sorted(s.id for s in self.students)
+        job = enqueue('learning.bulk_assign', {'assignment_type': 'MOCK_TEST', 'exam': self.exam.id, 'student_ids': ids}, total=5)
+        # Pretend a previous run handled the first two students and then died.
+        job.cursor = {'after_id': ids[1], 'done': 2, 'created': 2}
+        job.save(update_fields=['cursor'])
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'students': 5, 'created': 5, 'already_assigned': 0})
+        self.assertEqual(set(LearningAssignment.objects.values_list('assigned_to_id', flat=True)), set(ids[2:]))
+
+
+class StudentGroupMembershipTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='grp_teacher', password='pw', role='TEACHER')
+        self.students = [User.objects.create_user(username=f'grp_s{i}', password='pw', role='STUDENT') for i in range(6)]
+        self.group = StudentGroup.objects.create(name='Set A', created_by=self.teacher)
+        self.group.students.set(self.students[:3])
+        self.url = f'/api/student-groups/{self.group.id}/members/'
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _ids(self, users):
+        return [u.id for u in users]
+
+    def test_list_is_annotated_and_members_are_paginated(self):
+        with self.assertNumQueries(1):
+            res = self.client.get('/api/student-groups/')
+        self.assertEqual(res.json()[0]['student_count'], 3)
+        self.assertNotIn('student_ids', res.json()[0])
+
+        page = self.client.get(self.url, {'page_size': 2}).json()
+        self.assertEqual(page['count'], 3)
+        self.assertEqual([m['id'] for m in page['results']], self._ids(self.students[:2]))
+        self.assertIsNotNone(page['next'])
+
+    def test_add_remove_replace_write_diffs(self):
+        res = self.client.post(self.url + 'add/', {'student_ids': self._ids(self.students[2:5])}, format='json')
+        self.assertEqual(res.json(), {'added': 2, 'student_count': 5})
+
+        res = self.client.post(self.url + 'remove/', {'student_ids': self._ids(self.students[:1])}, format='json')
+        self.assertEqual(res.json(), {'removed': 1, 'student_count': 4})
+
+        # Group lookup, one IN validation, current ids, one DELETE, one INSERT, recount.
+        with self.assertNumQueries(6):
+            res = self.client.put(self.url, {'student_ids': self._ids(self.students[3:])}, format='json')
+        self.assertEqual(res.json(), {'added': 1, 'removed': 2, 'student_count': 3})
+        self.assertEqual(set(self.group.students.values_list('id', flat=True)), set(self._ids(self.students[3:])))
+
+    def test_non_students_are_rejected_in_one_request(self):
+        res = self.client.post(self.url + 'add/', {'student_ids': [self.teacher.id, self.students[5].id]}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(self.group.students.count(), 3)
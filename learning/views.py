@@ -1,19 +1,30 @@
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.utils import timezone
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.models import CustomUser
+from accounts.roles import is_admin
+from exams.jobs import enqueue, job_payload, run_job
+from exams.topic_tree import topic_q, wants_descendants
 
+from .feed import student_feed
+from .jobs import bulk_assign_student_ids
+from .membership import add_members, remove_members, replace_members
 from .models import LearningAssignment, Material, StudentGroup
 from .permissions import IsAdminOrTeacher, IsStudent
 from .serializers import (
     LearningAssignmentCreateBulkSerializer,
     LearningAssignmentSerializer,
     MaterialSerializer,
+    StudentGroupMemberSerializer,
+    StudentGroupMembershipSerializer,
     StudentGroupSerializer,
     StudentGroupUpdateSerializer,
 )
@@ -36,12 +47,18 @@ class MaterialViewSet(viewsets.ModelViewSet):
         if curriculum:
             qs = qs.filter(curriculum_id=curriculum)
         if topic:
-            qs = qs.filter(topic_id=topic)
+            qs = qs.filter(topic_q('topic', topic, wants_descendants(self.request)))
         if mtype:
             qs = qs.filter(type=mtype)
         return qs
 
 
+class StudentGroupMemberPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
 class StudentGroupViewSet(viewsets.ModelViewSet):
     queryset = StudentGroup.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrTeacher]
@@ -54,13 +71,46 @@ class StudentGroupViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Keep it simple: admin sees all; teacher sees groups they created.
         user = self.request.user
-        if getattr(user, 'role', '') == 'ADMIN' or user.is_staff:
-            return StudentGroup.objects.all()
-        return StudentGroup.objects.filter(created_by=user)
+        qs = StudentGroup.objects.annotate(student_count=Count('students'))
+        if is_admin(user):
+            return qs
+        return qs.filter(created_by=user)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def _membership_change(self, request, apply):
+        group = self.get_object()
+        s = StudentGroupMembershipSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        changes = apply(group, s.validated_data['student_ids'])
+        changes['student_count'] = StudentGroup.students.through.objects.filter(studentgroup_id=group.pk).count()
+        return Response(changes)
+
+    @action(detail=True, methods=['get', 'put'], url_path='members')
+    def members(self, request, pk=None):
+        """GET: paginated member list (?page=, ?page_size=). PUT: replace membership."""
+        if request.method == 'PUT':
+            def replace(group, ids):
+                added, removed = replace_members(group, ids)
+                return {'added': added, 'removed': removed}
+
+            return self._membership_change(request, replace)
+
+        group = self.get_object()
+        qs = group.students.order_by('id').only('id', 'username', 'first_name', 'last_name', 'email')
+        paginator = StudentGroupMemberPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(StudentGroupMemberSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['post'], url_path='members/add')
+    def members_add(self, request, pk=None):
+        return self._membership_change(request, lambda group, ids: {'added': add_members(group, ids)})
+
+    @action(detail=True, methods=['post'], url_path='members/remove')
+    def members_remove(self, request, pk=None):
+        return self._membership_change(request, lambda group, ids: {'removed': remove_members(group, ids)})
+
 
 class LearningAssignmentViewSet(viewsets.ModelViewSet):
     queryset = LearningAssignment.objects.all()
@@ -75,8 +125,7 @@ class LearningAssignmentViewSet(viewsets.ModelViewSet):
         )
 
         user = self.request.user
-        role = (getattr(user, 'role', '') or '').upper()
-        if not (role == 'ADMIN' or user.is_staff):
+        if not is_admin(user):
             # Teacher can only see assignments they created.
             qs = qs.filter(assigned_by=user)
 
@@ -96,51 +145,59 @@ class LearningAssignmentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         role = (getattr(self.request.user, 'role', '') or '').upper()
-        serializer.save(assigned_by=self.request.user, assigned_by_role=role)
+        try:
+            with transaction.atomic():
+                serializer.save(assigned_by=self.request.user, assigned_by_role=role)
+        except IntegrityError:
+            raise ValidationError({'detail': 'This student already has this assignment at this sequence position.'})
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'detail': 'This student already has this assignment at this sequence position.'})
 
     @action(detail=False, methods=['post'], url_path='bulk')
     def bulk_create(self, request):
-        """Create assignments for a list of students and/or a student group."""
+        """Assign to a list of students and/or a student group as a background job.
+
+        Small cohorts finish within the request (200); larger ones return 202 with the
+        job to poll at /api/jobs/<id>/. Either way the body is the job summary, and
+        re-submitting the same assignment skips students who already have it.
+        """
         s = LearningAssignmentCreateBulkSerializer(data=request.data, context={'request': request})
         s.is_valid(raise_exception=True)
         data = s.validated_data
 
-        student_ids = set(data.get('student_ids') or [])
         group_id = data.get('group_id')
-        if group_id:
-            try:
-                group = StudentGroup.objects.get(id=group_id)
-            except StudentGroup.DoesNotExist:
-                return Response({'detail': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
-            student_ids.update(group.students.values_list('id', flat=True))
-
-        students = list(CustomUser.objects.filter(id__in=student_ids, role='STUDENT'))
-        if not students:
+        if group_id and not StudentGroup.objects.filter(id=group_id).exists():
+            return Response({'detail': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        student_ids = bulk_assign_student_ids(data.get('student_ids'), group_id)
+        if not student_ids:
             return Response({'detail': 'No students found'}, status=status.HTTP_400_BAD_REQUEST)
 
-        role = (getattr(request.user, 'role', '') or '').upper()
-
-        created = []
-        with transaction.atomic():
-            for student in students:
-                created.append(
-                    LearningAssignment(
-                        assigned_by=request.user,
-                        assigned_by_role=role,
-                        assigned_to=student,
-                        assignment_type=data['assignment_type'],
-                        material_id=data.get('material') or None,
-                        exam_id=data.get('exam') or None,
-                        start_at=data.get('start_at'),
-                        end_at=data.get('end_at'),
-                        sequence_order=data.get('sequence_order') or 0,
-                        priority=data.get('priority') or LearningAssignment.PRIORITY_OPTIONAL,
-                        unlock_override=bool(data.get('unlock_override') or False),
-                    )
-                )
-            LearningAssignment.objects.bulk_create(created)
-
-        return Response(LearningAssignmentSerializer(created, many=True, context={'request': request}).data)
+        params = {
+            'assigned_by': request.user.id,
+            'assigned_by_role': (getattr(request.user, 'role', '') or '').upper(),
+            'student_ids': sorted(set(data.get('student_ids') or [])),
+            'group_id': group_id,
+            'assignment_type': data['assignment_type'],
+            'material': data.get('material') or None,
+            'exam': data.get('exam') or None,
+            'start_at': data['start_at'].isoformat() if data.get('start_at') else None,
+            'end_at': data['end_at'].isoformat() if data.get('end_at') else None,
+            'sequence_order': data.get('sequence_order') or 0,
+            'priority': data.get('priority') or LearningAssignment.PRIORITY_OPTIONAL,
+            'unlock_override': bool(data.get('unlock_override') or False),
+        }
+        job = enqueue('learning.bulk_assign', params, user=request.user, total=len(student_ids))
+        if len(student_ids) <= getattr(settings, 'BULK_ASSIGN_INLINE_LIMIT', 200):
+            run_job(job.pk)
+        job.refresh_from_db()
+        finished = job.status in ('succeeded', 'failed')
+        return Response(job_payload(job), status=status.HTTP_200_OK if finished else status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['patch'], url_path='unlock')
     def unlock(self, request, pk=None):
@@ -162,7 +219,14 @@ class LearningAssignmentViewSet(viewsets.ModelViewSet):
         obj = self.get_object()
         obj.is_active = True
         obj.archived_at = None
-        obj.save(update_fields=['is_active', 'archived_at', 'updated_at'])
+        try:
+            with transaction.atomic():
+                obj.save(update_fields=['is_active', 'archived_at', 'updated_at'])
+        except IntegrityError:
+            return Response(
+                {'detail': 'An active copy of this assignment already exists.'},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(self.get_serializer(obj).data)
 
 
@@ -170,43 +234,13 @@ class MyAssignmentsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def list(self, request):
-        now = timezone.now()
-        assignments = list(
-            LearningAssignment.objects.filter(assigned_to=request.user, is_active=True)
-            .select_related('material', 'exam', 'assigned_by')
-            .order_by('sequence_order', 'id')
-        )
-
-        completed_ids = {a.id for a in assignments if a.completed_at is not None}
-
-        # Sequence lock: block items after first incomplete MANDATORY teacher assignment.
-        # Admin mandatory items can bypass this (override) to satisfy client requirement.
-        blocked = False
+        # Served from the precomputed, cached feed (see learning.feed).
         result = []
-        for a in assignments:
-            time_status = a.compute_time_status(now=now)
-
-            is_admin_override = (a.assigned_by_role or '').upper() == 'ADMIN' and a.priority == LearningAssignment.PRIORITY_MANDATORY
-            if a.unlock_override:
-                blocked_for_sequence = False
-            elif is_admin_override:
-                blocked_for_sequence = False
-            else:
-                blocked_for_sequence = blocked
-
-            status_value = time_status
-            if blocked_for_sequence and time_status in [LearningAssignment.STATUS_PENDING, LearningAssignment.STATUS_LOCKED]:
-                status_value = LearningAssignment.STATUS_LOCKED
-
-            payload = LearningAssignmentSerializer(a, context={'request': request}).data
-            payload['status'] = status_value
-            payload['blocked_by_sequence'] = blocked_for_sequence
-            payload['is_visible'] = status_value != LearningAssignment.STATUS_LOCKED or a.unlock_override
-            result.append(payload)
-
-            if a.priority == LearningAssignment.PRIORITY_MANDATORY and a.id not in completed_ids and not is_admin_override:
-                blocked = True
-
+        for item in student_feed(request.user.id)['items']:
+            info = item['material_info']
+            if info and info['file_url']:
+                item = {**item, 'material_info': {**info, 'file_url': request.build_absolute_uri(info['file_url'])}}
+            result.append(item)
         return Response(result)
 
     @action(detail=True, methods=['post'], url_path='complete')
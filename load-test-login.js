@@ -0,0 +1,47 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { Rate } from 'k6/metrics';
+
+// Login burst: VUS users sign in at the same time, ITERATIONS times each.
+// Prepare the users first: python manage.py bench_login --users 200
+// (the command also prints the password hasher's cost, which is reported separately
+// because it is deliberate CPU work rather than query/serialization overhead).
+
+const errorRate = new Rate('errors');
+
+const VUS = parseInt(__ENV.VUS || '200', 10);
+const ITERATIONS = parseInt(__ENV.ITERATIONS || '5', 10);
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:8000';
+const PASSWORD = __ENV.PASSWORD || 'BenchPass123!';
+
+export const options = {
+  scenarios: {
+    login_burst: {
+      executor: 'per-vu-iterations',
+      vus: VUS,
+      iterations: ITERATIONS,
+      maxDuration: '5m',
+    },
+  },
+  thresholds: {
+    'http_req_duration{name:login}': ['p(95)<1500'],
+    errors: ['rate<0.01'],
+  },
+  summaryTrendStats: ['avg', 'med', 'p(90)', 'p(95)', 'p(99)', 'max'],
+};
+
+export default function () {
+  const index = __VU - 1;
+  // Alternate username and mixed-case email logins to exercise both lookup paths.
+  const username = __ITER % 2 === 0
+    ? `bench_login_${index}`
+    : `Bench_Login_${index}@Example.com`;
+
+  const res = http.post(`${BASE_URL}/api/auth/login/`, JSON.stringify({ username, password: PASSWORD }), {
+    headers: { 'Content-Type': 'application/json' },
+    tags: { name: 'login' },
+  });
+  check(res, {
+    'logged in': (r) => r.status === 200 && !!r.json('access'),
+  }) || errorRate.add(1);
+}
@@ -0,0 +1,40 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { SharedArray } from 'k6/data';
+import { Rate } from 'k6/metrics';
+
+// Class-wide exam start: every student POSTs start_exam at the same moment.
+// Prepare data first: python manage.py bench_start_exam --students 500
+// Throughput is reported by k6 as http_reqs (per second) over the burst.
+
+const errorRate = new Rate('errors');
+
+const DATA = JSON.parse(open(__ENV.DATA || './bench-start-exam.json'));
+const TOKENS = new SharedArray('tokens', () => DATA.tokens);
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:8000';
+
+export const options = {
+  scenarios: {
+    class_start: {
+      executor: 'per-vu-iterations',
+      vus: TOKENS.length,
+      iterations: 1,
+      maxDuration: '2m',
+    },
+  },
+  thresholds: {
+    'http_req_duration{name:start_exam}': ['p(95)<1000'],
+    errors: ['rate<0.01'],
+  },
+  summaryTrendStats: ['avg', 'med', 'p(90)', 'p(95)', 'p(99)', 'max'],
+};
+
+export default function () {
+  const res = http.post(`${BASE_URL}/api/exams/${DATA.exam_id}/start/`, null, {
+    headers: { Authorization: `Bearer ${TOKENS[__VU - 1]}` },
+    tags: { name: 'start_exam' },
+  });
+  check(res, {
+    'attempt started': (r) => r.status === 200 && !!r.json('attempt_id'),
+  }) || errorRate.add(1);
+}
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from dashboard.student_stats import invalidate_student_summaries
+from dashboard.teacher_stats import invalidate_teacher_dashboards
+from questionpapers.models import Evaluation, PaperAttempt, QuestionPaper
+from questionpapers.scoring import mcq_scores, paper_max_score
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute score/max_score of submitted question paper attempts, e.g. after an "
+        "answer key or question marks changed. Attempts with a teacher evaluation keep "
+        "the teacher's marks; only their max_score is refreshed. Cached teacher and "
+        "student dashboards of the rescored attempts are dropped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paper', type=int, action='append', help='Paper id to rescore (repeatable). Default: all papers.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many attempts would change.')
+
+    def handle(self, *args, **options):
+        papers = QuestionPaper.objects.order_by('id')
+        if options['paper']:
+            papers = papers.filter(id__in=options['paper'])
+            missing = set(options['paper']) - set(papers.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'Question paper(s) not found: {sorted(missing)}')
+
+        changed_total = 0
+        owners, students = set(), set()
+        for paper_id, owner_id in papers.values_list('id', 'created_by_id'):
+            max_score = paper_max_score(paper_id)
+            scores = mcq_scores(paper_id)
+            changed = []
+            attempts = (
+                PaperAttempt.objects.filter(paper_id=paper_id, submitted=True)
+                .only('id', 'user_id', 'score', 'max_score')
+                .annotate(evaluated=Exists(Evaluation.objects.filter(attempt=OuterRef('pk'))))
+            )
+            for attempt in attempts:
+                score = attempt.score if attempt.evaluated else scores.get(attempt.user_id, 0.0)
+                if (attempt.score, attempt.max_score) != (score, max_score):
+                    attempt.score, attempt.max_score = score, max_score
+                    changed.append(attempt)
+            if changed and not options['dry_run']:
+                PaperAttempt.objects.bulk_update(changed, ['score', 'max_score'], batch_size=500)
+                # bulk_update sends no post_save, so dashboard.signals never sees these.
+                owners.add(owner_id)
+                students.update(attempt.user_id for attempt in changed)
+            changed_total += len(changed)
+        invalidate_teacher_dashboards(owners)
+        invalidate_student_summaries(students)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Would rescore {changed_total} attempts.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rescored {changed_total} attempts.'))
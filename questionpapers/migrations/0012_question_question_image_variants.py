@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questionpapers', '0011_alter_questionpaper_paper_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='question_image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
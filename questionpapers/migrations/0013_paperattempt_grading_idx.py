@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questionpapers', '0012_question_question_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paperattempt',
+            index=models.Index(fields=['paper', 'submitted', 'id'], name='qp_attempt_grading_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:20
+
+import ib_project.content_store
+import questionpapers.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questionpapers', '0013_paperattempt_grading_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='answer',
+            name='answer_file',
+            field=models.FileField(blank=True, null=True, storage=ib_project.content_store.get_content_storage, upload_to=questionpapers.models.answer_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='paperattempt',
+            name='answer_file',
+            field=models.FileField(blank=True, null=True, storage=ib_project.content_store.get_content_storage, upload_to=questionpapers.models.answer_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='question_image',
+            field=models.ImageField(storage=ib_project.content_store.get_content_storage, upload_to='question_images/'),
+        ),
+    ]
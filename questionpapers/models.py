@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.template.defaultfilters import slugify
 import os
 from datetime import datetime
+from ib_project.content_store import get_content_storage
 
 # -------------------------------
 # SUBJECT MODEL
@@ -106,7 +107,8 @@ class Question(models.Model):
 
     paper = models.ForeignKey(QuestionPaper, on_delete=models.CASCADE, related_name='questions')
     order = models.PositiveIntegerField(default=1)
-    question_image = models.ImageField(upload_to='question_images/')
+    question_image = models.ImageField(upload_to='question_images/', storage=get_content_storage)
+    question_image_variants = models.JSONField(default=dict, blank=True)  # see ib_project.images
     question_text = models.TextField(blank=True)
     question_type = models.CharField(max_length=10, choices=QUESTION_TYPE_CHOICES, default='MCQ')
     difficulty_level = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, blank=True, null=True)
@@ -124,6 +126,19 @@ class Question(models.Model):
     class Meta:
         ordering = ['order']
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from ib_project.images import sync_image_variants
+
+        sync_image_variants(self, 'question_image', 'question_image_variants')
+
+    @property
+    def question_image_set(self):
+        """Responsive src/srcset for templates (falls back to the original upload)."""
+        from ib_project.images import responsive_image
+
+        return responsive_image(self.question_image, self.question_image_variants)
+
     def __str__(self):
         return f"{self.paper.title} - Q{self.order}"
 
@@ -155,7 +170,7 @@ class Answer(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     selected_option = models.CharField(max_length=1, blank=True, null=True)
-    answer_file = models.FileField(upload_to=answer_upload_path, blank=True, null=True)
+    answer_file = models.FileField(upload_to=answer_upload_path, storage=get_content_storage, blank=True, null=True)
     saved_at = models.DateTimeField(auto_now=True)
     submitted = models.BooleanField(default=False)
 
@@ -175,13 +190,17 @@ class PaperAttempt(models.Model):
     started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField(null=True, blank=True)
     auto_submitted = models.BooleanField(default=False)
-    answer_file = models.FileField(upload_to=answer_upload_path, null=True, blank=True)
+    answer_file = models.FileField(upload_to=answer_upload_path, storage=get_content_storage, null=True, blank=True)
     submitted = models.BooleanField(default=False)
     score = models.FloatField(null=True, blank=True)
     max_score = models.FloatField(null=True, blank=True)
 
     class Meta:
         unique_together = ('paper', 'user')
+        indexes = [
+            # Grading queue: submitted attempts of a paper in id order ("next ungraded").
+            models.Index(fields=['paper', 'submitted', 'id'], name='qp_attempt_grading_idx'),
+        ]
 
     def deadline(self):
         return self.started_at + timezone.timedelta(minutes=self.paper.duration_minutes)
@@ -0,0 +1,56 @@
+"""Cached question index for one-question-at-a-time paper navigation.
+
+The index is the paper's title/duration plus its question ids in display order. It is
+kept in the shared cache and dropped whenever a question or the paper changes
+(questionpapers.signals), so take_paper/load_question/save_answer resolve a position
+to a question id without reloading every question of the paper.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ib_project.db_router import primary_reads
+
+from .models import Question, QuestionPaper
+
+_INDEX_KEY = 'questionpapers:index:{}'
+
+
+def _index_ttl() -> int:
+    return int(getattr(settings, 'QUESTION_PAPER_INDEX_CACHE_TTL', 3600))
+
+
+def build_paper_index(paper_id) -> dict | None:
+    paper = QuestionPaper.objects.filter(pk=paper_id).values('id', 'title', 'duration_minutes').first()
+    if paper is None:
+        return None
+    paper['question_ids'] = list(
+        Question.objects.filter(paper_id=paper_id).order_by('order', 'id').values_list('id', flat=True)
+    )
+    return paper
+
+
+def paper_index(paper_id) -> dict | None:
+    """The paper's index from cache, rebuilding it when missing. None if the paper does not exist."""
+    key = _INDEX_KEY.format(paper_id)
+    index = cache.get(key)
+    if index is None:
+        with primary_reads():  # shared entry: never fill it from a lagging replica
+            index = build_paper_index(paper_id)
+        if index is not None:
+            cache.set(key, index, _index_ttl())
+    return index
+
+
+def question_position(index: dict, q_order) -> tuple[int, int]:
+    """(0-based position, question id) for a 1-based q_order, clamped to the paper."""
+    question_ids = index['question_ids']
+    q_index = max(0, min(int(q_order) - 1, len(question_ids) - 1))
+    return q_index, question_ids[q_index]
+
+
+def invalidate_paper_index(paper_ids) -> None:
+    """Drop cached indexes once the current transaction (if any) commits."""
+    keys = [_INDEX_KEY.format(pid) for pid in set(paper_ids) if pid is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
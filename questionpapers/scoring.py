@@ -0,0 +1,36 @@
+"""Auto-scoring of question paper attempts.
+
+MCQ answers are marked in SQL: one aggregate for the paper's maximum score and one
+grouped, conditional Sum over matching answers, whatever the number of questions or
+students. final_submit scores a single student; `manage.py rescore_papers` reuses the
+same functions for every attempt on a paper after its answer key or marks change.
+"""
+from django.db.models import F, Sum
+from django.db.models.functions import Upper
+
+from .models import Answer, Question
+
+
+def paper_max_score(paper_id) -> float:
+    total = Question.objects.filter(paper_id=paper_id).aggregate(total=Sum('marks'))['total']
+    return float(total or 0)
+
+
+def mcq_scores(paper_id, user_ids=None) -> dict[int, float]:
+    """Marks obtained on MCQs per user (users with no correct answer are absent)."""
+    answers = Answer.objects.filter(
+        question__paper_id=paper_id,
+        question__question_type='MCQ',
+        question__correct_option__gt='',
+        selected_option__gt='',
+    )
+    if user_ids is not None:
+        answers = answers.filter(user_id__in=user_ids)
+    rows = (
+        answers.annotate(selected=Upper('selected_option'), key=Upper('question__correct_option'))
+        .filter(selected=F('key'))
+        .values('user_id')
+        .annotate(obtained=Sum('question__marks'))
+        .order_by()
+    )
+    return {row['user_id']: float(row['obtained'] or 0) for row in rows}
@@ -0,0 +1,20 @@
+"""Model signal hooks for the questionpapers app."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Question, QuestionPaper
+from .navigation import invalidate_paper_index
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def _question_changed(sender, instance, **kwargs):
+    # Adds, deletes and re-ordering all change the paper's question index.
+    invalidate_paper_index([instance.paper_id])
+
+
+@receiver(post_save, sender=QuestionPaper)
+@receiver(post_delete, sender=QuestionPaper)
+def _paper_changed(sender, instance, **kwargs):
+    # The index carries the paper's title and duration.
+    invalidate_paper_index([instance.pk])
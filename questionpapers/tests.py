@@ -1,3 +1,173 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dashboard.student_stats import student_summary
+from dashboard.teacher_stats import teacher_dashboard
+
+from .models import Answer, PaperAttempt, Question, QuestionPaper, Subject
+
+User = get_user_model()
+
+# Full-page templates extend the site's base.html, which lives outside this app.
+PAGE_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'context_processors': [
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
+        'loaders': [
+            ('django.template.loaders.locmem.Loader', {
+                'base.html': '{% block head %}{% endblock %}{% block content %}{% endblock %}',
+            }),
+            'django.template.loaders.app_directories.Loader',
+        ],
+    },
+}]
+
+
+class PaperNavigationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username='paper_student', password='pw', role='STUDENT')
+        subject = Subject.objects.create(name='Physics')
+        self.paper = QuestionPaper.objects.create(
+            subject=subject, level='HL', paper_number='1', paper_type='past', is_published=True,
+        )
+        self.questions = [
+            Question.objects.create(paper=self.paper, order=i + 1, question_text=f'Q{i + 1}', question_type='MCQ')
+            for i in range(40)
+        ]
+        self.client.force_login(self.student)
+
+    def _load(self, q_order):
+        return self.client.get(reverse('questionpapers:load_question', args=[self.paper.id, q_order]))
+
+    def test_navigation_cost_is_constant_and_creates_no_rows(self):
+        self._load(1)  # warm the index
+        # Session + user, then one question and one answer lookup.
+        for q_order in (2, 20, 40):
+            with self.assertNumQueries(4):
+                res = self._load(q_order)
+            self.assertEqual(res.json()['q_order'], q_order)
+            self.assertIn(f'Q{q_order}<', res.json()['html'])
+        self.assertFalse(Answer.objects.exists())
+        self.assertFalse(PaperAttempt.objects.exists())
+
+    def test_answer_created_on_first_write_then_updated(self):
+        url = reverse('questionpapers:save_answer', args=[self.paper.id, 3])
+        self.assertEqual(self.client.post(url).json(), {'status': 'no_change'})
+        self.assertFalse(Answer.objects.exists())
+
+        self.assertEqual(self.client.post(url, {'selected_option': 'B'}).json()['status'], 'saved')
+        self.client.post(url, {'selected_option': 'C'})
+        answer = Answer.objects.get()
+        self.assertEqual((answer.question_id, answer.selected_option), (self.questions[2].id, 'C'))
+        self.assertIn('value="C"\n              checked', self._load(3).json()['html'])
+
+        # An empty choice clears the stored option.
+        self.assertEqual(self.client.post(url, {'selected_option': ''}).json()['status'], 'saved')
+        answer.refresh_from_db()
+        self.assertIsNone(answer.selected_option)
+
+    def test_index_refreshes_after_question_edits(self):
+        self._load(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            extra = Question.objects.create(paper=self.paper, order=0, question_text='Warm-up', question_type='MCQ')
+        self.assertIn('Warm-up', self._load(1).json()['html'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            extra.delete()
+        self.assertIn('Q1<', self._load(1).json()['html'])
+        self.assertEqual(self._load(99).json()['q_order'], 40)
+
+
+class PaperScoringTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='score_student', password='pw', role='STUDENT')
+        subject = Subject.objects.create(name='Chemistry')
+        self.paper = QuestionPaper.objects.create(subject=subject, level='SL', paper_number='1', paper_type='past')
+        self.questions = [
+            Question.objects.create(paper=self.paper, order=i + 1, question_type='MCQ', correct_option='A', marks=2)
+            for i in range(30)
+        ]
+        self.written = Question.objects.create(paper=self.paper, order=31, question_type='WRITTEN', marks=10)
+        for i, q in enumerate(self.questions):
+            Answer.objects.create(user=self.student, question=q, selected_option='a' if i % 3 else 'B')
+        PaperAttempt.objects.create(paper=self.paper, user=self.student)
+        self.client.force_login(self.student)
+
+    def test_final_submit_scores_in_constant_queries(self):
+        url = reverse('questionpapers:final_submit', args=[self.paper.id])
+        # Session + user, paper, mark answers submitted, two scoring aggregates,
+        # attempt lookup and the single UPDATE of the score.
+        with self.assertNumQueries(8):
+            self.client.post(url)
+        attempt = PaperAttempt.objects.get()
+        self.assertEqual((attempt.score, attempt.max_score), (40.0, 70.0))
+        self.assertTrue(attempt.submitted)
+        self.assertFalse(Answer.objects.filter(submitted=False).exists())
+
+    def test_rescore_command_applies_changed_answer_key(self):
+        from django.core.management import call_command
+
+        self.client.post(reverse('questionpapers:final_submit', args=[self.paper.id]))
+        Question.objects.filter(pk__in=[q.pk for q in self.questions]).update(correct_option='B')
+        teacher = User.objects.create_user(username='score_teacher', password='pw', role='TEACHER')
+        QuestionPaper.objects.filter(pk=self.paper.pk).update(created_by=teacher)
+        teacher_dashboard(teacher.id)
+        student_summary(self.student.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rescore_papers', '--paper', str(self.paper.id), stdout=io.StringIO())
+        attempt = PaperAttempt.objects.get()
+        self.assertEqual((attempt.score, attempt.max_score), (20.0, 70.0))
+        # bulk_update sends no signals; the command drops both cached dashboards itself.
+        self.assertIsNone(cache.get(f'dashboard:teacher:{teacher.id}'))
+        self.assertIsNone(cache.get(f'dashboard:student:{self.student.id}'))
+
+
+@override_settings(TEMPLATES=PAGE_TEMPLATES)
+class EvaluationWorkspaceTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='eval_teacher', password='pw', role='TEACHER')
+        subject = Subject.objects.create(name='Biology')
+        self.paper = QuestionPaper.objects.create(subject=subject, level='HL', paper_number='2', paper_type='past')
+        self.questions = [
+            Question.objects.create(paper=self.paper, order=i + 1, question_type='WRITTEN', question_text=f'W{i + 1}')
+            for i in range(30)
+        ]
+        self.attempts = []
+        for n in range(4):
+            student = User.objects.create_user(username=f'eval_s{n}', password='pw', role='STUDENT')
+            for q in self.questions[: (10, 20, 30, 0)[n]]:
+                Answer.objects.create(user=student, question=q, answer_file=f'answer_uploads/s{n}_{q.id}.pdf')
+            self.attempts.append(PaperAttempt.objects.create(paper=self.paper, user=student, submitted=n < 3))
+        self.client.force_login(self.teacher)
+
+    def test_workspace_queries_do_not_grow_with_questions(self):
+        url = reverse('questionpapers:evaluate_attempt', args=[self.attempts[2].id])
+        # Session + user, attempt (with user/paper/evaluation), questions, answers, and
+        # the next-ungraded lookup (two here: it wraps around to the first attempt).
+        with self.assertNumQueries(7):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'answer_uploads/s2_', count=60)  # view + download links
+        self.assertEqual(res.context['next_ungraded_id'], self.attempts[0].id)
+
+    def test_save_and_next_walks_the_ungraded_queue(self):
+        url = reverse('questionpapers:evaluate_attempt', args=[self.attempts[0].id])
+        res = self.client.post(url, {'marks': '12', 'feedback': '', 'save_next': '1'})
+        self.assertRedirects(res, reverse('questionpapers:evaluate_attempt', args=[self.attempts[1].id]), fetch_redirect_response=False)
+
+        res = self.client.get(reverse('questionpapers:teacher_attempts', args=[self.paper.id]))
+        rows = {a.id: a for a in res.context['attempts']}
+        self.assertEqual([rows[a.id].answered_count for a in self.attempts], [10, 20, 30, 0])
+        self.assertEqual(rows[self.attempts[1].id].upload_count, 20)
+        self.assertEqual(res.context['next_ungraded_id'], self.attempts[1].id)
+        self.assertContains(res, 'Graded: 12')
@@ -3,12 +3,15 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.contrib import messages
 from django.template.loader import render_to_string
 from collections import defaultdict
 from django.utils.text import slugify
-from django.db import models
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from accounts.roles import is_teacher_or_admin
 
 import os
 import time
@@ -16,6 +19,8 @@ import time
 from .models import (
     Subject, QuestionPaper, PaperAttempt, Question, Answer, Evaluation
 )
+from .navigation import invalidate_paper_index, paper_index, question_position
+from .scoring import mcq_scores, paper_max_score
 from .forms import (
     SubjectForm, QuestionPaperForm, SubmitAnswerForm, QuestionForm,
     AnswerUploadForm, EvaluationForm
@@ -25,7 +30,7 @@ from .forms import (
 # ROLE CHECK
 # -------------------------------
 def is_teacher(user):
-    return user.is_staff or user.groups.filter(name__iexact='Teachers').exists()
+    return is_teacher_or_admin(user)
 
 # -------------------------------
 # SUBJECT MANAGEMENT
@@ -206,59 +211,88 @@ def start_paper(request, pk):
         return redirect('questionpapers:paper_result', pk=attempt.pk)
     return redirect('questionpapers:take_paper', paper_id=paper.id, q_order=1)
 
+def _nav_question(paper_id, question_id, user):
+    """The question at a position and the student's answer to it (None until first saved)."""
+    question = Question.objects.filter(pk=question_id, paper_id=paper_id).first()
+    if question is None:
+        # Deleted since the index was cached.
+        invalidate_paper_index([paper_id])
+        raise Http404("Question not found.")
+    answer = Answer.objects.filter(user=user, question_id=question_id).first()
+    return question, answer
+
+
+def _write_answer(user, question_id, answer, selected_option, answer_file):
+    """Apply a student's change, creating the Answer row only on this first write.
+
+    selected_option None leaves the choice alone; an empty string clears it.
+    """
+    if answer is None:
+        answer = Answer(user=user, question_id=question_id)
+    if selected_option is not None:
+        answer.selected_option = selected_option or None
+    if answer_file:
+        answer.answer_file = answer_file
+    answer.submitted = False
+    if answer.pk is not None:
+        answer.save()
+        return answer
+    try:
+        with transaction.atomic():
+            answer.save()
+    except IntegrityError:
+        # A parallel request (double click) created it first; update that row.
+        existing = Answer.objects.get(user=user, question_id=question_id)
+        return _write_answer(user, question_id, existing, selected_option, answer_file)
+    return answer
+
+
 @login_required
 def take_paper(request, paper_id, q_order=1):
-    paper = get_object_or_404(QuestionPaper, id=paper_id)
+    index = paper_index(paper_id)
+    if index is None:
+        raise Http404("Question paper not found.")
     if is_teacher(request.user):
-        return redirect('questionpapers:upload_questions', paper_id=paper.id)
+        return redirect('questionpapers:upload_questions', paper_id=paper_id)
 
-    attempt, _ = PaperAttempt.objects.get_or_create(user=request.user, paper=paper, defaults={'started_at': timezone.now()})
+    attempt = PaperAttempt.objects.filter(user=request.user, paper_id=paper_id).only('id', 'started_at', 'submitted').first()
+    if attempt is None:
+        attempt, _ = PaperAttempt.objects.get_or_create(user=request.user, paper_id=paper_id, defaults={'started_at': timezone.now()})
     if attempt.submitted:
         return redirect('questionpapers:paper_result', pk=attempt.pk)
 
     elapsed = timezone.now() - attempt.started_at
-    remaining_seconds = max(0, paper.duration_minutes * 60 - int(elapsed.total_seconds()))
+    remaining_seconds = max(0, index['duration_minutes'] * 60 - int(elapsed.total_seconds()))
 
-    questions = list(paper.questions.all().order_by('order'))
-    if not questions:
+    if not index['question_ids']:
         messages.error(request, "No questions available for this paper.")
         return redirect('questionpapers:paper_list')
 
-    q_order = max(1, min(int(q_order), len(questions)))
-    q_index = q_order - 1
-    question = questions[q_index]
-
-    answer, _ = Answer.objects.get_or_create(user=request.user, question=question)
+    # Unsaved stand-in built from the cached index; templates only read id/title.
+    paper = QuestionPaper(id=index['id'], title=index['title'], duration_minutes=index['duration_minutes'])
+    q_total = len(index['question_ids'])
+    q_index, question_id = question_position(index, q_order)
+    question, answer = _nav_question(paper_id, question_id, request.user)
 
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         selected_option = request.POST.get('selected_option')
         answer_file = request.FILES.get('answer_file')
-        changed = False
-
-        if selected_option:
-            answer.selected_option = selected_option
-            answer.submitted = False
-            answer.save()
-            changed = True
-        if answer_file:
-            answer.answer_file = answer_file
-            answer.submitted = False
-            answer.save()
-            changed = True
+        if selected_option or answer_file:
+            answer = _write_answer(request.user, question_id, answer, selected_option or None, answer_file)
 
         html = render_to_string('questionpapers/question_fragment.html', {
             'question': question, 'answer': answer,
-            'q_index': q_index, 'q_total': len(questions), 'paper': paper
+            'q_index': q_index, 'q_total': q_total, 'paper': paper
         }, request=request)
 
         return JsonResponse({
             'html': html, 'q_index': q_index,
-            'q_total': len(questions), 'remaining_seconds': remaining_seconds
+            'q_total': q_total, 'remaining_seconds': remaining_seconds
         })
 
     return render(request, 'questionpapers/take_paper.html', {
         'paper': paper, 'question': question, 'answer': answer,
-        'q_index': q_index, 'q_total': len(questions),
+        'q_index': q_index, 'q_total': q_total,
         'remaining_seconds': remaining_seconds,
     })
 
@@ -267,16 +301,15 @@ def take_paper(request, paper_id, q_order=1):
 # -------------------------------
 @login_required
 def load_question(request, paper_id, q_order):
-    paper = get_object_or_404(QuestionPaper, id=paper_id)
-    questions = list(paper.questions.all().order_by('order'))
-    q_index = max(0, min(int(q_order)-1, len(questions)-1))
-    question = questions[q_index]
-    attempt, _ = PaperAttempt.objects.get_or_create(user=request.user, paper=paper, defaults={'started_at': timezone.now()})
-    answer, _ = Answer.objects.get_or_create(user=request.user, question=question)
+    index = paper_index(paper_id)
+    if index is None or not index['question_ids']:
+        return JsonResponse({'error': 'No questions available for this paper.'}, status=404)
+    q_index, question_id = question_position(index, q_order)
+    question, answer = _nav_question(paper_id, question_id, request.user)
 
     html = render_to_string('questionpapers/question_fragment.html', {
-        'paper': paper, 'question': question, 'q_index': q_index,
-        'q_total': len(questions), 'answer': answer,
+        'question': question, 'q_index': q_index,
+        'q_total': len(index['question_ids']), 'answer': answer,
     }, request=request)
     return JsonResponse({'html': html, 'q_order': q_index + 1})
 
@@ -285,30 +318,20 @@ def save_answer(request, paper_id, q_order):
     if request.method != 'POST':
         return JsonResponse({'error': 'Invalid request'}, status=400)
 
-    paper = get_object_or_404(QuestionPaper, id=paper_id)
-    questions = list(paper.questions.all().order_by('order'))
-    question = questions[int(q_order)-1]
-    answer, _ = Answer.objects.get_or_create(user=request.user, question=question)
+    index = paper_index(paper_id)
+    if index is None or not 1 <= int(q_order) <= len(index['question_ids']):
+        return JsonResponse({'error': 'Question not found.'}, status=404)
+    question_id = index['question_ids'][int(q_order) - 1]
 
     selected_option = request.POST.get('selected_option')
     answer_file = request.FILES.get('answer_file')
-    changed = False
-
-    if selected_option is not None:
-        answer.selected_option = selected_option
-        changed = True
-
-    if answer_file:
-        answer.answer_file = answer_file
-        changed = True
-
-    if changed:
-        answer.submitted = False
-        answer.save()
-        return JsonResponse({'status': 'saved', 'file_url': answer.answer_file.url})
-    else:
+    if selected_option is None and not answer_file:
         return JsonResponse({'status': 'no_change'})
 
+    answer = Answer.objects.filter(user=request.user, question_id=question_id).first()
+    answer = _write_answer(request.user, question_id, answer, selected_option, answer_file)
+    return JsonResponse({'status': 'saved', 'file_url': answer.answer_file.url if answer.answer_file else None})
+
 # -------------------------------
 # STUDENT: UPLOAD WRITTEN ANSWER
 # -------------------------------
@@ -343,27 +366,24 @@ def upload_written_answer(request, question_id):
 @login_required
 @require_POST
 def final_submit(request, paper_id):
-    paper = get_object_or_404(QuestionPaper, id=paper_id)
-    questions = paper.questions.all()
-    answers = Answer.objects.filter(user=request.user, question__in=questions)
-    answers.update(submitted=True)
-
-    total_marks = 0
-    obtained_marks = 0
-    for q in questions:
-        mark = getattr(q, 'marks', 0) or 0
-        total_marks += mark
-        if q.question_type == 'MCQ' and q.correct_option:
-            a = answers.filter(question=q).first()
-            if a and a.selected_option and a.selected_option.upper() == q.correct_option.upper():
-                obtained_marks += mark
-
-    attempt, _ = PaperAttempt.objects.get_or_create(paper=paper, user=request.user)
-    attempt.submitted = True
-    attempt.finished_at = timezone.now()
-    attempt.score = obtained_marks
-    attempt.max_score = total_marks
-    attempt.save()
+    paper = get_object_or_404(QuestionPaper.objects.only('id', 'created_by_id'), id=paper_id)
+    Answer.objects.filter(user=request.user, question__paper_id=paper.id).update(submitted=True)
+
+    scores = {
+        'submitted': True,
+        'finished_at': timezone.now(),
+        'score': mcq_scores(paper.id, user_ids=[request.user.id]).get(request.user.id, 0.0),
+        'max_score': paper_max_score(paper.id),
+    }
+    attempt = PaperAttempt.objects.filter(paper=paper, user=request.user).only('id', 'paper_id', 'user_id').first()
+    if attempt is not None:
+        attempt.paper = paper
+        for field, value in scores.items():
+            setattr(attempt, field, value)
+        # A single UPDATE that still sends post_save (teacher dashboards listen for it).
+        attempt.save(update_fields=list(scores))
+    else:
+        attempt, _ = PaperAttempt.objects.update_or_create(paper=paper, user=request.user, defaults=scores)
 
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({'status': 'ok', 'redirect_url': reverse('questionpapers:paper_result', args=[attempt.pk])})
@@ -388,23 +408,64 @@ def teacher_paper_list(request):
     return render(request, 'questionpapers/teacher_paper_list.html', {'papers': papers})
 
 
+def _answer_count(answers):
+    """Correlated COUNT(*) of an Answer queryset, for annotating attempts."""
+    counted = answers.order_by().values('user').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _next_ungraded_attempt_id(paper_id, after_id=None):
+    """Next submitted, unevaluated attempt on the paper after `after_id`, wrapping around."""
+    ungraded = (
+        PaperAttempt.objects.filter(paper_id=paper_id, submitted=True, evaluation__isnull=True)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    if after_id is not None:
+        next_id = ungraded.filter(id__gt=after_id).first()
+        if next_id is not None:
+            return next_id
+        ungraded = ungraded.exclude(id=after_id)
+    return ungraded.first()
+
+
 @user_passes_test(is_teacher)
 def teacher_attempts(request, paper_id):
     paper = get_object_or_404(QuestionPaper, id=paper_id)
-    attempts = paper.attempts.select_related('user', 'evaluation').all()
+    answers = Answer.objects.filter(user=OuterRef('user_id'), question__paper_id=paper.id)
+    attempts = (
+        paper.attempts.select_related('user', 'evaluation')
+        .annotate(
+            answered_count=_answer_count(answers.filter(Q(selected_option__gt='') | Q(answer_file__gt=''))),
+            upload_count=_answer_count(answers.filter(answer_file__gt='')),
+        )
+        .order_by('-submitted', 'id')
+    )
     return render(request, 'questionpapers/teacher_attempts.html', {
         'paper': paper,
-        'attempts': attempts
+        'attempts': attempts,
+        'question_total': len(paper_index(paper.id)['question_ids']),
+        'next_ungraded_id': _next_ungraded_attempt_id(paper.id),
     })
 
 
 @user_passes_test(is_teacher)
 def evaluate_attempt(request, attempt_id):
-    attempt = get_object_or_404(PaperAttempt, id=attempt_id)
-    question_answers = {
-        q: q.answers.filter(user=attempt.user).first()
-        for q in attempt.paper.questions.all()
+    attempt = get_object_or_404(PaperAttempt.objects.select_related('user', 'paper', 'evaluation'), id=attempt_id)
+
+    # Two queries for the whole workspace: the questions, then the student's answers.
+    questions = Question.objects.filter(paper_id=attempt.paper_id).order_by('order', 'id').only(
+        'id', 'paper_id', 'order', 'question_text', 'question_type', 'marks'
+    )
+    answers = {
+        a.question_id: a
+        for a in Answer.objects.filter(user_id=attempt.user_id, question__paper_id=attempt.paper_id)
+        .only('id', 'question_id', 'selected_option', 'answer_file')
     }
+    for answer in answers.values():
+        # Resolve storage URLs once (signed S3 URLs are computed per call).
+        answer.file_url = answer.answer_file.url if answer.answer_file else None
+    question_answers = {q: answers.get(q.id) for q in questions}
 
     # Try fetching existing evaluation
     try:
@@ -424,13 +485,17 @@ def evaluate_attempt(request, attempt_id):
             evaluation.save()
 
             # ✅ Update PaperAttempt with evaluation marks and total possible score
-            total_marks = attempt.paper.questions.aggregate(total=models.Sum('marks'))['total'] or 0
             attempt.score = float(evaluation.marks)
-            attempt.max_score = float(total_marks)
+            if attempt.max_score is None:
+                attempt.max_score = paper_max_score(attempt.paper_id)
             attempt.submitted = True
             attempt.save()
 
             messages.success(request, f"Evaluation saved for {attempt.user.username}.")
+            if 'save_next' in request.POST:
+                next_id = _next_ungraded_attempt_id(attempt.paper_id, after_id=attempt.id)
+                if next_id is not None:
+                    return redirect('questionpapers:evaluate_attempt', attempt_id=next_id)
             return redirect('questionpapers:teacher_attempts', paper_id=attempt.paper.id)
     else:
         form = EvaluationForm(instance=evaluation)
@@ -438,5 +503,6 @@ def evaluate_attempt(request, attempt_id):
     return render(request, 'questionpapers/evaluate_attempt.html', {
         'attempt': attempt,
         'form': form,
-        'question_answers': question_answers
+        'question_answers': question_answers,
+        'next_ungraded_id': _next_ungraded_attempt_id(attempt.paper_id, after_id=attempt.id),
     })
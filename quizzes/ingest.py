@@ -0,0 +1,184 @@
+"""Streaming quiz question import from .xlsx / .csv files.
+
+Rows are read one at a time (openpyxl read-only mode, or a csv reader over the
+upload stream), so memory stays flat regardless of file size. Each distinct
+(quiz_title, subject, difficulty) is resolved to a Quiz once, questions are inserted
+with chunked bulk_create, and rows that cannot be imported are reported as
+{'row': <spreadsheet row number>, 'error': <message>} instead of being skipped silently.
+
+Small uploads are imported inline by upload_quiz_excel. Larger ones are stored and
+imported by the 'quizzes.import_questions' background job, which resumes after the
+last committed chunk.
+"""
+import csv
+import io
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+
+from ib_project.images import queue_image_variants
+
+from .models import Question, Quiz
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+MAX_REPORTED_ERRORS = 500
+VALID_OPTIONS = ('A', 'B', 'C', 'D')
+
+
+class IngestError(Exception):
+    """The file as a whole cannot be read (bad format, missing header)."""
+
+
+def _chunk_size() -> int:
+    return max(1, int(getattr(settings, 'QUIZ_IMPORT_CHUNK_SIZE', 1000)))
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def iter_rows(fileobj, name):
+    """Yield (row number, {header: value}) for every non-empty data row."""
+    ext = os.path.splitext(name or '')[1].lower()
+    if ext == '.csv':
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        reader = csv.DictReader(text)
+        for row in reader:
+            if any(_cell(v) for v in row.values()):
+                yield reader.line_num, {(k or '').strip().lower(): v for k, v in row.items()}
+        return
+    if ext != '.xlsx':
+        raise IngestError(f'Unsupported file type {ext or "(none)"}; upload .xlsx or .csv.')
+
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise IngestError(f'Could not open workbook: {exc}') from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise IngestError('The first sheet is empty.')
+        keys = [_cell(h).lower() for h in header]
+        for number, values in enumerate(rows, start=2):
+            if any(_cell(v) for v in values):
+                yield number, dict(zip(keys, values))
+    finally:
+        workbook.close()
+
+
+def _question_fields(row) -> dict:
+    text = _cell(row.get('text'))
+    if not text:
+        raise ValueError('text is empty')
+    correct = (_cell(row.get('correct_option')) or 'A').upper()[:1]
+    if correct not in VALID_OPTIONS:
+        raise ValueError(f'correct_option must be one of {", ".join(VALID_OPTIONS)}')
+    return {
+        'text': text,
+        'option_a': _cell(row.get('option_a')),
+        'option_b': _cell(row.get('option_b')),
+        'option_c': _cell(row.get('option_c')),
+        'option_d': _cell(row.get('option_d')),
+        'correct_answer': correct,
+        'explanation': _cell(row.get('explanation')),
+        'image': _cell(row.get('image')) or None,
+    }
+
+
+class _QuizResolver:
+    """(title, subject, difficulty) -> quiz id, one lookup/insert per distinct key."""
+
+    def __init__(self):
+        self.ids = {}
+        self.created = 0
+
+    def __call__(self, row) -> int:
+        key = (
+            _cell(row.get('quiz_title')) or 'Untitled Quiz',
+            _cell(row.get('subject')) or 'General',
+            _cell(row.get('difficulty')) or 'Medium',
+        )
+        if key not in self.ids:
+            title, subject, difficulty = key
+            quiz = Quiz.objects.filter(title=title, subject=subject, difficulty=difficulty).order_by('id').first()
+            if quiz is None:
+                quiz = Quiz.objects.create(title=title, subject=subject, difficulty=difficulty, slug=slugify(title))
+                self.created += 1
+            self.ids[key] = quiz.id
+        return self.ids[key]
+
+
+def import_questions(rows, start_after=0, state=None, on_chunk=None) -> dict:
+    """Import rows from iter_rows(); returns {'created', 'quizzes_created', 'error_count', 'errors'}.
+
+    Rows numbered <= start_after are skipped (resume). `on_chunk(last_row, state)` runs
+    inside each chunk's transaction, so progress is committed together with the rows.
+    """
+    state = dict(state or {'created': 0, 'quizzes_created': 0, 'error_count': 0, 'errors': []})
+    resolve_quiz = _QuizResolver()
+    pending = []
+    last_row = start_after
+
+    def flush():
+        with transaction.atomic():
+            Question.objects.bulk_create(pending, batch_size=_chunk_size())
+            # bulk_create skips Question.save(), which queues derivatives for single saves.
+            queue_image_variants(Question, [q.pk for q in pending if q.image])
+            state['created'] += len(pending)
+            state['quizzes_created'] += resolve_quiz.created
+            resolve_quiz.created = 0
+            if on_chunk is not None:
+                on_chunk(last_row, state)
+        pending.clear()
+
+    for number, row in rows:
+        if number <= start_after:
+            continue
+        last_row = number
+        try:
+            pending.append(Question(quiz_id=resolve_quiz(row), **_question_fields(row)))
+        except Exception as exc:
+            state['error_count'] += 1
+            if len(state['errors']) < MAX_REPORTED_ERRORS:
+                state['errors'].append({'row': number, 'error': str(exc)})
+        if len(pending) >= _chunk_size():
+            flush()
+    flush()
+    return state
+
+
+def import_questions_job(job):
+    """Background job 'quizzes.import_questions': import a stored upload, then delete it.
+
+    The upload is also deleted when the import fails.
+    """
+    from exams.jobs import report_progress
+
+    path = job.params['path']
+    cursor = job.cursor or {}
+
+    def checkpoint(last_row, state):
+        report_progress(job, state['created'] + state['error_count'], cursor={'row': last_row, 'state': state})
+
+    try:
+        with default_storage.open(path, 'rb') as fh:
+            return import_questions(
+                iter_rows(fh, job.params.get('name') or path),
+                start_after=cursor.get('row', 0),
+                state=cursor.get('state'),
+                on_chunk=checkpoint,
+            )
+    finally:
+        # A failed job is never retried. Only a killed worker skips this, leaving the job
+        # running; run_jobs --requeue-stale then resumes it from the cursor with the upload.
+        default_storage.delete(path)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:07
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def drop_duplicate_answers(apps, schema_editor):
+    """Keep the latest answer per (attempt, question); older get_or_create races are dropped."""
+    AttemptAnswer = apps.get_model('quizzes', 'AttemptAnswer')
+    duplicated = (
+        AttemptAnswer.objects.filter(question__isnull=False)
+        .values('attempt_id', 'question_id')
+        .annotate(n=Count('id'), keep=Max('id'))
+        .filter(n__gt=1)
+    )
+    for row in list(duplicated):
+        AttemptAnswer.objects.filter(attempt_id=row['attempt_id'], question_id=row['question_id']).exclude(
+            id=row['keep']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_question_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='question_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddConstraint(
+            model_name='attemptanswer',
+            constraint=models.UniqueConstraint(fields=('attempt', 'question'), name='quizzes_answer_one_per_question'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:20
+
+import ib_project.content_store
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_quiz_runner_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=ib_project.content_store.get_content_storage, upload_to='question_images/'),
+        ),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from ib_project.content_store import get_content_storage
 
 User = get_user_model()
 
@@ -49,7 +50,8 @@ class Question(TimeStampedModel):
     option_d = models.TextField(blank=True, null=True)
     correct_answer = models.CharField(max_length=10)
     explanation = models.TextField(blank=True)
-    image = models.ImageField(upload_to='question_images/', null=True, blank=True)
+    image = models.ImageField(upload_to='question_images/', storage=get_content_storage, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # see ib_project.images
     is_active = models.BooleanField(default=True)
 
     class Meta:
@@ -58,6 +60,12 @@ class Question(TimeStampedModel):
         ]
         ordering = ['id']
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from ib_project.images import sync_image_variants
+
+        sync_image_variants(self, 'image', 'image_variants')
+
     def soft_delete(self):
         self.is_active = False
         self.save(update_fields=['is_active'])
@@ -75,8 +83,9 @@ class QuizAttempt(TimeStampedModel):
     quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, related_name='attempts')
     started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField(null=True, blank=True)
-    score = models.FloatField(default=0)
+    score = models.FloatField(default=0)  # correct answers so far, kept up to date per step
     max_score = models.FloatField(default=0)
+    question_ids = models.JSONField(default=list, blank=True)  # frozen at start; the runner's step order
 
 
 class AttemptAnswer(TimeStampedModel):
@@ -84,3 +93,9 @@ class AttemptAnswer(TimeStampedModel):
     question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, related_name='attempt_answers')
     selected_option = models.CharField(max_length=20, blank=True, null=True)
     is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            # One answer per question per attempt; take_question upserts on it.
+            models.UniqueConstraint(fields=['attempt', 'question'], name='quizzes_answer_one_per_question'),
+        ]
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from exams.jobs import enqueue, run_job
+from exams.models import BackgroundJob
+
+from .ingest import import_questions, iter_rows
+from .models import AttemptAnswer, Question, Quiz, QuizAttempt
+
+User = get_user_model()
+
+
+class QuizRunnerTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='quiz_student', password='pw', role='STUDENT')
+        self.quiz = Quiz.objects.create(title='Vectors')
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f'Q{i}', option_a='x', option_b='y', correct_answer='A')
+            for i in range(25)
+        ]
+        self.client.force_login(self.student)
+
+    def _answer(self, attempt, index, choice):
+        return self.client.post(reverse('quizzes:take_question', args=[attempt.id, index]), {'answer': choice})
+
+    def test_start_freezes_question_ids(self):
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual(attempt.question_ids, [q.id for q in self.questions])
+        self.assertEqual(attempt.max_score, 25)
+
+        # Later edits to the quiz do not change a running attempt.
+        self.questions[0].soft_delete()
+        attempt.refresh_from_db()
+        self.assertEqual(len(attempt.question_ids), 25)
+
+    def test_each_step_costs_constant_queries_and_keeps_score(self):
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        attempt = QuizAttempt.objects.get()
+
+        # Session + user, attempt, question, attempt lock, previous answer, upsert, score UPDATE, savepoints.
+        for index in (0, 12):
+            with self.assertNumQueries(10):
+                self._answer(attempt, index, 'A')
+        with self.assertNumQueries(9):  # wrong answer: score unchanged, no attempt UPDATE
+            self._answer(attempt, 1, 'B')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 2)
+
+        # Changing an answer overwrites the row and adjusts the score by one.
+        self._answer(attempt, 1, 'A')
+        self._answer(attempt, 0, 'C')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 2)
+        self.assertEqual(AttemptAnswer.objects.filter(attempt=attempt).count(), 3)
+
+        res = self._answer(attempt, 24, 'A')
+        self.assertRedirects(res, reverse('quizzes:quiz_result', args=[attempt.id]), fetch_redirect_response=False)
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.finished_at)
+        self.assertEqual(attempt.score, 3)
+
+    def test_resubmitting_an_answer_does_not_count_it_twice(self):
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        attempt = QuizAttempt.objects.get()
+        self._answer(attempt, 4, 'A')
+        self._answer(attempt, 4, 'A')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 1)
+        self.assertEqual(AttemptAnswer.objects.filter(attempt=attempt).count(), 1)
+
+    def test_legacy_attempt_is_frozen_on_first_step(self):
+        attempt = QuizAttempt.objects.create(user=self.student, quiz=self.quiz, max_score=25)
+        AttemptAnswer.objects.create(attempt=attempt, question=self.questions[3], selected_option='A', is_correct=True)
+        self._answer(attempt, 0, 'A')
+        attempt.refresh_from_db()
+        self.assertEqual(len(attempt.question_ids), 25)
+        self.assertEqual(attempt.score, 2)
+
+
+HEADER = ['quiz_title', 'subject', 'difficulty', 'text', 'option_a', 'option_b', 'correct_option', 'explanation']
+
+
+class QuizImportTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = self.settings(MEDIA_ROOT=self.tmpdir, QUIZ_IMPORT_CHUNK_SIZE=2, BACKGROUND_JOBS_EAGER=False)
+        self.settings_override.enable()
+        self.rows = [
+            ['Kinematics', 'Physics', 'Easy', f'Q{i}', 'x', 'y', 'b', ''] for i in range(4)
+        ] + [
+            ['Waves', 'Physics', 'Hard', 'W1', 'x', 'y', 'A', 'because'],
+            ['Waves', 'Physics', 'Hard', '', 'x', 'y', 'A', ''],
+            ['Waves', 'Physics', 'Hard', 'W2', 'x', 'y', 'Z', ''],
+        ]
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _xlsx(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(HEADER)
+        for row in self.rows:
+            sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def _csv(self):
+        lines = [','.join(HEADER)] + [','.join(row) for row in self.rows]
+        return ('\n'.join(lines) + '\n').encode()
+
+    def test_xlsx_rows_import_in_chunks_with_a_row_report(self):
+        Quiz.objects.create(title='Waves', subject='Physics', difficulty='Hard')
+        chunks = []
+        report = import_questions(iter_rows(self._xlsx(), 'bank.xlsx'), on_chunk=lambda row, state: chunks.append(row))
+
+        self.assertEqual((report['created'], report['quizzes_created'], report['error_count']), (5, 1, 2))
+        self.assertEqual([e['row'] for e in report['errors']], [7, 8])
+        self.assertEqual(chunks, [3, 5, 8])
+        self.assertEqual(Quiz.objects.count(), 2)
+        self.assertEqual(Question.objects.filter(quiz__title='Kinematics', correct_answer='B').count(), 4)
+
+    def test_resume_skips_committed_rows(self):
+        import_questions(iter_rows(io.BytesIO(self._csv()), 'bank.csv'), start_after=3)
+        self.assertEqual(sorted(Question.objects.values_list('text', flat=True)), ['Q2', 'Q3', 'W1'])
+
+    def test_upload_view_reports_created_and_skipped_rows(self):
+        staff = User.objects.create_user(username='quiz_staff', password='pw', role='TEACHER', is_staff=True)
+        self.client.force_login(staff)
+        upload = SimpleUploadedFile('bank.csv', self._csv(), content_type='text/csv')
+        res = self.client.post(reverse('quizzes:upload_quiz_excel'), {'excel': upload})
+
+        self.assertRedirects(res, reverse('quizzes:quiz_list'), fetch_redirect_response=False)
+        self.assertEqual(Question.objects.count(), 5)
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.kind, job.status), ('quizzes.import_questions', 'succeeded'))
+        self.assertEqual(job.result['errors'][0], {'row': 7, 'error': 'text is empty'})
+        text = ' '.join(str(m) for m in res.wsgi_request._messages)
+        self.assertIn('Successfully uploaded 5 questions.', text)
+        self.assertIn('row 8: correct_option must be one of A, B, C, D', text)
+
+    @override_settings(QUIZ_IMPORT_INLINE_MAX_BYTES=10)
+    def test_large_upload_is_left_to_the_worker(self):
+        staff = User.objects.create_user(username='quiz_staff', password='pw', role='TEACHER', is_staff=True)
+        self.client.force_login(staff)
+        self.client.post(reverse('quizzes:upload_quiz_excel'), {'excel': SimpleUploadedFile('bank.xlsx', self._xlsx().read())})
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_failed_import_deletes_the_stored_upload(self):
+        path = default_storage.save('quiz_imports/bank.xlsx', ContentFile(b'not a workbook'))
+        job = run_job(enqueue('quizzes.import_questions', {'path': path, 'name': 'bank.xlsx'}).pk)
+        self.assertEqual(job.status, 'failed')
+        self.assertFalse(default_storage.exists(path))
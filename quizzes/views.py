@@ -1,16 +1,19 @@
 # IB_Django/quizzes/views.py
-import csv, io, requests
-import pandas as pd
+import os, uuid
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import F
 from django.core.exceptions import PermissionDenied
 from .models import Quiz, Question, QuizAttempt, AttemptAnswer
 from .forms import QuizForm, QuestionForm
 from django.views.decorators.http import require_http_methods
-from django.utils.text import slugify
+from exams.jobs import enqueue, run_job
+from .ingest import SUPPORTED_EXTENSIONS
 
 # -------------------------------
 # Quiz List View
@@ -25,41 +28,74 @@ def quiz_list(request):
 @login_required
 def start_quiz(request, quiz_id):
     quiz = get_object_or_404(Quiz, pk=quiz_id, is_active=True)
+    question_ids = list(quiz.questions.filter(is_active=True).order_by('id').values_list('id', flat=True))
     attempt = QuizAttempt.objects.create(
         user=request.user,
         quiz=quiz,
-        max_score=quiz.question_count()
+        question_ids=question_ids,
+        max_score=len(question_ids)
     )
     return redirect('quizzes:take_question', attempt_id=attempt.id, question_index=0)
 
+
+def _freeze_questions(attempt):
+    """Attempts started before question_ids existed: freeze the current list (and score) once."""
+    attempt.question_ids = list(
+        Question.objects.filter(quiz_id=attempt.quiz_id, is_active=True).order_by('id').values_list('id', flat=True)
+    )
+    attempt.max_score = len(attempt.question_ids)
+    attempt.score = attempt.answers.filter(is_correct=True).count()
+    attempt.save(update_fields=['question_ids', 'max_score', 'score', 'updated_at'])
+
 # -------------------------------
 # Take Question
 # -------------------------------
 @login_required
 def take_question(request, attempt_id, question_index):
-    attempt = get_object_or_404(QuizAttempt, pk=attempt_id, user=request.user)
-    questions = list(attempt.quiz.questions.filter(is_active=True))
+    attempt = get_object_or_404(
+        QuizAttempt.objects.select_related('quiz').only('id', 'user_id', 'question_ids', 'finished_at', 'quiz__title'),
+        pk=attempt_id, user=request.user
+    )
+    if attempt.finished_at is not None:
+        return redirect('quizzes:quiz_result', attempt_id=attempt.id)
+    if not attempt.question_ids:
+        _freeze_questions(attempt)
+    question_ids = attempt.question_ids
 
-    if question_index < 0 or question_index >= len(questions):
+    if question_index < 0 or question_index >= len(question_ids):
         return redirect('quizzes:quiz_result', attempt_id=attempt.id)
 
-    question = questions[question_index]
+    question = get_object_or_404(Question, pk=question_ids[question_index])
+    question.quiz = attempt.quiz
 
     if request.method == 'POST':
         selected = request.POST.get('answer')
+        correct = selected == question.correct_answer
+        next_index = question_index + 1
         with transaction.atomic():
-            ans, _ = AttemptAnswer.objects.get_or_create(attempt=attempt, question=question)
-            ans.selected_option = selected  # Save user’s answer correctly
-            ans.is_correct = (selected == question.correct_answer)
-            ans.save()
+            # Serialise steps of one attempt: a double-submitted answer must not count twice.
+            QuizAttempt.objects.select_for_update().filter(pk=attempt.pk).values_list('pk').first()
+            previous = AttemptAnswer.objects.filter(attempt=attempt, question=question).values_list('is_correct', flat=True).first()
+            # Single INSERT ... ON CONFLICT DO UPDATE; re-answering a question overwrites it.
+            AttemptAnswer.objects.bulk_create(
+                [AttemptAnswer(attempt=attempt, question=question, selected_option=selected, is_correct=correct)],
+                update_conflicts=True,
+                unique_fields=['attempt', 'question'],
+                update_fields=['selected_option', 'is_correct', 'updated_at'],
+            )
+            # Keep the score current: +1/-1 only when this answer's correctness changed.
+            changed = []
+            delta = int(correct) - int(bool(previous))
+            if delta:
+                attempt.score = F('score') + delta
+                changed.append('score')
+            if next_index >= len(question_ids):
+                attempt.finished_at = timezone.now()
+                changed.append('finished_at')
+            if changed:
+                attempt.save(update_fields=[*changed, 'updated_at'])
 
-        next_index = question_index + 1
-        if next_index >= len(questions):
-            # Quiz finished: calculate score
-            correct_count = attempt.answers.filter(is_correct=True).count()
-            attempt.score = correct_count
-            attempt.finished_at = timezone.now()
-            attempt.save()
+        if next_index >= len(question_ids):
             return redirect('quizzes:quiz_result', attempt_id=attempt.id)
         else:
             return redirect('quizzes:take_question', attempt_id=attempt.id, question_index=next_index)
@@ -67,7 +103,7 @@ def take_question(request, attempt_id, question_index):
     return render(request, 'quizzes/take_question.html', {
         'question': question,
         'question_index': question_index,
-        'total': len(questions),
+        'total': len(question_ids),
         'attempt': attempt,
     })
 
@@ -96,65 +132,33 @@ def upload_quiz_excel(request):
 
     if request.method == 'POST' and request.FILES.get('excel'):
         file = request.FILES['excel']
-        try:
-            # CSV support
-            if str(file.name).endswith('.csv'):
-                decoded = file.read().decode('utf-8')
-                reader = csv.DictReader(io.StringIO(decoded))
-                rows = list(reader)
-            else:  # Excel support
-                df = pd.read_excel(file)
-                rows = df.to_dict(orient='records')
-        except Exception as e:
-            messages.error(request, f'Failed to read file: {e}')
+        ext = os.path.splitext(file.name)[1].lower()
+        if ext not in SUPPORTED_EXTENSIONS:
+            messages.error(request, f'Unsupported file type {ext or "(none)"}; upload .xlsx or .csv.')
+            return redirect('quizzes:upload_quiz_excel')
+
+        # The import runs as a background job reading the stored upload; small files
+        # are processed right away, large ones are left to the worker.
+        path = default_storage.save(f'quiz_imports/{uuid.uuid4().hex}{ext}', file)
+        job = enqueue('quizzes.import_questions', {'path': path, 'name': file.name}, user=request.user)
+        if file.size <= getattr(settings, 'QUIZ_IMPORT_INLINE_MAX_BYTES', 2 * 1024 * 1024):
+            run_job(job.pk)
+        job.refresh_from_db()
+
+        if job.status == 'failed':
+            messages.error(request, f'Failed to read file: {job.error}')
             return redirect('quizzes:upload_quiz_excel')
+        if job.status != 'succeeded':
+            messages.info(request, f'Large file queued for import (job {job.pk}); progress at /api/jobs/{job.pk}/.')
+            return redirect('quizzes:quiz_list')
 
-        created_questions = 0
-        quiz_cache = {}
-
-        for row in rows:
-            try:
-                title = str(row.get('quiz_title') or 'Untitled Quiz').strip()
-                subject = str(row.get('subject') or 'General').strip()
-                difficulty = str(row.get('difficulty') or 'Medium').strip()
-
-                # Unique cache key for quizzes
-                cache_key = f"{title}_{subject}_{difficulty}"
-                if cache_key not in quiz_cache:
-                    quiz, _ = Quiz.objects.get_or_create(
-                        title=title,
-                        subject=subject,
-                        difficulty=difficulty,
-                        defaults={'slug': slugify(title)}
-                    )
-                    quiz_cache[cache_key] = quiz
-                else:
-                    quiz = quiz_cache[cache_key]
-
-                # Handle image field
-                img_value = row.get('image', None)
-                if not isinstance(img_value, str) or img_value.strip() == '':
-                    img_value = None
-
-                # Create question safely
-                Question.objects.create(
-                    quiz=quiz,
-                    text=str(row.get('text') or '').strip(),
-                    option_a=str(row.get('option_a') or '').strip(),
-                    option_b=str(row.get('option_b') or '').strip(),
-                    option_c=str(row.get('option_c') or '').strip(),
-                    option_d=str(row.get('option_d') or '').strip(),
-                    correct_answer=str(row.get('correct_option') or 'A').strip().upper()[0],
-                    explanation=str(row.get('explanation') or '').strip(),
-                    image=img_value
-                )
-                created_questions += 1
-
-            except Exception as e:
-                print(f"Skipping row due to error: {e}")
-                continue
-
-        messages.success(request, f'Successfully uploaded {created_questions} questions.')
+        report = job.result
+        messages.success(request, f'Successfully uploaded {report["created"]} questions.')
+        if report['error_count']:
+            shown = [f'row {e["row"]}: {e["error"]}' for e in report['errors'][:10]]
+            if report['error_count'] > len(shown):
+                shown.append(f'and {report["error_count"] - len(shown)} more')
+            messages.warning(request, f'Skipped {report["error_count"]} rows ({"; ".join(shown)}).')
         return redirect('quizzes:quiz_list')
 
     return render(request, 'quizzes/upload_excel.html')